@@ -2,33 +2,126 @@
 
 Este módulo contém a factory `create_app` que é responsável por criar e
 configurar a instância da aplicação Flask, juntamente com todas as suas
-extensões, como SQLAlchemy, SocketIO, e CSRFProtect.
+extensões, como SQLAlchemy, SocketIO, e CSRFProtect, e a factory
+`create_tracking_app`, que cria uma aplicação apenas com as rotas de
+rastreamento.
 
 A utilização do padrão de factory permite criar múltiplas instâncias da
 aplicação com diferentes configurações, o que é especialmente útil para
 testes.
 """
 
-from flask import Flask
-from flask_wtf.csrf import CSRFProtect
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from flask_socketio import SocketIO
+from flask import Flask, Response
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy.orm import Session
+from .assets import init_static_assets
 from .config import Config
-from .routes import init_routes
+from .database import configure_engine, engine_options, sqlite_pragmas
+from .logging_setup import configure_logging
+from . import metrics
+from .metrics import instrument_sessions
+from .rate_limits import init_rate_limits
+from .tracking import init_tracking_routes
 
 # Instâncias das extensões Flask.
 # São inicializadas aqui para serem importadas em outros módulos sem causar
 # importações circulares. A vinculação com a aplicação (`.init_app()`)
 # ocorre dentro da factory `create_app`.
-socketio = SocketIO()
+#
+# O Flask-SocketIO, o Flask-Migrate, o Flask-Limiter, o Flask-WTF e as rotas
+# (que importam o envio, o BeautifulSoup e o bleach) só são importados por
+# `create_app`: o serviço de rastreamento e os processos que usam apenas os
+# modelos não pagam por eles. `socketio` é criado no primeiro acesso
+# (`from app import socketio`), veja `__getattr__`.
 db = SQLAlchemy()
-migrate = Migrate()
 
 
-def create_app(testing=False):
+def _socketio():
+    """Retorna a instância do SocketIO, criando-a no primeiro uso."""
+    if "socketio" not in globals():
+        from flask_socketio import SocketIO
+
+        globals()["socketio"] = SocketIO()
+    return globals()["socketio"]
+
+
+def __getattr__(name):
+    """Cria a instância do SocketIO no primeiro acesso a `app.socketio`."""
+    if name == "socketio":
+        return _socketio()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _configure(app, testing, config=None):
+    """Carrega a configuração e o logging da aplicação.
+
+    Args:
+        app (Flask): A aplicação a configurar.
+        testing (bool): Se True, usa a configuração de testes.
+        config (dict, optional): Valores que sobrescrevem a configuração,
+            aplicados por último.
+    """
+    # Carrega as configurações a partir da classe Config
+    app.config.from_object(Config)
+
+    if testing:
+        # Sobrescreve configurações para o modo de teste
+        app.config["TESTING"] = True
+        app.config["WTF_CSRF_ENABLED"] = False  # Desabilita CSRF para testes
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            "sqlite:///:memory:"  # Usa banco de dados em memória
+        )
+        app.config["TEMPLATES_FILE_PATH"] = "test_templates.json"
+        app.config["RATELIMIT_ENABLED"] = False  # Desabilita o limitador
+        app.config["RATELIMIT_STORAGE_URI"] = "memory://"
+
+    if config:
+        app.config.update(config)
+
+    # Configura o logging: registros em JSON, gravados por uma thread a
+    # partir de uma fila, com amostragem das linhas de cada e-mail.
+    configure_logging(
+        level=app.config["LOG_LEVEL"],
+        fmt=app.config["LOG_FORMAT"],
+        path=app.config["LOG_FILE"],
+        sample_rate=app.config["LOG_SAMPLE_RATE"],
+    )
+
+
+def _init_database(app):
+    """Inicializa o SQLAlchemy com as opções do engine e os PRAGMAs do SQLite.
+
+    Args:
+        app (Flask): A aplicação já configurada.
+    """
+    # Opções do engine conforme o perfil de implantação. Opções definidas
+    # explicitamente em SQLALCHEMY_ENGINE_OPTIONS têm precedência.
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(
+            app.config["SQLALCHEMY_DATABASE_URI"], app.config["DB_PROFILE"]
+        ),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+    db.init_app(app)
+
+    # Mede a duração dos flushes das sessões para a rota /metrics.
+    instrument_sessions(Session)
+
+    # Aplica os PRAGMAs do SQLite (WAL, synchronous, busy_timeout e mmap) a
+    # cada conexão aberta pelo engine.
+    with app.app_context():
+        configure_engine(
+            db.engine,
+            sqlite_pragmas(
+                journal_mode=app.config["SQLITE_JOURNAL_MODE"],
+                synchronous=app.config["SQLITE_SYNCHRONOUS"],
+                busy_timeout=app.config["SQLITE_BUSY_TIMEOUT"],
+                mmap_size=app.config["SQLITE_MMAP_SIZE"],
+            ),
+        )
+
+
+def create_app(testing=False, config=None):
     """Cria e configura uma instância da aplicação Flask.
 
     Esta função segue o padrão de Application Factory. Ela configura a aplicação
@@ -39,24 +132,20 @@ def create_app(testing=False):
         testing (bool, optional): Se True, a aplicação é configurada para o
             ambiente de testes. Isso inclui desabilitar o CSRF e usar um
             banco de dados em memória. Defaults to False.
+        config (dict, optional): Valores que sobrescrevem a configuração
+            (inclusive a de testes). Defaults to None.
 
     Returns:
         tuple[Flask, SocketIO]: Uma tupla contendo a instância da aplicação
             Flask (`app`) e a instância do SocketIO (`socketio`) configuradas.
     """
-    app = Flask(__name__)
-
-    # Carrega as configurações a partir da classe Config
-    app.config.from_object(Config)
+    from flask_migrate import Migrate
+    from flask_wtf.csrf import CSRFProtect
+    from .cli import init_cli
+    from .routes import init_routes
 
-    if testing:
-        # Sobrescreve configurações para o modo de teste
-        app.config["TESTING"] = True
-        app.config["WTF_CSRF_ENABLED"] = False  # Desabilita CSRF para testes
-        app.config["SQLALCHEMY_DATABASE_URI"] = (
-            "sqlite:///:memory:"  # Usa banco de dados em memória
-        )
-        app.config["TEMPLATES_FILE_PATH"] = "test_templates.json"
+    app = Flask(__name__)
+    _configure(app, testing, config)
 
     # Define a chave secreta para segurança do CSRF e sessões
     app.secret_key = Config.SECRET_KEY
@@ -65,20 +154,71 @@ def create_app(testing=False):
     CSRFProtect(app)
 
     # Inicializa o SQLAlchemy e o Flask-Migrate com a aplicação
-    db.init_app(app)
-    migrate.init_app(app, db)
+    _init_database(app)
+    Migrate(app, db)
+
+    # Inicializa o SocketIO com a aplicação. Com uma fila de mensagens, os
+    # eventos emitidos por outros processos (workers web e o processo de
+    # envio) também chegam aos clientes conectados.
+    socketio = _socketio()
+    socketio.init_app(
+        app,
+        message_queue=app.config["SOCKETIO_MESSAGE_QUEUE"] or None,
+        async_mode=app.config["SOCKETIO_ASYNC_MODE"] or None,
+    )
+
+    # Registra as rotas e os comandos de linha de comando da aplicação
+    init_routes(app)
+    init_cli(app)
 
-    # Configura o limitador de requisições, exceto em modo de teste
-    if not testing:
-        Limiter(app=app, key_func=get_remote_address, default_limits=["500 per hour"])
+    # Serve os arquivos estáticos com impressão digital, da memória e
+    # pré-comprimidos.
+    init_static_assets(app)
 
-    # Inicializa o SocketIO com a aplicação
-    socketio.init_app(app)
-
-    # Registra as rotas da aplicação
-    init_routes(app)
+    # Configura o limitador de requisições (desativado em modo de teste),
+    # com as políticas de cada rota.
+    init_rate_limits(app)
 
     # Importa os modelos para que o SQLAlchemy e o Alembic os reconheçam
     from . import models
 
     return app, socketio
+
+
+def create_tracking_app(testing=False, config=None):
+    """Cria uma aplicação apenas com as rotas de rastreamento.
+
+    A aplicação registra somente `/track/open/<token>`, `/track/click/<token>`
+    e `/metrics`, sem a interface, a API, o envio, o CSRF, o limitador de
+    requisições (a menos que `RATELIMIT_TRACKING` seja definido), o SocketIO
+    e o Flask-Migrate. Ela usa a mesma configuração e
+    o mesmo banco de dados da aplicação completa, e pode ser executada e
+    escalada separadamente para atender o tráfego do pixel de rastreamento
+    (veja `tracker.py`).
+
+    Args:
+        testing (bool, optional): Se True, usa a configuração de testes.
+            Defaults to False.
+        config (dict, optional): Valores que sobrescrevem a configuração.
+            Defaults to None.
+
+    Returns:
+        Flask: A aplicação de rastreamento.
+    """
+    app = Flask(__name__, static_folder=None)
+    _configure(app, testing, config)
+    _init_database(app)
+
+    init_tracking_routes(app)
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Expõe as métricas do processo no formato de texto do Prometheus."""
+        return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+    if app.config["RATELIMIT_TRACKING"]:
+        init_rate_limits(app)
+
+    from . import models
+
+    return app
@@ -0,0 +1,204 @@
+"""Arquivos estáticos com impressão digital e pré-comprimidos.
+
+Na inicialização, cada arquivo de `app/static` é lido uma vez e recebe um
+nome com o hash do seu conteúdo (`js/main.3f2a9c1b7d4e.js`), e as variantes
+gzip (e brotli, se o pacote `Brotli` estiver instalado) são calculadas em
+memória. `url_for('static', filename='js/main.js')` passa a gerar o nome com
+o hash, servido com `Cache-Control: immutable` de um ano: o navegador e os
+proxies não voltam a pedir o arquivo até que o conteúdo, e portanto o nome,
+mude. Nomes sem hash continuam sendo servidos do disco, sem cache longo.
+
+Como o conteúdo é lido apenas na inicialização, alterações nos arquivos só
+aparecem após reiniciar o servidor; em desenvolvimento, desative com
+`STATIC_FINGERPRINT=False`.
+
+- StaticAssets: Os arquivos estáticos em memória, com as suas variantes.
+- init_static_assets: Serve os arquivos estáticos de uma aplicação pelo
+  `StaticAssets`.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response, request
+
+try:
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover - library optional
+    brotli = None
+
+# Um ano, o máximo recomendado para `max-age`.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Arquivos menores que isto não são comprimidos: o ganho não compensa.
+MIN_COMPRESS_SIZE = 256
+
+# Tipos comprimidos, além de `text/*`.
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "text/javascript",
+}
+
+
+class Asset:
+    """Um arquivo estático em memória.
+
+    Attributes:
+        filename (str): O caminho original, relativo à pasta de estáticos.
+        fingerprinted (str): O caminho com o hash do conteúdo.
+        digest (str): O hash (SHA-256) do conteúdo, usado também como ETag.
+        mimetype (str): O tipo do arquivo.
+        variants (dict[str, bytes]): O conteúdo por codificação
+            ("identity", "gzip" e "br").
+    """
+
+    __slots__ = ("filename", "fingerprinted", "digest", "mimetype", "variants")
+
+    def __init__(self, filename, fingerprinted, digest, mimetype, variants):
+        self.filename = filename
+        self.fingerprinted = fingerprinted
+        self.digest = digest
+        self.mimetype = mimetype
+        self.variants = variants
+
+
+def _compressible(mimetype):
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+class StaticAssets:
+    """Os arquivos de uma pasta de estáticos, com impressão digital.
+
+    Attributes:
+        folder (str): A pasta lida.
+        encodings (list[str]): As codificações disponíveis, em ordem de
+            preferência.
+    """
+
+    def __init__(self, folder, hash_length=12):
+        """Lê e comprime os arquivos da pasta.
+
+        Args:
+            folder (str): A pasta de estáticos.
+            hash_length (int, optional): Quantos caracteres do hash entram no
+                nome do arquivo. Defaults to 12.
+        """
+        self.folder = folder
+        self.encodings = (["br"] if brotli is not None else []) + ["gzip"]
+        self._by_filename = {}
+        self._by_fingerprint = {}
+        for root, _, files in os.walk(folder):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    asset = self._build(filename, f.read(), hash_length)
+                self._by_filename[filename] = asset
+                self._by_fingerprint[asset.fingerprinted] = asset
+
+    def _build(self, filename, data, hash_length):
+        digest = hashlib.sha256(data).hexdigest()
+        stem, ext = os.path.splitext(filename)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        asset = Asset(
+            filename=filename,
+            fingerprinted=f"{stem}.{digest[:hash_length]}{ext}",
+            digest=digest,
+            mimetype=mimetype,
+            variants={"identity": data},
+        )
+        if len(data) >= MIN_COMPRESS_SIZE and _compressible(mimetype):
+            compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(data, quality=11)
+            for encoding, body in compressed.items():
+                if len(body) < len(data):
+                    asset.variants[encoding] = body
+        return asset
+
+    def __len__(self):
+        return len(self._by_filename)
+
+    def url_filename(self, filename):
+        """Retorna o nome com impressão digital de um arquivo.
+
+        Args:
+            filename (str): O caminho original do arquivo.
+
+        Returns:
+            str: O caminho com o hash, ou o próprio caminho se o arquivo não
+                foi lido na inicialização.
+        """
+        asset = self._by_filename.get(filename)
+        return asset.fingerprinted if asset else filename
+
+    def get(self, fingerprinted):
+        """Retorna o arquivo de um nome com impressão digital, ou None."""
+        return self._by_fingerprint.get(fingerprinted)
+
+    def response(self, asset):
+        """Monta a resposta de um arquivo na melhor codificação aceita.
+
+        Deve ser chamada durante uma requisição; a codificação é escolhida
+        pelo cabeçalho `Accept-Encoding`.
+
+        Args:
+            asset (Asset): O arquivo.
+
+        Returns:
+            Response: A resposta, com cache imutável e ETag (responde 304 a
+                um `If-None-Match` igual).
+        """
+        available = [e for e in self.encodings if e in asset.variants]
+        encoding = request.accept_encodings.best_match(available) or "identity"
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != "identity":
+            response.content_encoding = encoding
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add("Accept-Encoding")
+        response.set_etag(
+            asset.digest if encoding == "identity" else f"{asset.digest}-{encoding}"
+        )
+        return response.make_conditional(request)
+
+
+def init_static_assets(app):
+    """Passa a servir os arquivos estáticos da aplicação com impressão digital.
+
+    Substitui a rota `static` do Flask: nomes com hash são servidos da
+    memória, e os demais continuam sendo lidos do disco. `url_for('static')`
+    passa a gerar os nomes com hash.
+
+    Args:
+        app (Flask): A aplicação.
+
+    Returns:
+        StaticAssets | None: Os arquivos lidos, ou None se a aplicação não
+            tiver pasta de estáticos ou `STATIC_FINGERPRINT` estiver
+            desativado.
+    """
+    if not app.config["STATIC_FINGERPRINT"] or "static" not in app.view_functions:
+        return None
+
+    assets = StaticAssets(app.static_folder)
+    send_static_file = app.view_functions["static"]
+
+    def static(filename):
+        asset = assets.get(filename)
+        if asset is None:
+            return send_static_file(filename=filename)
+        return assets.response(asset)
+
+    app.view_functions["static"] = static
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = assets.url_filename(values["filename"])
+
+    app.extensions["static_assets"] = assets
+    return assets
@@ -0,0 +1,94 @@
+"""Caches em memória, locais ao processo.
+
+Este módulo fornece estruturas de cache simples e seguras para uso entre
+threads, pensadas para caminhos quentes da aplicação (como as rotas de
+rastreamento), onde uma consulta ao banco de dados por requisição seria cara.
+
+- TTLCache: Um cache limitado por número de entradas e por tempo de vida (TTL).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Sentinela usada para diferenciar "chave ausente" de um valor `None` armazenado.
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache limitado com expiração por tempo de vida (TTL).
+
+    As entradas expiram `ttl` segundos após terem sido inseridas; leituras não
+    renovam o prazo, de modo que a janela de validade é fixa a partir da
+    primeira inserção. Quando o cache atinge `maxsize`, a entrada mais antiga
+    é descartada. Como o TTL é o mesmo para todas as entradas, a ordem de
+    inserção coincide com a ordem de expiração, e a limpeza é O(1) amortizado.
+
+    Attributes:
+        maxsize (int): Número máximo de entradas mantidas em memória.
+        ttl (float): Tempo de vida de cada entrada, em segundos.
+    """
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic):
+        """Inicializa o cache.
+
+        Args:
+            maxsize (int): Número máximo de entradas. Deve ser positivo.
+            ttl (float): Tempo de vida de cada entrada, em segundos.
+            timer (callable, optional): Função que retorna o instante atual em
+                segundos. Útil para testes. Defaults to `time.monotonic`.
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize deve ser positivo.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge_expired(self, now):
+        """Remove as entradas expiradas do início da fila (requer o lock)."""
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+
+    def get(self, key, default=None):
+        """Retorna o valor associado a `key`, ou `default` se ausente/expirado."""
+        with self._lock:
+            now = self._timer()
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        """Armazena `value` sob `key`, reiniciando sua janela de validade."""
+        with self._lock:
+            now = self._timer()
+            self._purge_expired(now)
+            self._data.pop(key, None)
+            self._data[key] = (now + self.ttl, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove `key` do cache e retorna seu valor, ou `default` se ausente."""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+            return default if item is _MISSING else item[1]
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            self._purge_expired(self._timer())
+            return len(self._data)
@@ -0,0 +1,183 @@
+"""Comandos de linha de comando da aplicação (Flask CLI).
+
+Os comandos são registrados na aplicação pela função `init_cli` e executados
+com `flask <comando>`, por exemplo:
+
+    $ flask import-templates
+    $ flask replay-campaign 42 --profiler cprofile
+    $ flask serve --workers 2
+    $ flask run-sender
+"""
+
+import os
+import signal
+
+import click
+
+
+def init_cli(app):
+    """Registra os comandos de linha de comando da aplicação.
+
+    Args:
+        app (Flask): A instância da aplicação Flask.
+    """
+
+    @app.cli.command("import-templates")
+    @click.argument("path", required=False)
+    def import_templates(path):
+        """Importa os templates de um arquivo templates.json legado.
+
+        Por padrão, usa o arquivo definido em TEMPLATES_FILE_PATH. Templates
+        já importados são ignorados.
+        """
+        from .template_store import import_templates_file
+
+        if path is None:
+            templates_filename = app.config.get("TEMPLATES_FILE_PATH", "templates.json")
+            path = os.path.join(app.root_path, "..", templates_filename)
+        try:
+            imported = import_templates_file(path)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"{imported} template(s) importado(s) de {path}.")
+
+    @app.cli.command("replay-campaign")
+    @click.argument("campaign_id", type=int)
+    @click.option(
+        "--profiler",
+        type=click.Choice(["sampling", "cprofile"]),
+        default="sampling",
+        show_default=True,
+        help="O profiler usado no reenvio.",
+    )
+    @click.option("--limit", type=int, help="Reenvia apenas os N primeiros e-mails.")
+    @click.option("--output", help="Diretório do artefato (PROFILE_OUTPUT_DIR).")
+    @click.option(
+        "--base-url",
+        default="http://localhost:5000/",
+        show_default=True,
+        help="URL base dos links de rastreamento.",
+    )
+    def replay_campaign(campaign_id, profiler, limit, output, base_url):
+        """Reenvia uma campanha gravada para um SMTP local, sob um profiler.
+
+        Os e-mails são entregues a um servidor SMTP local que os descarta, sem
+        a pausa entre envios, e o perfil é gravado em um arquivo .folded
+        (sampling) ou .pstats (cprofile). O reenvio cria uma nova campanha;
+        use uma cópia do banco de produção.
+        """
+        from .profiling import replay_campaign as replay
+
+        try:
+            replayed = replay(
+                campaign_id,
+                kind=profiler,
+                output_dir=output or app.config.get("PROFILE_OUTPUT_DIR", "profiles"),
+                limit=limit,
+                base_url=base_url,
+                interval=app.config.get("PROFILE_SAMPLE_INTERVAL", 0.005),
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        result = replayed["result"]
+        if result["status"] != "success":
+            raise click.ClickException(result["message"])
+        click.echo(
+            f"{replayed['delivered']} e-mail(s) reenviado(s) para o SMTP local. "
+            f"Perfil gravado em {replayed['profile']}."
+        )
+
+    @app.cli.command("serve")
+    @click.option("--host", default="0.0.0.0", show_default=True)
+    @click.option("--port", type=int, default=5000, show_default=True)
+    @click.option(
+        "--workers",
+        type=int,
+        default=lambda: app.config["WEB_WORKERS"],
+        help="Processos web (WEB_WORKERS).",
+    )
+    @click.option(
+        "--worker-class",
+        type=click.Choice(["gevent", "eventlet", "gthread"]),
+        default=lambda: app.config["WEB_WORKER_CLASS"],
+        help="Tipo de worker do Gunicorn (WEB_WORKER_CLASS).",
+    )
+    @click.option(
+        "--threads",
+        type=int,
+        default=8,
+        show_default=True,
+        help="Threads por processo (apenas gthread).",
+    )
+    @click.option(
+        "--tracking-only",
+        is_flag=True,
+        help="Executa apenas as rotas de rastreamento (tracker.py).",
+    )
+    def serve(host, port, workers, worker_class, threads, tracking_only):
+        """Executa a aplicação em produção, com o Gunicorn.
+
+        Com mais de um worker, os clientes do SocketIO precisam de sessões
+        fixas (sticky sessions) no balanceador e de SOCKETIO_MESSAGE_QUEUE.
+        Com --tracking-only, executa o serviço de rastreamento, sem SocketIO.
+        """
+        from .server import gunicorn_command
+
+        if (
+            workers > 1
+            and not tracking_only
+            and not app.config["SOCKETIO_MESSAGE_QUEUE"]
+        ):
+            click.echo(
+                "Aviso: com mais de um worker, configure SOCKETIO_MESSAGE_QUEUE "
+                "para que os eventos do SocketIO cheguem a todos os clientes.",
+                err=True,
+            )
+        try:
+            argv, env = gunicorn_command(
+                host,
+                port,
+                workers,
+                worker_class,
+                threads=threads,
+                chdir=os.path.dirname(app.root_path),
+                app_path="tracker:app" if tracking_only else "main:app",
+            )
+        except (ValueError, RuntimeError) as e:
+            raise click.ClickException(str(e))
+        os.execvpe(argv[0], argv, env)
+
+    @app.cli.command("run-sender")
+    @click.option(
+        "--once", is_flag=True, help="Termina quando a fila de envios estiver vazia."
+    )
+    @click.option(
+        "--poll-interval",
+        type=float,
+        default=lambda: app.config["SENDER_POLL_INTERVAL"],
+        help="Espera entre consultas à fila vazia (SENDER_POLL_INTERVAL).",
+    )
+    def run_sender(once, poll_interval):
+        """Executa as campanhas da fila de envios (SENDER_MODE=queue).
+
+        Execute um único processo de envio. Envios interrompidos por um
+        processo anterior são marcados como falhos, não reexecutados.
+        """
+        from . import send_queue
+
+        recovered = send_queue.recover_interrupted()
+        if recovered:
+            click.echo(
+                f"{recovered} envio(s) interrompido(s) marcado(s) como falho(s)."
+            )
+        # SIGTERM (por exemplo, de um gerenciador de processos) encerra o
+        # processo como um Ctrl+C.
+        previous_handler = signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            processed = send_queue.run_sender(poll_interval=poll_interval, once=once)
+        except KeyboardInterrupt:
+            click.echo("Processo de envio encerrado.")
+            return
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+        click.echo(f"{processed} envio(s) executado(s).")
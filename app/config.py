@@ -38,30 +38,35 @@ class Config:
     )
     # Desativa o rastreamento de modificações do SQLAlchemy para economizar recursos.
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Perfil de implantação do banco de dados, que define as opções do pool
+    # de conexões: "development", "production" ou "high-volume" (veja
+    # `app/database.py`). Não se aplica ao SQLite.
+    DB_PROFILE = config("DB_PROFILE", default="production")
+    # PRAGMAs aplicados a cada conexão SQLite. O modo WAL permite que o
+    # rastreamento leia e grave enquanto uma campanha é enviada.
+    SQLITE_JOURNAL_MODE = config("SQLITE_JOURNAL_MODE", default="WAL")
+    SQLITE_SYNCHRONOUS = config("SQLITE_SYNCHRONOUS", default="NORMAL")
+    # Tempo máximo, em milissegundos, que uma escrita aguarda um bloqueio.
+    SQLITE_BUSY_TIMEOUT = config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int)
+    # Bytes do arquivo do banco lidos via mmap (0 desativa). Padrão: 256 MB.
+    SQLITE_MMAP_SIZE = config("SQLITE_MMAP_SIZE", default=256 * 1024 * 1024, cast=int)
 
     # --- Configurações de E-mail ---
     # Endereço de e-mail usado como remetente.
     # Fornece um valor padrão para facilitar a execução de testes sem
     # dependências externas ou variáveis de ambiente.
-codex/analise-o-repositorio-btgqea
     EMAIL_SENDER = config("EMAIL_SENDER", default="test@example.com")
     # Senha do e-mail do remetente. Para serviços como Gmail, use uma "Senha de App".
     EMAIL_PASSWORD = config("EMAIL_PASSWORD", default="test-password")
 
-    codex/analise-o-repositorio-z8y2o9
-    EMAIL_SENDER = config("EMAIL_SENDER", default="test@example.com")
-    # Senha do e-mail do remetente. Para serviços como Gmail, use uma "Senha de App".
-    EMAIL_PASSWORD = config("EMAIL_PASSWORD", default="test-password")
-
-    EMAIL_SENDER = config('EMAIL_SENDER', default='test@example.com')
-    # Senha do e-mail do remetente. Para serviços como Gmail, use uma "Senha de App".
-    EMAIL_PASSWORD = config('EMAIL_PASSWORD', default='test-password')
-    main
-main
     # Endereço do servidor SMTP.
     SMTP_SERVER = config("SMTP_SERVER", default="smtp.office365.com")
     # Porta do servidor SMTP (587 é comum para STARTTLS).
     SMTP_PORT = config("SMTP_PORT", default=587, cast=int)
+    # Se a conexão deve ser atualizada para TLS com STARTTLS (fora da porta
+    # 465). Desative apenas para servidores locais sem TLS, como o usado por
+    # `flask replay-campaign`.
+    SMTP_STARTTLS = config("SMTP_STARTTLS", default=True, cast=bool)
 
     # --- Limites de Envio ---
     # Número máximo de e-mails que podem ser enviados por hora.
@@ -69,6 +74,130 @@ main
     # Calcula o intervalo em segundos entre cada e-mail para respeitar o limite por hora.
     SECONDS_PER_EMAIL = 3600 / EMAILS_PER_HOUR
 
+    # --- Rastreamento ---
+    # Janela, em segundos, na qual aberturas/cliques repetidos do mesmo e-mail
+    # (ex: pré-carregamento de imagens por proxies) são agregados em um único
+    # evento com contador de acessos. Use 0 para desativar a deduplicação.
+    TRACKING_DEDUPE_WINDOW = config("TRACKING_DEDUPE_WINDOW", default=30, cast=float)
+    # Número máximo de eventos recentes mantidos no cache de deduplicação.
+    TRACKING_DEDUPE_MAX_ENTRIES = config(
+        "TRACKING_DEDUPE_MAX_ENTRIES", default=100_000, cast=int
+    )
+
+    # --- Relatórios ---
+    # Modo padrão de contagem de aberturas/cliques únicos nos relatórios:
+    # "exact" usa COUNT(DISTINCT) sobre os eventos; "approx" usa os sketches
+    # HyperLogLog por campanha. Pode ser sobrescrito por `?mode=` na requisição.
+    REPORT_UNIQUE_MODE = config("REPORT_UNIQUE_MODE", default="exact")
+    # Precisão dos sketches HyperLogLog (4 a 16). O erro padrão relativo é de
+    # aproximadamente 1.04 / sqrt(2 ** precisão): ~1,6% para o padrão 12.
+    HLL_PRECISION = config("HLL_PRECISION", default=12, cast=int)
+
+    # Quantidade máxima de campanhas por requisição ao relatório em lote
+    # (`/api/reports?ids=...` ou `?recent=N`).
+    REPORTS_BATCH_MAX = config("REPORTS_BATCH_MAX", default=500, cast=int)
+
+    # Quantidade máxima de buckets retornados pela API de linha do tempo.
+    TIMELINE_MAX_BUCKETS = config("TIMELINE_MAX_BUCKETS", default=5000, cast=int)
+
+    # Tamanho padrão e máximo das páginas da listagem de campanhas.
+    CAMPAIGNS_PAGE_SIZE = config("CAMPAIGNS_PAGE_SIZE", default=100, cast=int)
+    CAMPAIGNS_MAX_PAGE_SIZE = config("CAMPAIGNS_MAX_PAGE_SIZE", default=500, cast=int)
+    # Tempo, em segundos, que cada página da listagem permanece em cache. Uma
+    # nova campanha, criada por qualquer processo, invalida o cache antes.
+    CAMPAIGNS_CACHE_TTL = config("CAMPAIGNS_CACHE_TTL", default=5, cast=float)
+
+    # Tempo, em segundos, durante o qual a listagem de templates em cache é
+    # servida sem verificar se a tabela foi alterada por outro processo.
+    TEMPLATES_CACHE_TTL = config("TEMPLATES_CACHE_TTL", default=2, cast=float)
+
+    # Listas de supressão com até esta quantidade de endereços são carregadas
+    # em um `set` no início de cada campanha; listas maiores usam um filtro de
+    # Bloom, com os positivos confirmados no banco de dados.
+    SUPPRESSION_SET_MAX_ENTRIES = config(
+        "SUPPRESSION_SET_MAX_ENTRIES", default=1_000_000, cast=int
+    )
+    # Taxa de falsos positivos do filtro de Bloom da lista de supressão.
+    SUPPRESSION_BLOOM_ERROR_RATE = config(
+        "SUPPRESSION_BLOOM_ERROR_RATE", default=0.001, cast=float
+    )
+
+    # Arquivo para onde os spans das etapas de envio são exportados no
+    # formato OTLP/JSON (um `ExportTraceServiceRequest` por linha). Vazio
+    # desativa a exportação; as etapas continuam agregadas no relatório.
+    TRACING_EXPORT_PATH = config("TRACING_EXPORT_PATH", default="")
+
+    # --- Servidor de produção e processo de envio ---
+    # "inline" executa as campanhas no processo web, na própria requisição;
+    # "queue" grava cada campanha na fila (tabela send_job) para o processo
+    # `flask run-sender`, e a rota /send_email responde imediatamente.
+    SENDER_MODE = config("SENDER_MODE", default="inline")
+    # Espera, em segundos, entre consultas à fila quando ela está vazia.
+    SENDER_POLL_INTERVAL = config("SENDER_POLL_INTERVAL", default=1.0, cast=float)
+    # Fila de mensagens do SocketIO (por exemplo, redis://localhost:6379/0),
+    # necessária para que o progresso emitido pelo processo de envio, ou por
+    # mais de um worker web, chegue aos navegadores. Vazio desativa.
+    SOCKETIO_MESSAGE_QUEUE = config("SOCKETIO_MESSAGE_QUEUE", default="")
+    # Modo assíncrono do SocketIO (eventlet, gevent ou threading). O padrão
+    # é threading: gevent e eventlet só funcionam nos workers do Gunicorn,
+    # que aplicam o monkey-patching, e `flask serve` define o modo conforme o
+    # tipo de worker. Vazio detecta o modo pelos pacotes instalados.
+    SOCKETIO_ASYNC_MODE = config("SOCKETIO_ASYNC_MODE", default="threading")
+    # Quantidade e tipo dos workers de `flask serve` (gevent, eventlet ou
+    # gthread).
+    WEB_WORKERS = config("WEB_WORKERS", default=1, cast=int)
+    WEB_WORKER_CLASS = config("WEB_WORKER_CLASS", default="gevent")
+
+    # --- Logging ---
+    # Nível mínimo dos registros (DEBUG, INFO, WARNING, ERROR).
+    LOG_LEVEL = config("LOG_LEVEL", default="INFO")
+    # Formato da saída: "json" (uma linha por registro) ou "text".
+    LOG_FORMAT = config("LOG_FORMAT", default="json")
+    # Arquivo de log. Vazio grava em stderr.
+    LOG_FILE = config("LOG_FILE", default="")
+    # Grava apenas um a cada N registros de cada e-mail enviado (envio e
+    # progresso). Erros são sempre gravados.
+    LOG_SAMPLE_RATE = config("LOG_SAMPLE_RATE", default=100, cast=int)
+
+    # --- Perfilamento (profiling) das campanhas ---
+    # Profiler usado em todas as campanhas: "sampling" (grava pilhas no
+    # formato "folded", para flamegraphs), "cprofile" (grava um .pstats) ou
+    # vazio para desativar. Veja `app/profiling.py`.
+    CAMPAIGN_PROFILER = config("CAMPAIGN_PROFILER", default="")
+    # Diretório onde os artefatos de perfilamento são gravados.
+    PROFILE_OUTPUT_DIR = config("PROFILE_OUTPUT_DIR", default="profiles")
+    # Intervalo, em segundos, entre as amostras do profiler "sampling".
+    PROFILE_SAMPLE_INTERVAL = config(
+        "PROFILE_SAMPLE_INTERVAL", default=0.005, cast=float
+    )
+    # Token que permite ativar o profiler em um único envio, com o campo
+    # "profile" da requisição e o cabeçalho X-Profile-Token. Vazio desativa.
+    PROFILE_ADMIN_TOKEN = config("PROFILE_ADMIN_TOKEN", default="")
+
+    # --- Limites de requisições (Flask-Limiter) ---
+    # Limite padrão por IP das rotas sem política própria (veja
+    # `app/rate_limits.py`).
+    RATELIMIT_DEFAULT = config("RATELIMIT_DEFAULT", default="500 per hour")
+    # Limite por IP das rotas de rastreamento. Vazio as isenta de qualquer
+    # limite: atrás de um NAT corporativo, milhares de aberturas legítimas
+    # vêm do mesmo IP.
+    RATELIMIT_TRACKING = config("RATELIMIT_TRACKING", default="")
+    # Onde os contadores são guardados. "memory://" mantém um contador por
+    # processo; para que os limites valham para todos os workers, use um
+    # armazenamento compartilhado, como redis://localhost:6379/1.
+    RATELIMIT_STORAGE_URI = config("RATELIMIT_STORAGE_URI", default="memory://")
+    # Estratégia de contagem: "sliding-window-counter" aproxima uma janela
+    # deslizante com dois contadores por chave, sem guardar cada requisição
+    # como "moving-window"; "fixed-window" permite rajadas na virada da
+    # janela.
+    RATELIMIT_STRATEGY = config("RATELIMIT_STRATEGY", default="sliding-window-counter")
+
+    # Serve os arquivos estáticos com o hash do conteúdo no nome, da memória,
+    # pré-comprimidos e com cache imutável (veja `app/assets.py`). Como os
+    # arquivos são lidos na inicialização, desative em desenvolvimento para
+    # ver as alterações sem reiniciar o servidor.
+    STATIC_FINGERPRINT = config("STATIC_FINGERPRINT", default=True, cast=bool)
+
     # Chave da API para o editor de texto rico TinyMCE.
     # Obtenha uma chave no site do TinyMCE para remover avisos.
     TINYMCE_API_KEY = config("TINYMCE_API_KEY", default="no-api-key")
@@ -0,0 +1,197 @@
+"""Perfis de implantação e acesso ao banco de dados.
+
+O SQLAlchemy usa, por padrão, um pool pequeno sem verificação de conexões, e o
+SQLite roda no modo de journal de rollback, em que cada escrita bloqueia os
+leitores e as demais escritas: durante um envio, o registro de aberturas e
+cliques disputa o arquivo com o laço de envio. Este módulo monta as opções do
+engine a partir de um perfil (`DB_PROFILE`) e, no SQLite, aplica os PRAGMAs de
+cada conexão (WAL, `synchronous`, `busy_timeout` e `mmap_size`).
+
+- ENGINE_PROFILES: As opções de pool de cada perfil.
+- engine_options: Monta o `SQLALCHEMY_ENGINE_OPTIONS` para uma URI e um perfil.
+- sqlite_pragmas: Monta a lista de PRAGMAs aplicados a cada conexão SQLite.
+- configure_engine: Registra a aplicação dos PRAGMAs em um engine SQLite.
+- DatabaseWriter: Executa operações de banco em uma thread dedicada, para que
+  corrotinas (como o envio de campanhas) não bloqueiem o event loop.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from . import metrics
+
+# Opções de pool por perfil. `pool_recycle` descarta conexões mais antigas que
+# o limite (em segundos), antes que o servidor ou um proxy as encerre, e
+# `pool_pre_ping` testa cada conexão ao retirá-la do pool.
+ENGINE_PROFILES = {
+    # Um único processo, por exemplo em desenvolvimento.
+    "development": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_pre_ping": False,
+        "pool_recycle": -1,
+    },
+    # Alguns workers atrás de um servidor PostgreSQL.
+    "production": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        "pool_timeout": 30,
+    },
+    # Envios grandes com muito tráfego de rastreamento simultâneo.
+    "high-volume": {
+        "pool_size": 20,
+        "max_overflow": 40,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+        "pool_timeout": 10,
+    },
+}
+
+
+def is_sqlite(uri):
+    """Indica se a URI aponta para um banco SQLite."""
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def engine_options(uri, profile="production"):
+    """Monta as opções do engine para uma URI de banco de dados.
+
+    No SQLite as opções de pool não se aplicam (o gargalo é o bloqueio do
+    arquivo, tratado pelos PRAGMAs), então apenas os demais bancos recebem as
+    opções do perfil.
+
+    Args:
+        uri (str): A URI de conexão.
+        profile (str, optional): Uma das chaves de `ENGINE_PROFILES`.
+            Defaults to "production".
+
+    Returns:
+        dict: As opções a serem usadas em `SQLALCHEMY_ENGINE_OPTIONS`.
+
+    Raises:
+        ValueError: Se o perfil não existir.
+    """
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(
+            f"Perfil de banco de dados desconhecido: {profile}. "
+            f"Use um de: {', '.join(ENGINE_PROFILES)}."
+        )
+    if is_sqlite(uri):
+        return {}
+    return dict(ENGINE_PROFILES[profile])
+
+
+def sqlite_pragmas(
+    journal_mode="WAL", synchronous="NORMAL", busy_timeout=5000, mmap_size=0
+):
+    """Monta os PRAGMAs aplicados a cada nova conexão SQLite.
+
+    No modo WAL os leitores não bloqueiam a escrita nem são bloqueados por
+    ela, e `synchronous=NORMAL` só sincroniza o disco nos checkpoints, o que
+    continua seguro contra corrupção nesse modo. `busy_timeout` faz uma
+    escrita concorrente aguardar o bloqueio em vez de falhar imediatamente com
+    "database is locked".
+
+    Args:
+        journal_mode (str, optional): O modo de journal. Defaults to "WAL".
+        synchronous (str, optional): O nível de sincronização.
+            Defaults to "NORMAL".
+        busy_timeout (int, optional): Tempo máximo de espera por um bloqueio,
+            em milissegundos. Defaults to 5000.
+        mmap_size (int, optional): Bytes do arquivo lidos via mmap; 0
+            desativa. Defaults to 0.
+
+    Returns:
+        list[str]: Os comandos PRAGMA, na ordem em que devem ser executados.
+    """
+    pragmas = [f"PRAGMA busy_timeout={int(busy_timeout)}"]
+    if journal_mode:
+        pragmas.append(f"PRAGMA journal_mode={journal_mode}")
+    if synchronous:
+        pragmas.append(f"PRAGMA synchronous={synchronous}")
+    if mmap_size:
+        pragmas.append(f"PRAGMA mmap_size={int(mmap_size)}")
+    return pragmas
+
+
+def configure_engine(engine, pragmas):
+    """Aplica os PRAGMAs a cada conexão aberta por um engine SQLite.
+
+    Engines de outros bancos não são alterados.
+
+    Args:
+        engine (Engine): O engine do SQLAlchemy.
+        pragmas (list[str]): Os comandos retornados por `sqlite_pragmas`.
+    """
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+class DatabaseWriter:
+    """Uma thread dedicada às operações de banco de dados de uma corrotina.
+
+    As chamadas ao SQLAlchemy são síncronas: um `commit()` executado dentro
+    de uma corrotina bloqueia o event loop, e com ele todos os envios SMTP em
+    andamento. O `DatabaseWriter` envia cada operação para uma fila atendida
+    por uma única thread, que a executa dentro de um contexto da aplicação, e
+    devolve um future que a corrotina aguarda sem bloquear o loop. Como há uma
+    só thread, as operações são executadas na ordem em que foram enviadas.
+
+    Cada operação usa a sua própria sessão (a do contexto da aplicação criado
+    para ela), então deve receber e devolver valores simples, como IDs, e não
+    instâncias de modelos.
+
+    Example:
+        writer = DatabaseWriter(current_app._get_current_object())
+        try:
+            campaign_id = await writer.run(create_campaign, subject, message)
+        finally:
+            writer.close()
+    """
+
+    def __init__(self, app):
+        """Inicializa o writer.
+
+        Args:
+            app (Flask): A aplicação cujo contexto é usado nas operações.
+        """
+        self._app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="db-writer"
+        )
+
+    def _call(self, func, args, kwargs):
+        try:
+            with self._app.app_context():
+                return func(*args, **kwargs)
+        finally:
+            metrics.DB_WRITER_QUEUE_DEPTH.dec()
+
+    async def run(self, func, *args, **kwargs):
+        """Executa `func(*args, **kwargs)` na thread do banco e aguarda o resultado.
+
+        Returns:
+            O valor retornado por `func`. Exceções levantadas por `func` são
+            propagadas para a corrotina.
+        """
+        metrics.DB_WRITER_QUEUE_DEPTH.inc()
+        future = self._executor.submit(self._call, func, args, kwargs)
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Aguarda as operações pendentes e encerra a thread."""
+        self._executor.shutdown(wait=True)
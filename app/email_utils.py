@@ -2,12 +2,16 @@
 
 Este módulo fornece funções assíncronas para:
 - Verificar credenciais SMTP.
+- Processar o conteúdo de uma campanha uma única vez, compilando os campos de
+  mesclagem (`prepare_message`).
 - Enviar e-mails individuais com suporte a HTML, anexos e rastreamento.
 - Orquestrar o envio de e-mails em massa para campanhas.
 - Realizar a sanitização de nomes de arquivos e conteúdo HTML.
 """
 
 import asyncio
+import functools
+import time
 import os
 import base64
 import logging
@@ -18,12 +22,19 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
 from email.mime.application import MIMEApplication
-import bleach
 import mimetypes
-import imghdr
-import re
-from bs4 import BeautifulSoup
+from . import metrics, tracing
 from .config import Config
+from .database import DatabaseWriter
+from .profiling import CampaignProfiler
+from .recipients import (
+    RecipientList,
+    RecipientReader,
+    normalize_email,
+    upsert_recipients,
+)
+from .suppression import SuppressionIndex
+from .templating import compile_template
 from .utils import sanitize_html
 
 try:
@@ -32,14 +43,8 @@ except Exception:  # pragma: no cover - library optional
     magic = None
 
 # Configuração do logging para este módulo.
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
-# Expressão regular para uma validação básica de endereços de e-mail.
-email_regex = re.compile(r"^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$", re.IGNORECASE)
-
 # Lista de tipos MIME permitidos para anexos, para fins de segurança.
 ALLOWED_MIME_TYPES = ["image/jpeg", "image/png", "application/pdf"]
 
@@ -62,7 +67,6 @@ def sanitize_filename(filename):
     # Filter the filename to keep only allowed characters
     return "".join(c for c in filename if c in allowed_chars)
 
-codex/analise-o-repositorio-btgqea
 
 def _detect_mime_type(data: bytes, filename: str) -> str:
     """Determine the MIME type of a file.
@@ -70,6 +74,7 @@ def _detect_mime_type(data: bytes, filename: str) -> str:
     Tries to use ``python-magic`` if available. Falls back to ``mimetypes`` and
     ``imghdr`` so tests can run even when ``libmagic`` is missing.
     """
+    import imghdr
 
     if magic is not None:
         try:
@@ -87,7 +92,6 @@ def _detect_mime_type(data: bytes, filename: str) -> str:
 
     return "application/octet-stream"
 
- main
 
 async def check_smtp_credentials():
     """Verifica de forma assíncrona a validade das credenciais SMTP.
@@ -105,12 +109,15 @@ async def check_smtp_credentials():
 
     try:
         client = aiosmtplib.SMTP(
-            hostname=Config.SMTP_SERVER, port=Config.SMTP_PORT, use_tls=use_tls_directly
+            hostname=Config.SMTP_SERVER,
+            port=Config.SMTP_PORT,
+            use_tls=use_tls_directly,
+            start_tls=False,
         )
         await client.connect()
 
         # Se não estivermos em uma conexão TLS direta, devemos iniciar o STARTTLS.
-        if not use_tls_directly:
+        if not use_tls_directly and Config.SMTP_STARTTLS:
             await client.starttls()
 
         await client.login(Config.EMAIL_SENDER, Config.EMAIL_PASSWORD)
@@ -118,65 +125,128 @@ async def check_smtp_credentials():
         logger.info("Credenciais SMTP verificadas com sucesso.")
         return True
     except aiosmtplib.SMTPAuthenticationError as e:
-        logger.error(f"Erro de autenticação SMTP: {e}")
+        logger.error("Erro de autenticação SMTP: %s", e)
         return False
     except Exception as e:
-        logger.error(f"Erro ao verificar credenciais SMTP: {e}")
+        logger.error("Erro ao verificar credenciais SMTP: %s", e)
         return False
 
 
-async def send_email_task(email_data, base_url):
-    """Envia um único e-mail de forma assíncrona.
+def extract_tracked_links(message):
+    """Extrai as URLs absolutas rastreáveis de uma mensagem HTML.
 
-    Esta função constrói e envia um e-mail multipart, lidando com:
-    - HTML e sanitização.
-    - Anexos (validação de tipo e tamanho).
-    - Imagens embutidas (via Content-ID).
-    - Rastreamento de aberturas (pixel de rastreamento).
-    - Rastreamento de cliques (reescrita de links).
+    Args:
+        message (str): O corpo da mensagem em HTML.
+
+    Returns:
+        list[str]: As URLs distintas dos links `<a href>` absolutos, na ordem em
+            que aparecem na mensagem.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(message, "html.parser")
+    urls = (a["href"] for a in soup.find_all("a", href=True))
+    return list(dict.fromkeys(url for url in urls if url.startswith("http")))
+
+
+def register_campaign_links(campaign_id, message):
+    """Cria os registros `Link` de uma campanha no momento da compilação.
+
+    Cada link rastreável da mensagem recebe um ID, que é embutido nas URLs de
+    rastreamento no lugar da URL completa.
 
     Args:
-        email_data (tuple): Uma tupla contendo os detalhes do e-mail:
-            (to, subject, cc, bcc, message, attachments, email_id).
-            - to (list[str]): Lista de destinatários.
-            - subject (str): Assunto do e-mail.
-            - cc (str): Destinatários em cópia.
-            - bcc (str): Destinatários em cópia oculta.
-            - message (str): Corpo da mensagem em HTML.
-            - attachments (list[dict]): Lista de anexos.
-            - email_id (str): UUID único para este e-mail.
-        base_url (str): A URL base da aplicação, usada para construir os links
-            de rastreamento.
+        campaign_id (int): O ID da campanha.
+        message (str): O corpo da mensagem em HTML.
 
     Returns:
-        dict: Um dicionário com o status (`'success'` ou `'error'`) e uma
-              mensagem descritiva.
+        dict[str, int]: Um mapeamento da URL original para o ID do seu link.
     """
-    to, subject, cc, bcc, message, attachments, email_id = email_data
-    saved_files = []
+    from . import db
+    from .models import Link
 
-    try:
-        to = [
-            str(email).strip() for email in to if email_regex.match(str(email).strip())
-        ]
-        if not to:
-            return {
-                "status": "error",
-                "message": "Nenhum destinatário válido fornecido.",
-            }
+    links = [
+        Link(campaign_id=campaign_id, url=url) for url in extract_tracked_links(message)
+    ]
+    db.session.add_all(links)
+    db.session.commit()
+    return {link.url: link.id for link in links}
+
+
+# Campo reservado que recebe o token de cada e-mail nas URLs de rastreamento.
+EMAIL_TOKEN_FIELD = "__email_token__"
+
+
+class PreparedMessage:
+    """O conteúdo de uma campanha, processado uma única vez.
+
+    Guarda o HTML final (já com a reescrita dos links, as imagens embutidas, o
+    pixel de rastreamento e a sanitização) compilado em um `CompiledTemplate`,
+    além das partes MIME dos anexos. Enviar para um destinatário passa a ser
+    apenas a renderização do template com o token do e-mail e os seus campos.
+
+    Attributes:
+        template (CompiledTemplate): O HTML final compilado.
+        inline_parts (list[MIMEImage]): As imagens embutidas via Content-ID.
+        attachment_parts (list[MIMEApplication]): Os demais anexos.
+    """
 
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = bleach.clean(subject)
-        msg["From"] = Config.EMAIL_SENDER
-        msg["To"] = ", ".join([bleach.clean(email) for email in to])
-        if cc:
-            msg["Cc"] = cc
-        if bcc:
-            msg["Bcc"] = bcc
+    def __init__(self, template, inline_parts, attachment_parts):
+        self.template = template
+        self.inline_parts = inline_parts
+        self.attachment_parts = attachment_parts
 
-        msg_related = MIMEMultipart("related")
-        msg.attach(msg_related)
+    @property
+    def fields(self):
+        """frozenset[str]: Os campos de mesclagem usados pela mensagem."""
+        return self.template.fields - {EMAIL_TOKEN_FIELD}
 
+    def render(self, token, fields=None):
+        """Renderiza o HTML de um destinatário.
+
+        Args:
+            token (str): O token público do e-mail, usado nas URLs de
+                rastreamento.
+            fields (dict, optional): Os valores dos campos de mesclagem.
+
+        Returns:
+            str: O HTML final do e-mail.
+        """
+        values = dict(fields) if fields else {}
+        values[EMAIL_TOKEN_FIELD] = token
+        return self.template.render(values)
+
+
+def prepare_message(message, attachments, base_url, links=None):
+    """Processa o conteúdo de uma campanha uma única vez.
+
+    Faz todo o trabalho que não depende do destinatário: sanitização dos
+    atributos `title`, reescrita dos links para rastreamento de cliques,
+    validação dos anexos, embutimento das imagens via Content-ID, inclusão do
+    pixel de rastreamento e sanitização do HTML. O token do e-mail é deixado
+    como um campo reservado, preenchido na renderização.
+
+    Args:
+        message (str): O corpo da mensagem em HTML.
+        attachments (list[dict]): Lista de anexos.
+        base_url (str): A URL base da aplicação, usada para construir os links
+            de rastreamento.
+        links (dict[str, int], optional): Mapeamento das URLs da mensagem para
+            os IDs dos seus links, criado por `register_campaign_links`.
+
+    Returns:
+        PreparedMessage: O conteúdo processado.
+
+    Raises:
+        ValueError: Se algum anexo exceder o tamanho máximo ou tiver um tipo
+            não permitido.
+    """
+    import bleach
+    from bs4 import BeautifulSoup
+
+    token = "{{%s}}" % EMAIL_TOKEN_FIELD
+
+    with tracing.span("prepare.parse"):
         # Parse the HTML message once to allow for robust modifications.
         soup = BeautifulSoup(message, "html.parser")
 
@@ -188,11 +258,19 @@ async def send_email_task(email_data, base_url):
         # Rewrite links for click tracking.
         for a in soup.find_all("a", href=True):
             # Only track absolute URLs.
-            if a["href"].startswith("http"):
+            if not a["href"].startswith("http"):
+                continue
+            link_id = links.get(a["href"]) if links else None
+            if link_id is not None:
+                a["href"] = f"{base_url}track/click/{token}?l={link_id}"
+            else:
                 original_url = urllib.parse.quote(a["href"], safe="")
-                a["href"] = f"{base_url}track/click/{email_id}?url={original_url}"
+                a["href"] = f"{base_url}track/click/{token}?url={original_url}"
 
-        # Process attachments, embedding images that have a corresponding <img> tag.
+    # Process attachments, embedding images that have a corresponding <img> tag.
+    inline_parts = []
+    attachment_parts = []
+    with tracing.span("prepare.attachments"):
         if attachments:
             img_tags = soup.find_all("img")
             img_tag_index = 0
@@ -202,21 +280,15 @@ async def send_email_task(email_data, base_url):
                 decoded_data = base64.b64decode(att["data"])
 
                 if len(decoded_data) > Config.MAX_ATTACHMENT_SIZE:
-                    return {
-                        "status": "error",
-                        "message": f"Anexo {sanitized_filename} excede o limite de 10MB.",
-                    }
+                    raise ValueError(
+                        f"Anexo {sanitized_filename} excede o limite de 10MB."
+                    )
 
- codex/analise-o-repositorio-btgqea
                 mime_type = _detect_mime_type(decoded_data, sanitized_filename)
-
-                mime_type = magic.from_buffer(decoded_data, mime=True)
-main
                 if mime_type not in ALLOWED_MIME_TYPES:
-                    return {
-                        "status": "error",
-                        "message": f"Tipo de anexo não permitido: {sanitized_filename}",
-                    }
+                    raise ValueError(
+                        f"Tipo de anexo não permitido: {sanitized_filename}"
+                    )
 
                 # If the attachment is an image and there's a corresponding <img> tag, embed it.
                 if mime_type.startswith("image/") and img_tag_index < len(img_tags):
@@ -226,7 +298,7 @@ main
                     img.add_header(
                         "Content-Disposition", "inline", filename=sanitized_filename
                     )
-                    msg_related.attach(img)
+                    inline_parts.append(img)
 
                     # Update the src of the corresponding img tag.
                     img_tags[img_tag_index]["src"] = f"cid:{cid}"
@@ -237,53 +309,237 @@ main
                     part["Content-Disposition"] = (
                         f'attachment; filename="{sanitized_filename}"'
                     )
-                    msg.attach(part)
+                    attachment_parts.append(part)
 
-        # Add the tracking pixel to the end of the body.
-        tracking_pixel_tag = BeautifulSoup(
-            f'<img src="{base_url}track/open/{email_id}" width="1" height="1" alt="">',
-            "html.parser",
-        )
-        if soup.body:
-            soup.body.append(tracking_pixel_tag)
-        else:
-            soup.append(tracking_pixel_tag)
+    # Add the tracking pixel to the end of the body.
+    tracking_pixel_tag = BeautifulSoup(
+        f'<img src="{base_url}track/open/{token}" width="1" height="1" alt="">',
+        "html.parser",
+    )
+    if soup.body:
+        soup.body.append(tracking_pixel_tag)
+    else:
+        soup.append(tracking_pixel_tag)
+
+    with tracing.span("prepare.sanitize"):
+        # Sanitize the final HTML and split it into static chunks and merge fields.
+        sanitized_html = sanitize_html(str(soup))
+        template = compile_template(sanitized_html)
+    return PreparedMessage(template, inline_parts, attachment_parts)
+
+
+@functools.lru_cache(maxsize=128)
+def _clean_subject(subject):
+    """Sanitiza o assunto; o resultado é reaproveitado entre os e-mails da campanha."""
+    import bleach
+
+    return bleach.clean(subject)
+
+
+def build_message(to, subject, cc, bcc, html, prepared):
+    """Monta o e-mail multipart de um destinatário.
+
+    Args:
+        to (list[str]): Lista de destinatários, já validados.
+        subject (str): Assunto do e-mail.
+        cc (str): Destinatários em cópia.
+        bcc (str): Destinatários em cópia oculta.
+        html (str): O HTML final do e-mail, renderizado por `prepared`.
+        prepared (PreparedMessage): O conteúdo processado da campanha, de onde
+            vêm os anexos.
 
-        # Attach the final, modified HTML to the email.
-        final_html = str(soup)
-        sanitized_html = sanitize_html(final_html)
-        html_part = MIMEText(sanitized_html, "html")
-        msg_related.attach(html_part)
+    Returns:
+        MIMEMultipart: A mensagem pronta para envio.
+    """
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = _clean_subject(subject)
+    msg["From"] = Config.EMAIL_SENDER
+    # Os destinatários já passaram por `normalize_email`, que não aceita
+    # nenhum caractere alterado pelo bleach.
+    msg["To"] = ", ".join(to)
+    if cc:
+        msg["Cc"] = cc
+    if bcc:
+        msg["Bcc"] = bcc
+
+    msg_related = MIMEMultipart("related")
+    msg.attach(msg_related)
+    # As partes dos anexos são compartilhadas entre os e-mails da campanha;
+    # elas não são alteradas na serialização.
+    for part in prepared.inline_parts:
+        msg_related.attach(part)
+    for part in prepared.attachment_parts:
+        msg.attach(part)
+    msg_related.attach(MIMEText(html, "html"))
+    return msg
+
+
+async def send_email_task(
+    email_data, base_url, links=None, prepared=None, fields=None, validated=False
+):
+    """Envia um único e-mail de forma assíncrona.
+
+    Esta função constrói e envia um e-mail multipart, lidando com:
+    - HTML e sanitização.
+    - Anexos (validação de tipo e tamanho).
+    - Imagens embutidas (via Content-ID).
+    - Rastreamento de aberturas (pixel de rastreamento).
+    - Rastreamento de cliques (reescrita de links).
+    - Campos de mesclagem (`{{campo}}`) preenchidos com `fields`.
+
+    Em envios em massa, o conteúdo é processado uma única vez por
+    `prepare_message` e passado em `prepared`; sem ele, a mensagem de
+    `email_data` é processada a cada chamada.
+
+    Args:
+        email_data (tuple): Uma tupla contendo os detalhes do e-mail:
+            (to, subject, cc, bcc, message, attachments, token).
+            - to (list[str]): Lista de destinatários.
+            - subject (str): Assunto do e-mail.
+            - cc (str): Destinatários em cópia.
+            - bcc (str): Destinatários em cópia oculta.
+            - message (str): Corpo da mensagem em HTML.
+            - attachments (list[dict]): Lista de anexos.
+            - token (str): O token público deste e-mail (`Email.token`).
+        base_url (str): A URL base da aplicação, usada para construir os links
+            de rastreamento.
+        links (dict[str, int], optional): Mapeamento das URLs da mensagem para
+            os IDs dos seus links, criado por `register_campaign_links`. Links
+            presentes no mapeamento são rastreados pelo ID; os demais carregam
+            a URL completa. Defaults to None.
+        prepared (PreparedMessage, optional): O conteúdo já processado da
+            campanha. Quando informado, `message`, `attachments` e `links` são
+            ignorados. Defaults to None.
+        fields (dict, optional): Os valores dos campos de mesclagem deste
+            destinatário. Defaults to None.
+        validated (bool, optional): Se os destinatários já foram normalizados
+            por `normalize_email` na entrada da campanha; nesse caso, não são
+            validados novamente. Defaults to False.
+
+    Returns:
+        dict: Um dicionário com o status (`'success'` ou `'error'`) e uma
+              mensagem descritiva.
+    """
+    to, subject, cc, bcc, message, attachments, token = email_data
+
+    try:
+        if not validated:
+            to = [email for email in map(normalize_email, to) if email is not None]
+        if not to:
+            metrics.EMAILS_FAILED.labels("no_recipients").inc()
+            return {
+                "status": "error",
+                "message": "Nenhum destinatário válido fornecido.",
+            }
+
+        if prepared is None:
+            try:
+                with tracing.span("prepare_message"):
+                    prepared = prepare_message(message, attachments, base_url, links)
+            except ValueError as e:
+                metrics.EMAILS_FAILED.labels("invalid_content").inc()
+                return {"status": "error", "message": str(e)}
+
+        with metrics.RENDER_DURATION.time():
+            with tracing.span("render"):
+                html = prepared.render(token, fields)
+            with tracing.span("build_mime"):
+                msg = build_message(to, subject, cc, bcc, html, prepared)
 
         # Determina o método de conexão TLS com base na porta.
         use_tls_directly = Config.SMTP_PORT == 465
 
+        connect_started = time.perf_counter()
         async with aiosmtplib.SMTP(
-            hostname=Config.SMTP_SERVER, port=Config.SMTP_PORT, use_tls=use_tls_directly
+            hostname=Config.SMTP_SERVER,
+            port=Config.SMTP_PORT,
+            use_tls=use_tls_directly,
+            start_tls=False,
         ) as client:
             # Apenas chame starttls() se a conexão não for TLS desde o início.
-            if not use_tls_directly:
+            if not use_tls_directly and Config.SMTP_STARTTLS:
                 await client.starttls()
-
-            await client.login(Config.EMAIL_SENDER, Config.EMAIL_PASSWORD)
-            await client.send_message(msg)
-            logger.info(f"E-mail enviado para {', '.join(to)}")
-
-        await asyncio.sleep(Config.SECONDS_PER_EMAIL)
+            connect_seconds = time.perf_counter() - connect_started
+            metrics.SMTP_CONNECT.observe(connect_seconds)
+            tracing.record("smtp.connect", connect_seconds)
+
+            with metrics.SMTP_LOGIN.time(), tracing.span("smtp.login"):
+                await client.login(Config.EMAIL_SENDER, Config.EMAIL_PASSWORD)
+            with metrics.SMTP_SEND.time(), tracing.span("smtp.send"):
+                await client.send_message(msg)
+            logger.info("E-mail enviado.", extra={"sampled": True, "recipients": to})
+
+        metrics.EMAILS_SENT.inc()
+        with tracing.span("throttle"):
+            await asyncio.sleep(Config.SECONDS_PER_EMAIL)
         return {"status": "success", "message": "E-mail enviado com sucesso!"}
 
     except aiosmtplib.SMTPAuthenticationError as e:
-        logger.error(f"Erro de autenticação SMTP: {e}")
+        metrics.EMAILS_FAILED.labels("auth").inc()
+        logger.error("Erro de autenticação SMTP: %s", e)
         return {"status": "error", "message": f"Erro de autenticação: {str(e)}"}
     except Exception as e:
-        logger.error(f"Erro ao enviar e-mail para {to}: {e}", exc_info=True)
+        reason = "smtp" if isinstance(e, aiosmtplib.SMTPException) else "error"
+        metrics.EMAILS_FAILED.labels(reason).inc()
+        logger.error("Erro ao enviar e-mail para %s: %s", to, e, exc_info=True)
         return {"status": "error", "message": str(e)}
-    finally:
-        for filepath in saved_files:
-            try:
-                os.remove(filepath)
-            except Exception as e:
-                logger.error(f"Erro ao remover arquivo temporário {filepath}: {e}")
+
+
+def _emit(event, data):
+    """Emite um evento SocketIO para o frontend e o contabiliza nas métricas."""
+    from app import socketio
+
+    metrics.SOCKETIO_EMITS.labels(event).inc()
+    socketio.emit(event, data)
+
+
+def _create_campaign(subject, message):
+    """Cria o registro `Campaign` e retorna o seu ID."""
+    from . import db
+    from .models import Campaign
+
+    campaign = Campaign(subject=subject, message=message)
+    db.session.add(campaign)
+    db.session.commit()
+    return campaign.id
+
+
+def _load_recipients(csv_content, manual_emails, csv_email_column, csv_fields):
+    """Lê, normaliza e deduplica os destinatários, ignorando os suprimidos.
+
+    Returns:
+        tuple[RecipientList, ReadStats | None]: Os destinatários e, se houver
+            CSV, as estatísticas da leitura.
+
+    Raises:
+        ValueError: Se o CSV não puder ser lido com as colunas informadas.
+    """
+    suppressed = SuppressionIndex.load(
+        Config.SUPPRESSION_SET_MAX_ENTRIES, Config.SUPPRESSION_BLOOM_ERROR_RATE
+    )
+    recipients = RecipientList(suppressed=suppressed)
+    csv_stats = None
+    if csv_content:
+        reader = RecipientReader(
+            csv_content, email_column=csv_email_column, field_columns=csv_fields
+        )
+        recipients.update(reader)
+        csv_stats = reader.stats
+    if manual_emails:
+        for email in manual_emails:
+            recipients.add(email)
+    return recipients, csv_stats
+
+
+def _record_email(token, campaign_id, recipient_id):
+    """Grava o registro `Email` de um envio."""
+    from . import db
+    from .models import Email
+
+    db.session.add(
+        Email(token=token, campaign_id=campaign_id, recipient_id=recipient_id)
+    )
+    db.session.commit()
 
 
 async def send_bulk_emails(
@@ -295,16 +551,27 @@ async def send_bulk_emails(
     base_url,
     csv_content=None,
     manual_emails=None,
+    csv_email_column=None,
+    csv_fields=None,
+    profile=None,
 ):
     """Orquestra o envio de e-mails em massa para uma campanha.
 
     Esta função gerencia todo o fluxo de uma campanha de e-mail:
     1. Cria um registro de `Campaign` no banco de dados.
-    2. Extrai e valida os e-mails de destino a partir de conteúdo CSV e/ou uma lista manual.
-    3. Para cada e-mail, cria um registro `Email` no banco de dados.
-    4. Invoca `send_email_task` para enviar cada e-mail individualmente.
-    5. Emite eventos de progresso via SocketIO para o frontend.
-    6. Em caso de falha, emite um evento de erro.
+    2. Extrai e valida os e-mails de destino a partir de conteúdo CSV e/ou uma
+       lista manual, ignorando os endereços da lista de supressão.
+    3. Registra os links rastreáveis da mensagem (`Link`) uma única vez.
+    4. Processa o conteúdo da mensagem uma única vez (`prepare_message`).
+    5. Para cada e-mail, cria um registro `Email` no banco de dados.
+    6. Invoca `send_email_task` para enviar cada e-mail individualmente,
+       preenchendo os campos de mesclagem do destinatário.
+    7. Emite eventos de progresso via SocketIO para o frontend.
+    8. Em caso de falha, emite um evento de erro.
+
+    As operações de banco de dados são executadas em uma thread dedicada
+    (`DatabaseWriter`), para que não bloqueiem o event loop e os demais envios
+    em andamento.
 
     Args:
         subject (str): O assunto do e-mail da campanha.
@@ -313,105 +580,233 @@ async def send_bulk_emails(
         message (str): O corpo da mensagem em HTML.
         attachments (list[dict]): Uma lista de anexos a serem incluídos.
         base_url (str): A URL base da aplicação para rastreamento.
-        csv_content (str, optional): O conteúdo de um arquivo CSV, onde cada
-            linha é um endereço de e-mail. Defaults to None.
+        csv_content (str, optional): O conteúdo de um arquivo CSV, com um
+            endereço de e-mail por linha ou com cabeçalho e colunas usadas
+            como campos de mesclagem (veja `RecipientReader`). Defaults to None.
         manual_emails (list[str], optional): Uma lista de endereços de e-mail
             adicionados manualmente. Defaults to None.
+        csv_email_column (str, optional): A coluna de e-mail do CSV. Por
+            padrão, é detectada.
+        csv_fields (list[str], optional): As colunas do CSV usadas como campos
+            de mesclagem. Por padrão, todas exceto a de e-mail.
+        profile (str, optional): Executa a campanha sob um profiler
+            (`"sampling"` ou `"cprofile"`, veja `app/profiling.py`) e grava o
+            artefato em `PROFILE_OUTPUT_DIR`. Por padrão, usa
+            `CAMPAIGN_PROFILER`; com False, nenhum profiler é usado.
 
     Returns:
         dict: Um dicionário com o status final da operação (`'success'` ou
-              `'error'`) e uma mensagem informativa.
+              `'error'`), uma mensagem informativa e, se houver CSV, as
+              estatísticas da leitura em `csv` (veja `ReadStats.to_dict`).
     """
-    from . import db
-    from .models import Campaign, Email
-    from app import socketio
-
-    new_campaign = Campaign(subject=subject, message=message)
-    db.session.add(new_campaign)
-    db.session.commit()
+    from flask import current_app
 
+    writer = DatabaseWriter(current_app._get_current_object())
     try:
-        all_emails = set()
-        if csv_content:
-            all_emails.update(
-                line.strip()
-                for line in csv_content.splitlines()
-                if email_regex.match(line.strip())
+        campaign_id = await writer.run(_create_campaign, subject, message)
+    except Exception:
+        writer.close()
+        raise
+
+    # Mede o tempo de cada etapa do envio (veja `app/tracing.py`).
+    exporter = None
+    if Config.TRACING_EXPORT_PATH:
+        exporter = tracing.OtlpJsonFileExporter(Config.TRACING_EXPORT_PATH)
+    trace = tracing.CampaignTrace(campaign_id, exporter)
+
+    profiler = None
+    if profile is None:
+        profile = Config.CAMPAIGN_PROFILER
+    if profile:
+        try:
+            profiler = CampaignProfiler(
+                profile,
+                Config.PROFILE_OUTPUT_DIR,
+                f"campaign-{campaign_id}",
+                interval=Config.PROFILE_SAMPLE_INTERVAL,
             )
-        if manual_emails:
-            all_emails.update(
-                email.strip()
-                for email in manual_emails
-                if email_regex.match(email.strip())
+        except ValueError as e:
+            # Um profiler mal configurado não deve impedir o envio.
+            logger.error("Perfilamento da campanha %s ignorado: %s", campaign_id, e)
+
+    # E-mails desta campanha ainda não processados (métrica de fila).
+    pending = 0
+    try:
+        if profiler is not None:
+            try:
+                profiler.start()
+            except ValueError as e:
+                # Por exemplo, outro cProfile já ativo (Python 3.12+).
+                logger.error("Perfilamento da campanha %s ignorado: %s", campaign_id, e)
+                profiler = None
+        with trace.activate(), tracing.span("campaign"):
+            # Normaliza e deduplica os destinatários uma única vez, na entrada; o
+            # envio recebe os endereços já validados.
+            try:
+                with tracing.span("load_recipients"):
+                    all_emails, csv_stats = await writer.run(
+                        _load_recipients,
+                        csv_content,
+                        manual_emails,
+                        csv_email_column,
+                        csv_fields,
+                    )
+            except ValueError as e:
+                return {"status": "error", "message": str(e)}
+            if csv_stats is not None:
+                logger.info(
+                    "CSV lido: %d linhas, %d rejeitadas (%.0f linhas/s).",
+                    csv_stats.rows,
+                    csv_stats.error_count,
+                    csv_stats.rows_per_second,
+                )
+                for error in csv_stats.errors[:10]:
+                    logger.warning("CSV linha %s: %s", error["line"], error["error"])
+
+            if not all_emails:
+                error_message = (
+                    "Todos os destinatários estão na lista de supressão."
+                    if all_emails.suppressed
+                    else "Nenhum e-mail válido encontrado."
+                )
+                result = {"status": "error", "message": error_message}
+                if csv_stats is not None:
+                    result["csv"] = csv_stats.to_dict()
+                return result
+
+            emails_to_send = list(all_emails)
+            total_to_send = len(emails_to_send)
+            logger.info(
+                "Iniciando envio de %d e-mails para a campanha ID %s"
+                " (%d duplicados e %d suprimidos ignorados)...",
+                total_to_send,
+                campaign_id,
+                all_emails.duplicates,
+                all_emails.suppressed,
             )
+            pending = total_to_send
+            metrics.SEND_QUEUE_DEPTH.inc(pending)
+
+            # Busca ou cria os destinatários em lotes; cada `Email` referencia o
+            # destinatário pelo ID, sem repetir o endereço.
+            with tracing.span("upsert_recipients"):
+                recipient_ids = await writer.run(
+                    upsert_recipients, all_emails.recipients
+                )
 
-        if not all_emails:
-            return {"status": "error", "message": "Nenhum e-mail válido encontrado."}
+            # Registra os links rastreáveis da campanha uma única vez; os e-mails
+            # passam a referenciá-los pelo ID nas URLs de rastreamento.
+            with tracing.span("register_links"):
+                links = await writer.run(register_campaign_links, campaign_id, message)
 
-        emails_to_send = list(all_emails)
-        total_to_send = len(emails_to_send)
-        logger.info(
-            f"Iniciando envio de {total_to_send} e-mails para a campanha ID {new_campaign.id}..."
-        )
+            # Processa o conteúdo da campanha uma única vez; cada e-mail apenas
+            # renderiza o template compilado com os seus campos.
+            try:
+                with tracing.span("prepare_message"):
+                    prepared = prepare_message(message, attachments, base_url, links)
+            except ValueError as e:
+                _emit("task_error", {"message": str(e)})
+                return {"status": "error", "message": str(e)}
+
+            sent_count = 0
+            for email_address, fields in emails_to_send:
+                token = str(uuid.uuid4())
+                with tracing.span("record_email"):
+                    await writer.run(
+                        _record_email, token, campaign_id, recipient_ids[email_address]
+                    )
 
-        sent_count = 0
-        for email_address in emails_to_send:
-            email_id = str(uuid.uuid4())
-            new_email = Email(
-                id=email_id, campaign_id=new_campaign.id, recipient=email_address
-            )
-            db.session.add(new_email)
-            db.session.commit()
-
-            email_data = (
-                [email_address],
-                subject,
-                cc,
-                bcc,
-                message,
-                attachments,
-                email_id,
-            )
-            result = await send_email_task(email_data, base_url)
-
-            if isinstance(result, dict) and result["status"] == "success":
-                sent_count += 1
-                progress_data = {
-                    "sent": sent_count,
-                    "total": total_to_send,
-                    "email": email_address,
-                }
-                socketio.emit("progress", progress_data)
-                logger.info(f"Progresso emitido: {progress_data}")
-            else:
-                error_message = result.get("message", "Erro desconhecido")
-                logger.error(
-                    f"Falha ao enviar e-mail para {email_address}: {error_message}"
+                email_data = (
+                    [email_address],
+                    subject,
+                    cc,
+                    bcc,
+                    message,
+                    attachments,
+                    token,
                 )
-                socketio.emit(
-                    "task_error",
-                    {
-                        "message": f"Falha ao enviar para {email_address}: {error_message}"
-                    },
-                )
-                return {
-                    "status": "error",
-                    "message": f"Falha no envio para {email_address}",
-                }
+                with tracing.span("send_email"):
+                    result = await send_email_task(
+                        email_data,
+                        base_url,
+                        prepared=prepared,
+                        fields=fields,
+                        validated=True,
+                    )
+                pending -= 1
+                metrics.SEND_QUEUE_DEPTH.dec()
+
+                if isinstance(result, dict) and result["status"] == "success":
+                    sent_count += 1
+                    progress_data = {
+                        "sent": sent_count,
+                        "total": total_to_send,
+                        "email": email_address,
+                    }
+                    _emit("progress", progress_data)
+                    logger.info(
+                        "Progresso emitido.",
+                        extra={
+                            "sampled": True,
+                            "campaign_id": campaign_id,
+                            **progress_data,
+                        },
+                    )
+                else:
+                    error_message = result.get("message", "Erro desconhecido")
+                    logger.error(
+                        "Falha ao enviar e-mail para %s: %s",
+                        email_address,
+                        error_message,
+                    )
+                    _emit(
+                        "task_error",
+                        {
+                            "message": f"Falha ao enviar para {email_address}: {error_message}"
+                        },
+                    )
+                    return {
+                        "status": "error",
+                        "message": f"Falha no envio para {email_address}",
+                    }
 
-        logger.info(
-            f"Campanha ID {new_campaign.id} concluída. Enviados {sent_count}/{total_to_send} e-mails."
-        )
-        return {
-            "status": "success",
-            "message": f"Enviados {sent_count} de {total_to_send} e-mails.",
-        }
+            logger.info(
+                "Campanha ID %s concluída. Enviados %d/%d e-mails.",
+                campaign_id,
+                sent_count,
+                total_to_send,
+            )
+            result = {
+                "status": "success",
+                "message": f"Enviados {sent_count} de {total_to_send} e-mails.",
+                "suppressed": all_emails.suppressed,
+            }
+            if csv_stats is not None:
+                result["csv"] = csv_stats.to_dict()
+            return result
     except Exception as e:
         logger.error(
-            f"Erro crítico no envio em massa (Campanha ID {new_campaign.id}): {e}",
+            "Erro crítico no envio em massa (Campanha ID %s): %s",
+            campaign_id,
+            e,
             exc_info=True,
         )
-        socketio.emit(
+        _emit(
             "task_error", {"message": "Ocorreu um erro interno grave durante o envio."}
         )
         return {"status": "error", "message": str(e)}
+    finally:
+        metrics.SEND_QUEUE_DEPTH.dec(pending)
+        try:
+            await writer.run(tracing.save_stage_timings, campaign_id, trace.stages)
+        except Exception as e:
+            logger.error("Erro ao gravar as etapas da campanha %s: %s", campaign_id, e)
+        if profiler is not None:
+            try:
+                path = profiler.stop()
+                logger.info("Perfil da campanha %s gravado em %s.", campaign_id, path)
+            except Exception as e:
+                logger.error(
+                    "Erro ao gravar o perfil da campanha %s: %s", campaign_id, e
+                )
+        writer.close()
@@ -0,0 +1,169 @@
+"""Configuração do logging da aplicação.
+
+Os registros são colocados em uma fila por um `QueueHandler` instalado no
+logger raiz e gravados por uma thread (`QueueListener`), para que a escrita
+em disco ou no terminal não aconteça no event loop do envio. A saída é JSON,
+uma linha por registro (ou texto, com `LOG_FORMAT=text`), com os campos
+passados em `extra` incluídos como chaves.
+
+Registros de cada e-mail enviado são marcados com `extra={"sampled": True}`
+e apenas um a cada `LOG_SAMPLE_RATE` é gravado (por mensagem), o que mantém
+o volume de log constante em campanhas grandes. Erros nunca são amostrados.
+
+Use formatação preguiçosa (`logger.info("Enviados %d", n)`): a mensagem só é
+montada se o registro passar pelo nível configurado.
+
+- configure_logging: Instala a fila e o destino dos registros.
+- JsonFormatter: Formata um registro como uma linha JSON.
+- SampleFilter: Deixa passar um a cada N registros amostrados.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+LOG_FORMATS = ("json", "text")
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+# Atributos padrão de um LogRecord; os demais vêm de `extra`.
+_RESERVED_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "taskName",
+    "sampled",
+}
+
+_lock = threading.Lock()
+_installed = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma linha.
+
+    Os campos fixos são `ts` (ISO 8601, UTC), `level`, `logger` e `message`;
+    os campos passados em `extra` são acrescentados, e a pilha de uma exceção
+    vai em `exc_info`.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Deixa passar um a cada `rate` registros marcados como amostrados.
+
+    A contagem é feita por mensagem (o template antes da formatação), então
+    linhas diferentes de cada e-mail são amostradas independentemente. O
+    primeiro registro de cada mensagem sempre passa.
+    """
+
+    def __init__(self, rate=1):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self._counts = {}
+
+    def filter(self, record):
+        if self.rate == 1 or not getattr(record, "sampled", False):
+            return True
+        count = self._counts.get(record.msg, 0)
+        self._counts[record.msg] = count + 1
+        return count % self.rate == 0
+
+
+class _QueueHandler(QueueHandler):
+    """`QueueHandler` que preserva os campos de `extra` para o formatador.
+
+    A mensagem é montada (os argumentos podem ser objetos mutáveis) e a pilha
+    da exceção é convertida em texto antes de o registro entrar na fila; o
+    restante da formatação acontece na thread do `QueueListener`.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level="INFO", fmt="json", path="", sample_rate=1):
+    """Instala o logging da aplicação no logger raiz.
+
+    Pode ser chamada mais de uma vez (por exemplo, a cada `create_app`): a
+    configuração anterior é desfeita e a sua fila é esvaziada.
+
+    Args:
+        level (str | int, optional): O nível mínimo dos registros.
+        fmt (str, optional): `"json"` ou `"text"`. Defaults to "json".
+        path (str, optional): Arquivo de destino. Vazio grava em stderr.
+        sample_rate (int, optional): Grava um a cada N registros marcados com
+            `extra={"sampled": True}`. Defaults to 1 (todos).
+
+    Raises:
+        ValueError: Se o formato não existir.
+    """
+    global _installed
+
+    if fmt not in LOG_FORMATS:
+        raise ValueError(
+            f"Formato de log desconhecido: {fmt}. Use um de: {', '.join(LOG_FORMATS)}."
+        )
+    target = (
+        logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler()
+    )
+    target.setFormatter(
+        JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+
+    queue = SimpleQueue()
+    handler = _QueueHandler(queue)
+    handler.addFilter(SampleFilter(sample_rate))
+    listener = QueueListener(queue, target)
+
+    root = logging.getLogger()
+    with _lock:
+        _uninstall()
+        root.addHandler(handler)
+        root.setLevel(level)
+        listener.start()
+        _installed = (handler, listener, target)
+
+
+def _uninstall():
+    global _installed
+
+    if _installed is not None:
+        handler, listener, target = _installed
+        logging.getLogger().removeHandler(handler)
+        listener.stop()
+        target.close()
+        _installed = None
+
+
+@atexit.register
+def _shutdown():
+    """Grava os registros ainda na fila ao encerrar o processo."""
+    with _lock:
+        _uninstall()
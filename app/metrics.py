@@ -0,0 +1,391 @@
+"""Métricas da aplicação no formato de exposição de texto do Prometheus.
+
+Implementa contadores, gauges e histogramas com rótulos (labels), agrupados em
+um registro que é servido pela rota `/metrics`. As métricas são atualizadas nos
+caminhos quentes (envio de cada e-mail, rastreamento), então cada atualização
+é apenas uma operação aritmética protegida por um lock (menos de 1 µs). Obter
+uma série com `labels()` custa uma busca em dicionário; as séries usadas a
+cada e-mail (como as etapas do SMTP) são obtidas uma única vez, em módulo.
+
+- Registry: Um conjunto de métricas e a sua serialização em texto.
+- Counter / Gauge / Histogram: Os tipos de métrica.
+- REGISTRY: O registro padrão da aplicação.
+- instrument_sessions: Mede a duração dos flushes das sessões do SQLAlchemy.
+- CONTENT_TYPE: O tipo de conteúdo da resposta de `/metrics`.
+
+Exemplo:
+    EMAILS_SENT.inc()
+    with SMTP_SEND.time():
+        await client.send_message(msg)
+"""
+
+import bisect
+import math
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Limites padrão dos buckets dos histogramas de latência, em segundos.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape_label(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    """Um conjunto de métricas servidas juntas."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Adiciona uma métrica ao registro.
+
+        Raises:
+            ValueError: Se já houver uma métrica com o mesmo nome.
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica já registrada: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def render(self):
+        """Serializa todas as métricas no formato de texto do Prometheus.
+
+        Returns:
+            str: O corpo da resposta de `/metrics`.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    """Base das métricas: nome, descrição, rótulos e séries por rótulo."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Retorna a série com os valores de rótulo informados.
+
+        Args:
+            *values: Um valor para cada rótulo, na ordem de `labelnames`.
+
+        Raises:
+            ValueError: Se a quantidade de valores não corresponder aos rótulos.
+        """
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} espera os rótulos {self.labelnames}, "
+                    f"recebeu {len(key)} valor(es)."
+                )
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabeled(self):
+        try:
+            return self._children[()]
+        except KeyError:
+            raise ValueError(f"{self.name} tem rótulos; use labels().") from None
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if amount < 0:
+            raise ValueError("Contadores só podem ser incrementados.")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class Counter(_Metric):
+    """Um valor que só aumenta, como a quantidade de e-mails enviados."""
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._unlabeled().inc(amount)
+
+    @property
+    def value(self):
+        return self._unlabeled().value
+
+    def samples(self):
+        for key, child in self._items():
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+class Gauge(_Metric):
+    """Um valor que sobe e desce, como o tamanho de uma fila."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._unlabeled().set(value)
+
+    def inc(self, amount=1):
+        self._unlabeled().inc(amount)
+
+    def dec(self, amount=1):
+        self._unlabeled().dec(amount)
+
+    @property
+    def value(self):
+        return self._unlabeled().value
+
+    def samples(self):
+        for key, child in self._items():
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class _Timer:
+    """Context manager que observa a duração do bloco em um histograma."""
+
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._started)
+
+
+class _HistogramChild:
+    def __init__(self, bounds):
+        self._bounds = bounds
+        # Contagens por bucket (não cumulativas); a última é o bucket +Inf.
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+    @property
+    def count(self):
+        return sum(self._counts)
+
+
+class Histogram(_Metric):
+    """A distribuição de um valor, como latências, em buckets cumulativos."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name,
+        documentation,
+        labelnames=(),
+        buckets=DEFAULT_BUCKETS,
+        registry=REGISTRY,
+    ):
+        self._bounds = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self._bounds)
+
+    def observe(self, value):
+        self._unlabeled().observe(value)
+
+    def time(self):
+        return self._unlabeled().time()
+
+    @property
+    def count(self):
+        return self._unlabeled().count
+
+    def samples(self):
+        for key, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self._bounds + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, ("le", _format_value(bound))
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+# --- Métricas da aplicação ---
+
+EMAILS_SENT = Counter("hyperxmail_emails_sent_total", "E-mails enviados com sucesso.")
+EMAILS_FAILED = Counter(
+    "hyperxmail_emails_failed_total",
+    "E-mails que não puderam ser enviados, por motivo.",
+    ["reason"],
+)
+SMTP_DURATION = Histogram(
+    "hyperxmail_smtp_duration_seconds",
+    "Duração das etapas da conversa SMTP (connect inclui o STARTTLS).",
+    ["stage"],
+)
+SMTP_CONNECT = SMTP_DURATION.labels("connect")
+SMTP_LOGIN = SMTP_DURATION.labels("login")
+SMTP_SEND = SMTP_DURATION.labels("send")
+RENDER_DURATION = Histogram(
+    "hyperxmail_render_duration_seconds",
+    "Tempo para renderizar e montar a mensagem MIME de um destinatário.",
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.01, 0.05),
+)
+SEND_QUEUE_DEPTH = Gauge(
+    "hyperxmail_send_queue_depth",
+    "E-mails de campanhas em andamento que ainda não foram processados.",
+)
+DB_WRITER_QUEUE_DEPTH = Gauge(
+    "hyperxmail_db_writer_queue_depth",
+    "Operações aguardando ou em execução nas threads de escrita do banco.",
+)
+DB_FLUSH_DURATION = Histogram(
+    "hyperxmail_db_flush_duration_seconds",
+    "Duração dos flushes das sessões do SQLAlchemy.",
+)
+TRACKING_HITS = Counter(
+    "hyperxmail_tracking_hits_total",
+    "Acessos às rotas de rastreamento, por tipo e resultado.",
+    ["kind", "result"],
+)
+SOCKETIO_EMITS = Counter(
+    "hyperxmail_socketio_emits_total",
+    "Eventos emitidos via SocketIO, por evento.",
+    ["event"],
+)
+
+
+def _before_flush(session, flush_context, instances):
+    session.info["metrics_flush_started"] = time.perf_counter()
+
+
+def _after_flush(session, flush_context):
+    started = session.info.pop("metrics_flush_started", None)
+    if started is not None:
+        DB_FLUSH_DURATION.observe(time.perf_counter() - started)
+
+
+def instrument_sessions(session_class):
+    """Registra a medição da duração dos flushes de uma classe de sessão.
+
+    Pode ser chamada mais de uma vez; os eventos são registrados apenas uma.
+
+    Args:
+        session_class (type): A classe de sessão do SQLAlchemy.
+    """
+    from sqlalchemy import event
+
+    if not event.contains(session_class, "before_flush", _before_flush):
+        event.listen(session_class, "before_flush", _before_flush)
+        event.listen(session_class, "after_flush_postexec", _after_flush)
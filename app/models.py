@@ -5,13 +5,21 @@ Os modelos representam as entidades centrais da aplicação: campanhas de e-mail
 os e-mails individuais enviados, e os eventos de rastreamento (aberturas e cliques).
 
 - Campaign: Representa uma campanha de e-mail marketing.
+- Recipient: Um destinatário, compartilhado entre as campanhas.
 - Email: Representa um e-mail individual enviado como parte de uma campanha.
 - Open: Registra um evento de abertura de um e-mail.
+- Link: Representa um link rastreável de uma campanha.
 - Click: Registra um evento de clique em um link dentro de um e-mail.
+- CampaignSketch: Armazena os sketches HyperLogLog de valores únicos por campanha.
+- EngagementRollup: Contadores de aberturas e cliques por campanha e intervalo.
+- EmailTemplate: Um template de e-mail salvo pelo usuário.
+- Suppression: Um endereço que não deve receber e-mails (descadastro, bounce).
 """
 
 from . import db
+import uuid
 from datetime import datetime
+from sqlalchemy.ext.associationproxy import association_proxy
 
 
 class Campaign(db.Model):
@@ -35,25 +43,72 @@ class Campaign(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     emails = db.relationship("Email", backref="campaign", lazy=True)
 
+    # Índice usado pela paginação por keyset da listagem de campanhas.
+    __table_args__ = (db.Index("ix_campaign_created_at_id", "created_at", "id"),)
+
+
+class Recipient(db.Model):
+    """Representa um destinatário, compartilhado entre as campanhas.
+
+    O endereço é armazenado uma única vez; cada `Email` referencia o seu
+    destinatário pelo ID inteiro, e o histórico de um destinatário é uma
+    busca pelo índice de `Email.recipient_id`.
+
+    Attributes:
+        id (int): A chave primária do destinatário.
+        email (str): O endereço de e-mail, único.
+        created_at (datetime): O timestamp do primeiro envio ao destinatário.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(255), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+def _get_or_create_recipient(email):
+    """Busca ou cria o `Recipient` de um endereço (usado por `Email.recipient`)."""
+    for obj in db.session.new:
+        if isinstance(obj, Recipient) and obj.email == email:
+            return obj
+    with db.session.no_autoflush:
+        recipient = db.session.query(Recipient).filter_by(email=email).one_or_none()
+    return recipient or Recipient(email=email)
+
 
 class Email(db.Model):
     """Representa um e-mail individual enviado em uma campanha.
 
     Cada registro de e-mail está associado a uma campanha e a um destinatário
-    específico. O ID é um UUID para permitir o rastreamento único e anônimo.
+    específico. A chave primária é um inteiro sequencial, usado nas junções
+    internas; as URLs de rastreamento usam o `token`, um UUID público que não
+    revela a quantidade de e-mails enviados.
 
     Attributes:
-        id (str): A chave primária, um UUID de 36 caracteres.
+        id (int): A chave primária do e-mail.
+        token (str): O identificador público do e-mail nas URLs de
+            rastreamento, um UUID de 36 caracteres.
         campaign_id (int): Chave estrangeira para a tabela `Campaign`.
-        recipient (str): O endereço de e-mail do destinatário.
+        recipient_id (int): Chave estrangeira para a tabela `Recipient`.
+        recipient (str): O endereço de e-mail do destinatário. Atribuir um
+            endereço busca ou cria o `Recipient` correspondente; envios em
+            massa devem usar `upsert_recipients` e `recipient_id`.
         sent_at (datetime): O timestamp de quando o e-mail foi enviado.
         opens (relationship): Relacionamento com os eventos de abertura deste e-mail.
         clicks (relationship): Relacionamento com os eventos de clique deste e-mail.
     """
 
-    id = db.Column(db.String(36), primary_key=True)  # Usando UUIDs como IDs
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(
+        db.String(36), nullable=False, unique=True, default=lambda: str(uuid.uuid4())
+    )
     campaign_id = db.Column(db.Integer, db.ForeignKey("campaign.id"), nullable=False)
-    recipient = db.Column(db.String(255), nullable=False)
+    recipient_id = db.Column(
+        db.Integer, db.ForeignKey("recipient.id"), nullable=False, index=True
+    )
+    recipient_ref = db.relationship("Recipient")
+    recipient = association_proxy(
+        "recipient_ref", "email", creator=_get_or_create_recipient
+    )
     sent_at = db.Column(db.DateTime, default=datetime.utcnow)
     opens = db.relationship("Open", backref="email", lazy=True)
     clicks = db.relationship("Click", backref="email", lazy=True)
@@ -63,33 +118,197 @@ class Open(db.Model):
     """Registra um evento de abertura de e-mail.
 
     Cada vez que o pixel de rastreamento em um e-mail é carregado, um registro
-    desta classe é criado.
+    desta classe é criado. Carregamentos repetidos dentro da janela de
+    deduplicação são agregados no mesmo registro, incrementando `hits`.
 
     Attributes:
         id (int): A chave primária do registro de abertura.
-        email_id (str): Chave estrangeira para o e-mail que foi aberto.
+        email_id (int): Chave estrangeira para o e-mail que foi aberto.
         opened_at (datetime): O timestamp do evento de abertura.
+        hits (int): Quantidade de carregamentos agregados neste evento.
     """
 
     id = db.Column(db.Integer, primary_key=True)
-    email_id = db.Column(db.String(36), db.ForeignKey("email.id"), nullable=False)
+    email_id = db.Column(
+        db.Integer, db.ForeignKey("email.id"), nullable=False, index=True
+    )
     opened_at = db.Column(db.DateTime, default=datetime.utcnow)
+    hits = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+
+class Link(db.Model):
+    """Representa um link rastreável de uma campanha.
+
+    Os links são registrados uma única vez, quando a campanha é preparada para
+    envio. As URLs de rastreamento carregam apenas o ID do link, e os cliques
+    o referenciam em vez de repetir a URL completa.
+
+    Attributes:
+        id (int): A chave primária do link.
+        campaign_id (int): Chave estrangeira para a campanha.
+        url (str): A URL original de destino.
+        clicks (relationship): Relacionamento com os cliques neste link.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(
+        db.Integer, db.ForeignKey("campaign.id"), nullable=False, index=True
+    )
+    url = db.Column(db.String(2048), nullable=False)
+    clicks = db.relationship("Click", backref="link", lazy=True)
 
 
 class Click(db.Model):
     """Registra um evento de clique em um link de e-mail.
 
     Quando um usuário clica em um link rastreável em um e-mail, um registro
-    desta classe é criado, armazenando a URL original de destino.
+    desta classe é criado, referenciando o `Link` clicado. Cliques em URLs de
+    rastreamento antigas, anteriores ao registro de links, armazenam a URL
+    original de destino. Cliques repetidos no mesmo link dentro da janela de
+    deduplicação são agregados no mesmo registro, incrementando `hits`.
 
     Attributes:
         id (int): A chave primária do registro de clique.
-        email_id (str): Chave estrangeira para o e-mail onde o clique ocorreu.
-        url (str): A URL original para a qual o usuário foi redirecionado.
+        email_id (int): Chave estrangeira para o e-mail onde o clique ocorreu.
+        link_id (int): Chave estrangeira para o link clicado, se houver.
+        url (str): A URL original de destino, para cliques sem `link_id`.
         clicked_at (datetime): O timestamp do evento de clique.
+        hits (int): Quantidade de cliques agregados neste evento.
     """
 
     id = db.Column(db.Integer, primary_key=True)
-    email_id = db.Column(db.String(36), db.ForeignKey("email.id"), nullable=False)
-    url = db.Column(db.String(2048), nullable=False)
+    email_id = db.Column(
+        db.Integer, db.ForeignKey("email.id"), nullable=False, index=True
+    )
+    link_id = db.Column(db.Integer, db.ForeignKey("link.id"), index=True)
+    url = db.Column(db.String(2048))
     clicked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    hits = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+
+class CampaignSketch(db.Model):
+    """Armazena um sketch HyperLogLog de valores únicos de uma campanha.
+
+    Os sketches são atualizados pelas rotas de rastreamento e permitem estimar
+    aberturas e cliques únicos sem `COUNT(DISTINCT ...)` sobre os eventos.
+
+    Attributes:
+        campaign_id (int): Chave estrangeira para a campanha.
+        kind (str): O tipo de evento contado (`"opens"` ou `"clicks"`).
+        registers (bytes): Os registradores serializados do sketch.
+        updated_at (datetime): O timestamp da última atualização.
+    """
+
+    campaign_id = db.Column(db.Integer, db.ForeignKey("campaign.id"), primary_key=True)
+    kind = db.Column(db.String(16), primary_key=True)
+    registers = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class EngagementRollup(db.Model):
+    """Contadores agregados de engajamento de uma campanha em um intervalo.
+
+    Cada linha acumula as aberturas e cliques de uma campanha ocorridos dentro
+    de um bucket de tempo (um minuto ou uma hora), mantidos de forma incremental
+    pelas rotas de rastreamento.
+
+    Attributes:
+        campaign_id (int): Chave estrangeira para a campanha.
+        resolution (str): A duração do bucket (`"minute"` ou `"hour"`).
+        bucket_start (datetime): O início do bucket.
+        opens (int): Quantidade de aberturas registradas no bucket.
+        clicks (int): Quantidade de cliques registrados no bucket.
+    """
+
+    campaign_id = db.Column(db.Integer, db.ForeignKey("campaign.id"), primary_key=True)
+    resolution = db.Column(db.String(8), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    opens = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    clicks = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+class CampaignStageTiming(db.Model):
+    """O tempo gasto em uma etapa do envio de uma campanha.
+
+    Agrega as medições de uma etapa (por exemplo, `smtp.send` ou
+    `prepare.sanitize`) feitas durante o envio, gravadas ao final da campanha
+    (veja `app/tracing.py`).
+
+    Attributes:
+        campaign_id (int): Chave estrangeira para a campanha.
+        stage (str): O nome da etapa.
+        count (int): Quantas vezes a etapa foi executada.
+        total_seconds (float): A soma das durações, em segundos.
+        max_seconds (float): A maior duração, em segundos.
+    """
+
+    campaign_id = db.Column(db.Integer, db.ForeignKey("campaign.id"), primary_key=True)
+    stage = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    total_seconds = db.Column(db.Float, nullable=False)
+    max_seconds = db.Column(db.Float, nullable=False)
+
+
+class EmailTemplate(db.Model):
+    """Representa um template de e-mail salvo pelo usuário.
+
+    Attributes:
+        id (str): A chave primária, um UUID de 36 caracteres.
+        name (str): O nome do template.
+        content (str): O conteúdo HTML sanitizado do template.
+        created_at (datetime): O timestamp de criação.
+        updated_at (datetime): O timestamp da última alteração.
+    """
+
+    id = db.Column(db.String(36), primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Suppression(db.Model):
+    """Representa um endereço na lista de supressão.
+
+    Endereços suprimidos são ignorados na entrada de toda campanha.
+
+    Attributes:
+        email (str): A chave primária, o endereço normalizado por
+            `normalize_email`.
+        reason (str): O motivo da supressão (por exemplo, `"unsubscribe"` ou
+            `"bounce"`).
+        created_at (datetime): O timestamp da inclusão.
+    """
+
+    email = db.Column(db.String(255), primary_key=True)
+    reason = db.Column(db.String(32), nullable=False, default="manual")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class SendJob(db.Model):
+    """Um envio de campanha aguardando o processo de envio.
+
+    Com `SENDER_MODE=queue`, a rota `/send_email` grava a requisição como um
+    `SendJob` e o processo `flask run-sender` a executa (veja
+    `app/send_queue.py`).
+
+    Attributes:
+        id (int): A chave primária.
+        status (str): `pending`, `running`, `done` ou `failed`.
+        payload (str): Os argumentos de `send_bulk_emails`, em JSON;
+            `"{}"` depois que o envio termina.
+        result (str): O resultado de `send_bulk_emails`, em JSON.
+        created_at (datetime): Quando o envio foi solicitado.
+        started_at (datetime): Quando o processo de envio o iniciou.
+        finished_at (datetime): Quando terminou.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(16), nullable=False, default="pending", index=True)
+    payload = db.Column(db.Text, nullable=False)
+    result = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
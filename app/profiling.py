@@ -0,0 +1,296 @@
+"""Modo de perfilamento (profiling) do envio de campanhas.
+
+Permite executar uma campanha sob um profiler e gravar um artefato por
+campanha, para encontrar os pontos quentes de `send_email_task` e das
+operações de banco a partir de conteúdos reais, sem suposições:
+
+- `sampling`: um profiler por amostragem, que lê periodicamente a pilha da
+  thread do envio e das threads de escrita do banco (`DatabaseWriter`) e grava
+  as pilhas no formato "folded" (`.folded`), aceito pelo `flamegraph.pl`, pelo
+  speedscope e por outras ferramentas de flamegraph. O custo é independente da
+  quantidade de chamadas, então pode ser usado com conteúdos de produção.
+- `cprofile`: o profiler determinístico da biblioteca padrão, que grava um
+  arquivo `.pstats` (leia com `python -m pstats` ou snakeviz).
+
+O perfilamento é ativado para todas as campanhas por `CAMPAIGN_PROFILER`, ou
+por requisição (veja a rota `/send_email` e `PROFILE_ADMIN_TOKEN`). O comando
+`flask replay-campaign` reenvia uma campanha gravada para um servidor SMTP
+local (`SmtpSink`) sob o profiler.
+
+- PROFILER_KINDS: Os tipos de profiler disponíveis.
+- SamplingProfiler: O profiler por amostragem.
+- CampaignProfiler: Executa um trecho sob um profiler e grava o artefato.
+- replay_campaign: Reenvia uma campanha gravada para um SMTP local.
+"""
+
+import asyncio
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILER_KINDS = ("sampling", "cprofile")
+
+# Extensão do artefato gravado por cada tipo de profiler.
+ARTIFACT_EXTENSIONS = {"sampling": ".folded", "cprofile": ".pstats"}
+
+
+class SamplingProfiler:
+    """Profiler por amostragem baseado em `sys._current_frames()`.
+
+    Uma thread auxiliar lê, a cada `interval` segundos, a pilha das threads
+    observadas e conta quantas vezes cada pilha foi vista.
+
+    Attributes:
+        samples (Counter): Contagem por pilha, no formato "folded"
+            (`thread;quadro externo;...;quadro interno`).
+    """
+
+    def __init__(self, interval=0.005, thread_ids=None, thread_prefixes=("db-writer",)):
+        """Inicializa o profiler.
+
+        Args:
+            interval (float, optional): O intervalo entre amostras, em
+                segundos. Defaults to 0.005.
+            thread_ids (Iterable[int], optional): As threads observadas. Por
+                padrão, a thread que chama `start()`.
+            thread_prefixes (tuple[str], optional): Threads cujo nome começa
+                com um destes prefixos também são observadas.
+        """
+        self.interval = interval
+        self.samples = Counter()
+        self._thread_ids = set(thread_ids or ())
+        self._thread_prefixes = tuple(thread_prefixes)
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia a amostragem em uma thread auxiliar."""
+        if not self._thread_ids:
+            self._thread_ids.add(threading.get_ident())
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe a amostragem."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)[-2:]
+            label = f"{code.co_name} ({'/'.join(path)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_id:
+                    continue
+                name = names.get(ident, str(ident))
+                if ident not in self._thread_ids and not name.startswith(
+                    self._thread_prefixes
+                ):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(name)
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path):
+        """Grava as pilhas amostradas no formato "folded".
+
+        Args:
+            path (str): O arquivo de destino.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class CampaignProfiler:
+    """Executa um trecho sob um profiler e grava o artefato em um diretório.
+
+    Example:
+        profiler = CampaignProfiler("sampling", "profiles", "campaign-42")
+        profiler.start()
+        try:
+            ...
+        finally:
+            path = profiler.stop()
+    """
+
+    def __init__(self, kind, output_dir, name, interval=0.005):
+        """Inicializa o profiler.
+
+        Args:
+            kind (str): Um de `PROFILER_KINDS`.
+            output_dir (str): O diretório dos artefatos. É criado se necessário.
+            name (str): O prefixo do nome do artefato.
+            interval (float, optional): O intervalo de amostragem, em segundos
+                (apenas para `sampling`).
+
+        Raises:
+            ValueError: Se o tipo de profiler não existir.
+        """
+        if kind not in PROFILER_KINDS:
+            raise ValueError(
+                f"Profiler desconhecido: {kind}. Use um de: {', '.join(PROFILER_KINDS)}."
+            )
+        self.kind = kind
+        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self.path = os.path.join(
+            output_dir, f"{name}-{timestamp}{ARTIFACT_EXTENSIONS[kind]}"
+        )
+        self._output_dir = output_dir
+        self._interval = interval
+        self._profiler = None
+
+    def start(self):
+        """Inicia o profiler na thread atual.
+
+        Raises:
+            ValueError: Se outro profiler já estiver ativo (apenas `cprofile`,
+                a partir do Python 3.12).
+        """
+        if self.kind == "sampling":
+            self._profiler = SamplingProfiler(self._interval)
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        """Interrompe o profiler e grava o artefato.
+
+        Returns:
+            str: O caminho do artefato gravado.
+        """
+        os.makedirs(self._output_dir, exist_ok=True)
+        if self.kind == "sampling":
+            self._profiler.stop()
+            self._profiler.write_folded(self.path)
+        else:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.path)
+        return self.path
+
+
+@contextmanager
+def _override_config(**values):
+    """Altera atributos da `Config` dentro do bloco e os restaura ao final."""
+    from .config import Config
+
+    previous = {name: getattr(Config, name) for name in values}
+    for name, value in values.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(Config, name, value)
+
+
+def replay_campaign(
+    campaign_id,
+    kind="sampling",
+    output_dir="profiles",
+    limit=None,
+    base_url="http://localhost:5000/",
+    interval=0.005,
+):
+    """Reenvia uma campanha gravada para um servidor SMTP local, sob um profiler.
+
+    A mensagem e os destinatários são lidos do banco e enviados por
+    `send_bulk_emails`, com o SMTP apontado para um `SmtpSink` local e sem a
+    pausa entre e-mails. Os anexos e os campos de mesclagem não são gravados
+    com a campanha, então o reenvio é feito sem eles. O reenvio cria uma nova
+    campanha (com o assunto prefixado por "[replay]"); execute-o em uma cópia
+    do banco de produção.
+
+    Deve ser chamada dentro de um contexto da aplicação.
+
+    Args:
+        campaign_id (int): O ID da campanha gravada.
+        kind (str, optional): Um de `PROFILER_KINDS`. Defaults to "sampling".
+        output_dir (str, optional): O diretório do artefato.
+        limit (int, optional): Reenvia apenas os primeiros destinatários.
+        base_url (str, optional): A URL base usada nos links de rastreamento.
+        interval (float, optional): O intervalo de amostragem, em segundos.
+
+    Returns:
+        dict: O resultado de `send_bulk_emails` em `result`, a quantidade de
+            mensagens recebidas pelo SMTP local em `delivered` e o caminho do
+            artefato em `profile`.
+
+    Raises:
+        ValueError: Se a campanha não existir ou não tiver destinatários.
+    """
+    from . import db
+    from .email_utils import send_bulk_emails
+    from .models import Campaign, Email, Recipient
+    from .smtp_sink import SmtpSink
+
+    campaign = db.session.get(Campaign, campaign_id)
+    if campaign is None:
+        raise ValueError(f"Campanha {campaign_id} não encontrada.")
+    query = (
+        db.session.query(Recipient.email)
+        .join(Email, Email.recipient_id == Recipient.id)
+        .filter(Email.campaign_id == campaign_id)
+        .order_by(Email.id)
+    )
+    if limit:
+        query = query.limit(limit)
+    addresses = [email for (email,) in query]
+    if not addresses:
+        raise ValueError(f"A campanha {campaign_id} não tem destinatários.")
+    subject, message = f"[replay] {campaign.subject}", campaign.message
+    db.session.remove()
+
+    profiler = CampaignProfiler(
+        kind, output_dir, f"replay-{campaign_id}", interval=interval
+    )
+
+    async def run():
+        async with SmtpSink() as sink:
+            with _override_config(
+                SMTP_SERVER=sink.host,
+                SMTP_PORT=sink.port,
+                SMTP_STARTTLS=False,
+                SECONDS_PER_EMAIL=0,
+            ):
+                profiler.start()
+                try:
+                    result = await send_bulk_emails(
+                        subject=subject,
+                        cc="",
+                        bcc="",
+                        message=message,
+                        attachments=[],
+                        base_url=base_url,
+                        manual_emails=addresses,
+                        # O reenvio já é perfilado; sem um segundo profiler
+                        # de `CAMPAIGN_PROFILER` dentro dele.
+                        profile=False,
+                    )
+                finally:
+                    path = profiler.stop()
+            return {"result": result, "delivered": sink.messages, "profile": path}
+
+    return asyncio.run(run())
@@ -0,0 +1,51 @@
+"""Limites de requisições por rota.
+
+O Flask-Limiter conta as requisições de cada IP e aplica `RATELIMIT_DEFAULT`
+às rotas sem política própria. As rotas listadas em `ROUTE_POLICIES` usam o
+limite da sua chave de configuração ou, com a chave vazia, ficam isentas:
+o pixel e os cliques de uma campanha chegam de poucos IPs (NATs
+corporativos, proxies de imagem), e um 429 é uma abertura perdida.
+
+A configuração é lida pelo próprio Flask-Limiter (`RATELIMIT_DEFAULT`,
+`RATELIMIT_STORAGE_URI`, `RATELIMIT_STRATEGY` e `RATELIMIT_ENABLED`).
+
+- ROUTE_POLICIES: A política de cada rota.
+- init_rate_limits: Instala o limitador em uma aplicação.
+"""
+
+# Endpoint -> chave da configuração com o limite da rota. Com None, ou com a
+# chave vazia, a rota fica isenta, inclusive do limite padrão.
+ROUTE_POLICIES = {
+    "track_open": "RATELIMIT_TRACKING",
+    "track_click": "RATELIMIT_TRACKING",
+    "metrics_endpoint": None,
+}
+
+
+def init_rate_limits(app):
+    """Instala o limitador de requisições e aplica as políticas das rotas.
+
+    Deve ser chamada depois que as rotas forem registradas.
+
+    Args:
+        app (Flask): A aplicação, já com as rotas.
+
+    Returns:
+        Limiter: O limitador instalado.
+    """
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+
+    limiter = Limiter(key_func=get_remote_address)
+    limiter.init_app(app)
+
+    for endpoint, key in ROUTE_POLICIES.items():
+        view = app.view_functions.get(endpoint)
+        if view is None:
+            continue
+        policy = app.config.get(key) if key else None
+        if policy:
+            app.view_functions[endpoint] = limiter.limit(policy)(view)
+        else:
+            limiter.exempt(view)
+    return limiter
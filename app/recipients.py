@@ -0,0 +1,496 @@
+"""Leitura, validação e normalização de listas de destinatários.
+
+Exportações reais de listas de contatos têm cabeçalho, campos entre aspas,
+várias colunas, separadores diferentes (`;` é comum em planilhas em
+português) e codificações variadas. Este módulo lê esses arquivos com o
+módulo `csv`, linha a linha, de modo que o consumo de memória não depende do
+tamanho do arquivo, e relata as linhas rejeitadas sem interromper a leitura.
+
+Todo endereço passa uma única vez, na entrada, pela normalização
+(`normalize_email`): espaços removidos, letras minúsculas e domínios
+internacionalizados convertidos para IDNA. A lista de destinatários é
+deduplicada pela forma normalizada, e o envio recebe os endereços já
+validados.
+
+- normalize_email: Valida e normaliza um endereço de e-mail.
+- RecipientList: Destinatários normalizados, deduplicados e sem os endereços
+  suprimidos de uma campanha.
+- RecipientReader: Itera sobre os destinatários de um CSV e os seus campos.
+- ReadStats: Estatísticas de uma leitura (linhas, erros, linhas por segundo).
+- upsert_recipients: Busca ou cria, em lotes, os registros `Recipient`.
+"""
+
+import codecs
+import csv
+import functools
+import io
+import itertools
+import re
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+# Nomes de coluna (já normalizados) reconhecidos como a coluna de e-mail.
+EMAIL_COLUMN_NAMES = ("email", "e_mail", "email_address", "endereco_de_email")
+
+# Separadores considerados na detecção automática.
+DELIMITERS = ",;\t|"
+
+# Quantidade de linhas usadas para detectar o separador e o cabeçalho.
+SAMPLE_LINES = 50
+
+# Quantidade de bytes usados para detectar a codificação.
+SAMPLE_BYTES = 64 * 1024
+
+# Quantidade de endereços processados por lote em `upsert_recipients`.
+UPSERT_BATCH_SIZE = 5000
+
+# Partes de um endereço já em minúsculas; o domínio já convertido para IDNA,
+# cujos domínios de topo internacionalizados têm a forma `xn--...`.
+_local_part_regex = re.compile(r"[a-z0-9._%+-]+")
+_domain_regex = re.compile(r"[a-z0-9.-]+\.(?:[a-z]{2,}|xn--[a-z0-9-]+)")
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_domain(domain):
+    """Normaliza e valida o domínio de um endereço de e-mail.
+
+    Listas grandes repetem poucos domínios, então o resultado é mantido em
+    cache e a conversão IDNA é feita uma vez por domínio.
+
+    Args:
+        domain (str): O domínio, como informado.
+
+    Returns:
+        str | None: O domínio em minúsculas e em ASCII (IDNA), ou None se for
+            inválido.
+    """
+    domain = domain.strip().rstrip(".").lower()
+    if not domain.isascii():
+        try:
+            domain = domain.encode("idna").decode("ascii")
+        except UnicodeError:
+            return None
+    return domain if _domain_regex.fullmatch(domain) else None
+
+
+def normalize_email(address):
+    """Valida e normaliza um endereço de e-mail.
+
+    Remove os espaços ao redor, converte o endereço para minúsculas e o
+    domínio para IDNA (`joão@exemplo.com.br` é inválido, mas
+    `joao@exemplo.com.br` e `joao@café.com` são aceitos, o último como
+    `joao@xn--caf-dma.com`).
+
+    Args:
+        address (str): O endereço, como informado.
+
+    Returns:
+        str | None: O endereço normalizado, ou None se for inválido.
+    """
+    local, sep, domain = str(address).strip().rpartition("@")
+    if not sep:
+        return None
+    local = local.lower()
+    if not _local_part_regex.fullmatch(local):
+        return None
+    domain = normalize_domain(domain)
+    if domain is None:
+        return None
+    return f"{local}@{domain}"
+
+
+class RecipientList:
+    """Os destinatários de uma campanha, normalizados e deduplicados.
+
+    Endereços que diferem apenas em maiúsculas, espaços ou na forma do
+    domínio (Unicode ou IDNA) são o mesmo destinatário; vale a primeira
+    ocorrência, com os seus campos de mesclagem. Endereços presentes em
+    `suppressed` (normalmente um `SuppressionIndex`) são ignorados.
+
+    Attributes:
+        recipients (dict[str, dict]): Os endereços normalizados, na ordem de
+            inclusão, e os seus campos de mesclagem.
+        invalid (int): Endereços rejeitados por `add`.
+        duplicates (int): Endereços ignorados por repetirem um anterior,
+            incluído ou suprimido.
+        suppressed (int): Endereços distintos ignorados por estarem
+            suprimidos.
+    """
+
+    def __init__(self, suppressed=None):
+        self.recipients = {}
+        self.invalid = 0
+        self.duplicates = 0
+        self.suppressed = 0
+        self._suppressed = suppressed
+        self._suppressed_seen = set()
+
+    def add(self, address, fields=None, normalized=False):
+        """Inclui um destinatário na lista.
+
+        Args:
+            address (str): O endereço de e-mail.
+            fields (dict, optional): Os campos de mesclagem do destinatário.
+            normalized (bool, optional): Se o endereço já passou por
+                `normalize_email` (como os produzidos por `RecipientReader`).
+
+        Returns:
+            bool: True se o destinatário foi incluído.
+        """
+        if not normalized:
+            address = normalize_email(address)
+            if address is None:
+                self.invalid += 1
+                return False
+        if address in self.recipients or address in self._suppressed_seen:
+            self.duplicates += 1
+            return False
+        if self._suppressed is not None and address in self._suppressed:
+            self._suppressed_seen.add(address)
+            self.suppressed += 1
+            return False
+        self.recipients[address] = fields or {}
+        return True
+
+    def update(self, items):
+        """Inclui os pares `(endereço normalizado, campos)` de um leitor."""
+        for address, fields in items:
+            self.add(address, fields, normalized=True)
+
+    def __len__(self):
+        return len(self.recipients)
+
+    def __iter__(self):
+        return iter(self.recipients.items())
+
+
+def field_name(column):
+    """Normaliza o nome de uma coluna para um nome de campo (`First Name` vira
+    `first_name`)."""
+    return re.sub(r"\W+", "_", column.strip().lower()).strip("_")
+
+
+def detect_encoding(sample):
+    """Detecta a codificação de um trecho inicial de um arquivo.
+
+    Reconhece as marcas de ordem de bytes (BOM) de UTF-8 e UTF-16; sem BOM,
+    usa UTF-8 se o trecho for válido e, caso contrário, Windows-1252, a
+    codificação das planilhas exportadas pelo Excel em português.
+
+    Args:
+        sample (bytes): Os primeiros bytes do arquivo.
+
+    Returns:
+        str: O nome da codificação.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # Decodificação incremental: um caractere cortado no fim do trecho não
+        # é considerado um erro.
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+class ReadStats:
+    """Estatísticas de uma leitura de CSV.
+
+    Attributes:
+        rows (int): Linhas de dados lidas (sem o cabeçalho e linhas vazias).
+        recipients (int): Linhas aceitas.
+        error_count (int): Linhas rejeitadas.
+        errors (list[dict]): As primeiras linhas rejeitadas, com `line` (o
+            número da linha no arquivo) e `error` (o motivo).
+        elapsed (float): Duração da leitura, em segundos.
+        encoding (str | None): A codificação usada, para entradas em bytes.
+        delimiter (str): O separador de colunas usado.
+        email_column (str | int | None): A coluna de e-mail usada.
+    """
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.recipients = 0
+        self.error_count = 0
+        self.errors = []
+        self.elapsed = 0.0
+        self.encoding = None
+        self.delimiter = ","
+        self.email_column = None
+
+    @property
+    def rows_per_second(self):
+        """float: A vazão da leitura."""
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line, error):
+        """Registra uma linha rejeitada, guardando apenas as primeiras."""
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error})
+
+    def to_dict(self):
+        """Serializa as estatísticas para respostas da API."""
+        return {
+            "rows": self.rows,
+            "recipients": self.recipients,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class RecipientReader:
+    """Itera sobre os destinatários de um arquivo CSV.
+
+    A primeira linha é tratada como cabeçalho se contiver uma coluna de e-mail
+    conhecida (veja `EMAIL_COLUMN_NAMES`) ou a coluna informada em
+    `email_column`, ou se não contiver nenhum endereço de e-mail. Sem
+    cabeçalho, a coluna de e-mail é a primeira que contém um endereço válido,
+    e o arquivo não possui campos de mesclagem.
+
+    Cada item produzido é uma tupla `(email, campos)`, com o e-mail já
+    normalizado por `normalize_email`, em que `campos` mapeia
+    os nomes normalizados das demais colunas (ou apenas das colunas em
+    `field_columns`) para os valores da linha. Linhas sem e-mail válido são
+    contadas em `stats` e não interrompem a leitura; um CSV malformado (por
+    exemplo, com um campo maior que o limite do módulo `csv`) a interrompe
+    com `ValueError`, como as colunas inválidas.
+
+    Attributes:
+        stats (ReadStats): As estatísticas da leitura, atualizadas durante a
+            iteração.
+    """
+
+    def __init__(
+        self,
+        source,
+        email_column=None,
+        field_columns=None,
+        encoding=None,
+        delimiter=None,
+        max_errors=100,
+    ):
+        """Inicializa o leitor.
+
+        Args:
+            source (str | bytes | Iterable[str] | BinaryIO): O conteúdo do
+                CSV, um arquivo de texto (ou qualquer iterável de linhas) ou
+                um arquivo binário posicionável.
+            email_column (str | int, optional): O nome ou o índice da coluna
+                de e-mail. Por padrão, é detectada.
+            field_columns (list[str], optional): As colunas usadas como campos
+                de mesclagem. Por padrão, todas exceto a de e-mail.
+            encoding (str, optional): A codificação de entradas binárias. Por
+                padrão, é detectada (veja `detect_encoding`).
+            delimiter (str, optional): O separador de colunas. Por padrão, é
+                detectado entre `DELIMITERS`.
+            max_errors (int, optional): Quantidade de linhas rejeitadas
+                guardadas em `stats.errors`. Defaults to 100.
+        """
+        self.email_column = email_column
+        self.field_columns = (
+            [field_name(column) for column in field_columns]
+            if field_columns is not None
+            else None
+        )
+        self.delimiter = delimiter
+        self.stats = ReadStats(max_errors)
+        self._owns_source = False
+        self._lines = self._open(source, encoding)
+
+    @classmethod
+    def from_path(cls, path, **kwargs):
+        """Cria um leitor para um arquivo em disco.
+
+        O arquivo é fechado quando a iteração termina.
+        """
+        reader = cls(open(path, "rb"), **kwargs)
+        reader._owns_source = True
+        return reader
+
+    def _open(self, source, encoding):
+        """Converte a entrada em um iterável de linhas de texto."""
+        if isinstance(source, str):
+            return io.StringIO(source, newline="")
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        if isinstance(source, io.TextIOBase) or not hasattr(source, "read"):
+            return source
+        if encoding is None:
+            sample = source.read(SAMPLE_BYTES)
+            source.seek(0)
+            encoding = detect_encoding(sample)
+        self.stats.encoding = encoding
+        return io.TextIOWrapper(source, encoding=encoding, errors="replace", newline="")
+
+    def _detect_delimiter(self, sample):
+        """Detecta o separador de colunas a partir das primeiras linhas."""
+        if self.delimiter:
+            return self.delimiter
+        try:
+            return csv.Sniffer().sniff("".join(sample), delimiters=DELIMITERS).delimiter
+        except csv.Error:
+            return ","
+
+    def _resolve_columns(self, first_row):
+        """Decide se a primeira linha é cabeçalho e onde estão as colunas.
+
+        Returns:
+            tuple: `(tem_cabeçalho, índice do e-mail, [(índice, campo)])`. O
+                índice do e-mail é None se precisar ser detectado nos dados.
+        """
+        names = [field_name(cell) for cell in first_row]
+        column = self.email_column
+        if isinstance(column, int):
+            email_index = column
+            has_header = not any(normalize_email(cell) for cell in first_row)
+        elif column is not None:
+            column = field_name(column)
+            if column not in names:
+                raise ValueError(f"Coluna de e-mail não encontrada: {column}")
+            email_index = names.index(column)
+            has_header = True
+        else:
+            email_index = next(
+                (i for i, name in enumerate(names) if name in EMAIL_COLUMN_NAMES),
+                None,
+            )
+            has_header = email_index is not None or not any(
+                normalize_email(cell) for cell in first_row
+            )
+            if not has_header:
+                email_index = next(
+                    i for i, cell in enumerate(first_row) if normalize_email(cell)
+                )
+
+        fields = []
+        if has_header:
+            wanted = self.field_columns
+            if wanted is not None:
+                missing = [name for name in wanted if name not in names]
+                if missing:
+                    raise ValueError(
+                        f"Colunas não encontradas no CSV: {', '.join(missing)}"
+                    )
+            fields = [
+                (i, name)
+                for i, name in enumerate(names)
+                if name and i != email_index and (wanted is None or name in wanted)
+            ]
+        return has_header, email_index, fields
+
+    def __iter__(self):
+        stats = self.stats
+        started = time.perf_counter()
+        try:
+            lines = iter(self._lines)
+            sample = list(itertools.islice(lines, SAMPLE_LINES))
+            stats.delimiter = self._detect_delimiter(sample)
+            reader = csv.reader(
+                itertools.chain(sample, lines), delimiter=stats.delimiter
+            )
+
+            first_row = next((row for row in reader if row), None)
+            if first_row is None:
+                return
+            has_header, email_index, fields = self._resolve_columns(first_row)
+            rows = reader if has_header else itertools.chain([first_row], reader)
+
+            for row in rows:
+                if not row:
+                    continue
+                stats.rows += 1
+                line = reader.line_num
+                if email_index is None:
+                    # Cabeçalho sem coluna de e-mail conhecida: usa a primeira
+                    # coluna da primeira linha que contém um endereço.
+                    email_index = next(
+                        (i for i, cell in enumerate(row) if normalize_email(cell)),
+                        None,
+                    )
+                    if email_index is None:
+                        stats.add_error(line, "Nenhum e-mail válido na linha.")
+                        continue
+                    stats.email_column = email_index
+                    fields = [(i, name) for i, name in fields if i != email_index]
+                if email_index >= len(row):
+                    stats.add_error(line, "Coluna de e-mail ausente.")
+                    continue
+                email = normalize_email(row[email_index])
+                if email is None:
+                    stats.add_error(
+                        line, f"E-mail inválido: {row[email_index].strip()[:254]!r}"
+                    )
+                    continue
+                stats.recipients += 1
+                yield email, {
+                    name: row[i].strip() for i, name in fields if i < len(row)
+                }
+            if stats.email_column is None:
+                stats.email_column = email_index
+        except csv.Error as e:
+            raise ValueError(f"CSV inválido na linha {reader.line_num}: {e}") from e
+        finally:
+            stats.elapsed = time.perf_counter() - started
+            if self._owns_source:
+                self._lines.close()
+
+
+def _upsert_batch(batch, ids):
+    """Busca ou cria os destinatários de um lote, preenchendo `ids`."""
+    from . import db
+    from .models import Recipient
+
+    def fetch(emails):
+        query = db.session.query(Recipient.email, Recipient.id).filter(
+            Recipient.email.in_(emails)
+        )
+        ids.update(query)
+
+    for attempt in range(2):
+        fetch(batch)
+        missing = [email for email in batch if email not in ids]
+        if not missing:
+            return
+        try:
+            db.session.execute(insert(Recipient), [{"email": e} for e in missing])
+            db.session.commit()
+        except IntegrityError:
+            # Outro processo criou parte do lote concorrentemente; busca de novo.
+            db.session.rollback()
+            if attempt:
+                raise
+            continue
+        fetch(missing)
+        return
+
+
+def upsert_recipients(addresses):
+    """Busca ou cria os registros `Recipient` de uma lista de endereços.
+
+    Os endereços são processados em lotes de `UPSERT_BATCH_SIZE`: uma consulta
+    busca os existentes e uma única instrução insere os novos.
+
+    Args:
+        addresses (Iterable[str]): Os endereços, já normalizados.
+
+    Returns:
+        dict[str, int]: O ID do `Recipient` de cada endereço.
+    """
+    ids = {}
+    batch = []
+    for address in addresses:
+        batch.append(address)
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            _upsert_batch(batch, ids)
+            batch = []
+    if batch:
+        _upsert_batch(batch, ids)
+    return ids
@@ -0,0 +1,162 @@
+"""Agregados temporais de engajamento por campanha.
+
+Calcular aberturas e cliques ao longo do tempo diretamente a partir de
+`Open.opened_at` e `Click.clicked_at` exigiria varrer todos os eventos da
+campanha. Este módulo mantém, de forma incremental, contadores por campanha em
+intervalos (buckets) de um minuto e de uma hora, atualizados pelas rotas de
+rastreamento, e monta os histogramas servidos pela API de linha do tempo.
+
+- record_event: Incrementa os contadores dos buckets que contêm um evento.
+- timeline: Monta o histograma de uma campanha em uma resolução e intervalo.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+# Resoluções armazenadas na tabela de agregados.
+STORED_RESOLUTIONS = ("minute", "hour")
+
+# Resoluções aceitas pela API e a resolução armazenada de onde cada uma é lida.
+RESOLUTIONS = {
+    "minute": ("minute", timedelta(minutes=1)),
+    "hour": ("hour", timedelta(hours=1)),
+    "day": ("hour", timedelta(days=1)),
+}
+
+# Tipos de evento e a coluna de contador correspondente.
+EVENT_COLUMNS = {"opens": "opens", "clicks": "clicks"}
+
+
+def bucket_start(moment, resolution):
+    """Trunca um instante para o início do seu bucket.
+
+    Args:
+        moment (datetime): O instante a ser truncado.
+        resolution (str): `"minute"`, `"hour"` ou `"day"`.
+
+    Returns:
+        datetime: O início do bucket que contém `moment`.
+    """
+    if resolution == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Resolução desconhecida: {resolution}")
+
+
+def record_event(campaign_id, kind, moment):
+    """Incrementa os contadores de todos os buckets que contêm o evento.
+
+    Para cada resolução armazenada, tenta incrementar o bucket existente e, se
+    ele ainda não existir, o cria. Se outro processo criar o mesmo bucket
+    concorrentemente, o incremento é refeito sobre a linha criada.
+
+    Args:
+        campaign_id (int): O ID da campanha do evento.
+        kind (str): O tipo de evento (`"opens"` ou `"clicks"`).
+        moment (datetime): O instante do evento.
+    """
+    from . import db
+    from .models import EngagementRollup
+
+    column_name = EVENT_COLUMNS[kind]
+    column = getattr(EngagementRollup, column_name)
+    for attempt in range(2):
+        try:
+            for resolution in STORED_RESOLUTIONS:
+                start = bucket_start(moment, resolution)
+                result = db.session.execute(
+                    update(EngagementRollup)
+                    .where(
+                        EngagementRollup.campaign_id == campaign_id,
+                        EngagementRollup.resolution == resolution,
+                        EngagementRollup.bucket_start == start,
+                    )
+                    .values({column_name: column + 1})
+                )
+                if not result.rowcount:
+                    db.session.add(
+                        EngagementRollup(
+                            campaign_id=campaign_id,
+                            resolution=resolution,
+                            bucket_start=start,
+                            **{column_name: 1},
+                        )
+                    )
+                    db.session.flush()
+            db.session.commit()
+            return
+        except IntegrityError:
+            # Outro processo criou o bucket concorrentemente; refaz os incrementos.
+            db.session.rollback()
+            if attempt:
+                raise
+
+
+def timeline(campaign_id, resolution, start=None, end=None, max_buckets=None):
+    """Monta o histograma de engajamento de uma campanha.
+
+    Os buckets sem eventos entre o primeiro e o último bucket do intervalo são
+    preenchidos com zero, para que o resultado possa ser desenhado diretamente.
+
+    Args:
+        campaign_id (int): O ID da campanha.
+        resolution (str): Uma das chaves de `RESOLUTIONS`.
+        start (datetime, optional): Início do intervalo (inclusivo).
+        end (datetime, optional): Fim do intervalo (exclusivo).
+        max_buckets (int, optional): Quantidade máxima de buckets permitida no
+            resultado.
+
+    Returns:
+        list[dict]: Os buckets em ordem cronológica, cada um com `bucket`
+            (datetime), `opens` e `clicks`.
+
+    Raises:
+        ValueError: Se o histograma exceder `max_buckets`.
+    """
+    from . import db
+    from .models import EngagementRollup
+
+    stored_resolution, step = RESOLUTIONS[resolution]
+    query = db.session.query(
+        EngagementRollup.bucket_start,
+        EngagementRollup.opens,
+        EngagementRollup.clicks,
+    ).filter(
+        EngagementRollup.campaign_id == campaign_id,
+        EngagementRollup.resolution == stored_resolution,
+    )
+    if start is not None:
+        query = query.filter(
+            EngagementRollup.bucket_start >= bucket_start(start, stored_resolution)
+        )
+    if end is not None:
+        query = query.filter(EngagementRollup.bucket_start < end)
+
+    counts = {}
+    for moment, opens, clicks in query.order_by(EngagementRollup.bucket_start):
+        bucket = counts.setdefault(bucket_start(moment, resolution), [0, 0])
+        bucket[0] += opens
+        bucket[1] += clicks
+
+    if not counts:
+        return []
+
+    first = bucket_start(start, resolution) if start is not None else min(counts)
+    last = max(counts)
+    if max_buckets is not None and (last - first) / step >= max_buckets:
+        raise ValueError(
+            "Intervalo muito grande para a resolução escolhida; "
+            "use uma resolução maior ou um intervalo menor."
+        )
+    buckets = []
+    current = first
+    while current <= last:
+        opens, clicks = counts.get(current, (0, 0))
+        buckets.append({"bucket": current, "opens": opens, "clicks": clicks})
+        current += step
+    return buckets
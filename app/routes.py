@@ -4,22 +4,42 @@ Este módulo contém toda a lógica de roteamento da aplicação, incluindo:
 - Rotas para renderizar as páginas principais da interface do usuário (HTML).
 - Endpoints de API para operações de dados (JSON), como buscar campanhas e relatórios.
 - Endpoints de serviço, como o envio de e-mails e o salvamento de templates.
-- Rotas de rastreamento para registrar aberturas e cliques de e-mail.
+- Rotas de rastreamento para registrar aberturas e cliques de e-mail,
+  definidas em `app/tracking.py`.
 """
 
 import logging
-import bleach
-from flask import jsonify, make_response, request, redirect, render_template
+from flask import (
+    Response,
+    jsonify,
+    make_response,
+    request,
+    render_template,
+    stream_with_context,
+)
+from .cache import TTLCache
 from .email_utils import check_smtp_credentials, send_bulk_emails
-from .utils import sanitize_html, is_safe_url
-import base64
-import os
+from .profiling import PROFILER_KINDS
+from .sketches import SketchStore
+from .tracking import init_tracking_routes
+from . import (
+    metrics,
+    rollups,
+    send_queue,
+    suppression,
+    template_store,
+    tracing,
+)
+from .recipients import RecipientReader, normalize_email
+from .utils import sanitize_html, encode_cursor, decode_cursor
+import csv
+import hashlib
+import hmac
+import io
 import json
-import uuid
+from datetime import datetime, timezone
+from sqlalchemy import and_, func, or_
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
@@ -29,11 +49,11 @@ def init_routes(app):
     Args:
         app (Flask): A instância da aplicação Flask.
     """
-    # GIF transparente de 1x1 pixel, usado para rastrear aberturas de e-mail.
-    # É um método comum e eficaz para registrar quando um e-mail é visualizado.
-    PIXEL_GIF_DATA = base64.b64decode(
-        b"R0lGODlhAQABAIAAAP///wAAACH5BAEAAAAALAAAAAABAAEAAAICRAEAOw=="
-    )
+    # Rotas de rastreamento de aberturas e cliques (veja `app/tracking.py`).
+    init_tracking_routes(app)
+
+    # Sketches HyperLogLog por campanha, usados no modo aproximado dos relatórios.
+    sketch_store = SketchStore(precision=app.config.get("HLL_PRECISION", 12))
 
     @app.route("/")
     def index():
@@ -57,159 +77,284 @@ def init_routes(app):
         """
         return render_template("reports.html")
 
+    def parse_template_payload(data, partial=False):
+        """Valida e sanitiza o nome e o conteúdo de um template recebido.
+
+        Args:
+            data (dict): O corpo JSON da requisição.
+            partial (bool): Se True, os campos ausentes são permitidos (usado
+                na atualização).
+
+        Returns:
+            tuple: `(campos, erro)`, onde `campos` é um dicionário com `name`
+                e/ou `content` sanitizados e `erro` é uma mensagem ou None.
+        """
+        import bleach
+
+        if not isinstance(data, dict):
+            return None, "Dados inválidos."
+        if not partial and ("name" not in data or "content" not in data):
+            return None, "Dados inválidos."
+
+        fields = {}
+        if "name" in data:
+            fields["name"] = bleach.clean(str(data["name"])).strip()
+        if "content" in data:
+            fields["content"] = sanitize_html(str(data["content"]))
+        if not fields or not all(fields.values()):
+            return None, "Nome e conteúdo são obrigatórios."
+        return fields, None
+
+    # Listagem de templates serializada em memória (ver `TemplateListCache`).
+    templates_cache = template_store.TemplateListCache(
+        ttl=app.config.get("TEMPLATES_CACHE_TTL", 2)
+    )
+
     @app.route("/templates", methods=["GET"])
     def get_templates():
         """Endpoint da API para obter a lista de templates de e-mail salvos.
 
-        Lê os templates de um arquivo `templates.json`.
+        Retorna apenas os metadados de cada template (ID, nome e datas); o
+        conteúdo é obtido individualmente em `GET /templates/<id>`.
+
+        A resposta é servida a partir de um cache em memória com ETag,
+        reconstruído apenas quando a tabela de templates muda.
 
         Returns:
             Response: Uma resposta JSON contendo uma lista de objetos de template.
-                      Retorna uma lista vazia se o arquivo não existir.
         """
-        templates_filename = app.config.get("TEMPLATES_FILE_PATH", "templates.json")
-        templates_file = os.path.join(app.root_path, "..", templates_filename)
-        if not os.path.exists(templates_file):
-            return jsonify([])
-        with open(templates_file, "r") as f:
-            templates = json.load(f)
-        return jsonify(templates)
+        body, etag = templates_cache.get()
+        response = make_response(body)
+        response.mimetype = "application/json"
+        response.set_etag(etag)
+        response.headers.set("Cache-Control", "no-cache")
+        return response.make_conditional(request)
 
     @app.route("/templates", methods=["POST"])
     def save_template():
         """Endpoint da API para salvar um novo template de e-mail.
 
         Recebe o nome e o conteúdo do template via JSON, sanitiza os dados,
-        gera um ID único e o salva no arquivo `templates.json`.
+        gera um ID único e o salva no banco de dados.
 
         Returns:
             Response: Uma resposta JSON com status de sucesso ou erro.
         """
-        data = request.get_json()
-        if not data or "name" not in data or "content" not in data:
-            return jsonify({"status": "error", "message": "Dados inválidos."}), 400
-
-        name = bleach.clean(data["name"]).strip()
-        content = sanitize_html(data["content"])
-
-        if not name or not content:
-            return (
-                jsonify(
-                    {"status": "error", "message": "Nome e conteúdo são obrigatórios."}
-                ),
-                400,
-            )
-
-        new_template = {"id": str(uuid.uuid4()), "name": name, "content": content}
-
-        templates_filename = app.config.get("TEMPLATES_FILE_PATH", "templates.json")
-        templates_file = os.path.join(app.root_path, "..", templates_filename)
-        templates = []
-        if os.path.exists(templates_file):
-            with open(templates_file, "r") as f:
-                try:
-                    templates = json.load(f)
-                except json.JSONDecodeError:
-                    pass  # Trata o caso de arquivo vazio ou corrompido
+        fields, error = parse_template_payload(request.get_json(silent=True))
+        if error:
+            return jsonify({"status": "error", "message": error}), 400
 
-        templates.append(new_template)
-
-        with open(templates_file, "w") as f:
-            json.dump(templates, f, indent=4)
+        template = template_store.create_template(**fields)
+        templates_cache.invalidate()
 
         return (
             jsonify(
                 {
                     "status": "success",
                     "message": "Template salvo com sucesso!",
-                    "template": new_template,
+                    "template": template_store.to_dict(template),
                 }
             ),
             201,
         )
 
-    @app.route("/track/open/<email_id>")
-    def track_open(email_id):
-        """Endpoint de rastreamento de abertura de e-mail.
-
-        Quando o pixel de rastreamento em um e-mail é carregado, esta rota é
-        acionada. Ela registra um evento de `Open` no banco de dados para o
-        `email_id` correspondente.
+    @app.route("/templates/<template_id>", methods=["GET"])
+    def get_template(template_id):
+        """Endpoint da API para obter um template, incluindo o conteúdo.
 
         Args:
-            email_id (str): O ID único do e-mail que foi aberto.
+            template_id (str): O ID do template.
 
         Returns:
-            Response: Uma resposta de imagem GIF 1x1 com headers que desativam
-                      o cache.
+            Response: Uma resposta JSON com o template, ou 404 se não existir.
         """
-        from . import db
-        from .models import Email, Open
+        template = template_store.get_template(template_id)
+        if template is None:
+            return (
+                jsonify({"status": "error", "message": "Template não encontrado."}),
+                404,
+            )
+        return jsonify(template_store.to_dict(template))
+
+    @app.route("/templates/<template_id>", methods=["PUT"])
+    def update_template(template_id):
+        """Endpoint da API para atualizar o nome e/ou o conteúdo de um template.
 
-        email = db.session.get(Email, email_id)
-        if email:
-            new_open = Open(email_id=email.id)
-            db.session.add(new_open)
-            db.session.commit()
+        Args:
+            template_id (str): O ID do template.
 
-        response = make_response(PIXEL_GIF_DATA)
-        response.headers.set("Content-Type", "image/gif")
-        response.headers.set("Cache-Control", "no-cache, no-store, must-revalidate")
-        response.headers.set("Pragma", "no-cache")
-        response.headers.set("Expires", "0")
-        return response
+        Returns:
+            Response: Uma resposta JSON com o template atualizado, 400 se os
+                      dados forem inválidos ou 404 se o template não existir.
+        """
+        fields, error = parse_template_payload(
+            request.get_json(silent=True), partial=True
+        )
+        if error:
+            return jsonify({"status": "error", "message": error}), 400
 
-    @app.route("/track/click/<email_id>")
-    def track_click(email_id):
-        """Endpoint de rastreamento de clique em link.
+        template = template_store.update_template(template_id, **fields)
+        templates_cache.invalidate()
+        if template is None:
+            return (
+                jsonify({"status": "error", "message": "Template não encontrado."}),
+                404,
+            )
+        return jsonify(
+            {
+                "status": "success",
+                "message": "Template atualizado com sucesso!",
+                "template": template_store.to_dict(template),
+            }
+        )
 
-        Quando um link rastreável é clicado, esta rota registra um evento de
-        `Click` no banco de dados e redireciona o usuário para a URL original.
+    @app.route("/templates/<template_id>", methods=["DELETE"])
+    def delete_template(template_id):
+        """Endpoint da API para remover um template.
 
         Args:
-            email_id (str): O ID único do e-mail onde o clique ocorreu.
+            template_id (str): O ID do template.
 
         Returns:
-            Response: Um redirecionamento para a URL de destino original.
-                      Retorna um erro 400 se a URL não for fornecida ou for insegura.
+            Response: Uma resposta JSON de sucesso, ou 404 se não existir.
         """
-        from . import db
-        from .models import Email, Click
+        deleted = template_store.delete_template(template_id)
+        templates_cache.invalidate()
+        if not deleted:
+            return (
+                jsonify({"status": "error", "message": "Template não encontrado."}),
+                404,
+            )
+        return jsonify({"status": "success", "message": "Template removido."})
 
-        url = request.args.get("url")
-        if not url or not is_safe_url(url):
-            return "URL não fornecida ou insegura", 400
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Expõe as métricas da aplicação no formato de texto do Prometheus.
 
-        email = db.session.get(Email, email_id)
-        if email:
-            new_click = Click(email_id=email.id, url=url)
-            db.session.add(new_click)
-            db.session.commit()
+        Returns:
+            Response: As métricas de envio, rastreamento, banco de dados e
+                      SocketIO (veja `app/metrics.py`).
+        """
+        return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
 
-        return redirect(url)
+    # Cache de curta duração das páginas da listagem de campanhas. A chave
+    # inclui o maior ID de campanha no banco, então uma campanha criada por
+    # qualquer processo (outro worker ou `flask run-sender`) o invalida.
+    campaigns_cache = TTLCache(
+        maxsize=256, ttl=app.config.get("CAMPAIGNS_CACHE_TTL", 5)
+    )
 
     @app.route("/api/campaigns", methods=["GET"])
     def api_campaigns():
-        """Endpoint da API para listar todas as campanhas.
+        """Endpoint da API para listar as campanhas.
+
+        Retorna as campanhas ordenadas pela data de criação (mais recentes
+        primeiro), paginadas por keyset. Apenas as colunas exibidas são lidas;
+        o corpo da mensagem nunca é carregado. Quando há mais resultados, o
+        cursor da próxima página é informado no header `X-Next-Cursor` e em um
+        header `Link` com `rel="next"`.
+
+        As respostas possuem ETag e suportam requisições condicionais
+        (`If-None-Match`), e cada página é mantida em um cache de curta duração
+        invalidado quando uma nova campanha é criada, por este ou por outro
+        processo: a chave inclui o maior ID de campanha, lido pelo índice da
+        chave primária a cada requisição.
 
-        Retorna uma lista de todas as campanhas ordenadas pela data de criação.
+        Query Params:
+            limit (int): Quantidade de campanhas por página (padrão
+                `CAMPAIGNS_PAGE_SIZE`, máximo `CAMPAIGNS_MAX_PAGE_SIZE`).
+            cursor (str): Cursor retornado pela página anterior, opcional.
 
         Returns:
-            Response: Uma resposta JSON com a lista de campanhas.
+            Response: Uma resposta JSON com a lista de campanhas da página, ou
+                      um erro 400 se os parâmetros forem inválidos.
         """
+        from . import db
         from .models import Campaign
 
-        campaigns = Campaign.query.order_by(Campaign.created_at.desc()).all()
-        return jsonify(
-            [
-                {
-                    "id": c.id,
-                    "subject": c.subject,
-                    "created_at": c.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                }
-                for c in campaigns
-            ]
+        limit = request.args.get(
+            "limit", app.config.get("CAMPAIGNS_PAGE_SIZE", 100), type=int
         )
+        limit = min(limit, app.config.get("CAMPAIGNS_MAX_PAGE_SIZE", 500))
+        if limit <= 0:
+            return jsonify({"status": "error", "message": "Limite inválido."}), 400
+        cursor = request.args.get("cursor")
+
+        newest_id = db.session.query(func.max(Campaign.id)).scalar()
+        cache_key = (newest_id, cursor, limit)
+        page = campaigns_cache.get(cache_key)
+        if page is None:
+            query = db.session.query(Campaign.id, Campaign.subject, Campaign.created_at)
+            if cursor:
+                try:
+                    created_at, last_id = decode_cursor(cursor)
+                    created_at = datetime.fromisoformat(created_at)
+                    last_id = int(last_id)
+                except (TypeError, ValueError):
+                    return (
+                        jsonify({"status": "error", "message": "Cursor inválido."}),
+                        400,
+                    )
+                query = query.filter(
+                    or_(
+                        Campaign.created_at < created_at,
+                        and_(Campaign.created_at == created_at, Campaign.id < last_id),
+                    )
+                )
+            rows = (
+                query.order_by(Campaign.created_at.desc(), Campaign.id.desc())
+                .limit(limit + 1)
+                .all()
+            )
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            body = json.dumps(
+                [
+                    {
+                        "id": c.id,
+                        "subject": c.subject,
+                        "created_at": c.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    }
+                    for c in rows
+                ]
+            ).encode("utf-8")
+            next_cursor = (
+                encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+            )
+            etag = hashlib.sha1(body).hexdigest()
+            page = (body, etag, next_cursor)
+            campaigns_cache.set(cache_key, page)
+
+        body, etag, next_cursor = page
+        response = make_response(body)
+        response.mimetype = "application/json"
+        response.set_etag(etag)
+        response.headers.set("Cache-Control", "no-cache")
+        if next_cursor:
+            response.headers.set("X-Next-Cursor", next_cursor)
+            response.headers.set(
+                "Link",
+                f'<{request.path}?limit={limit}&cursor={next_cursor}>; rel="next"',
+            )
+        return response.make_conditional(request)
+
+    @app.route("/api/send_jobs/<int:job_id>", methods=["GET"])
+    def api_send_job(job_id):
+        """Retorna o estado de um envio da fila (`SENDER_MODE=queue`).
+
+        Args:
+            job_id (int): O ID retornado por `/send_email`.
+
+        Returns:
+            Response: `id`, `status` (`pending`, `running`, `done` ou
+                `failed`), o resultado do envio e as datas, ou 404.
+        """
+        status = send_queue.job_status(job_id)
+        if status is None:
+            return make_response(
+                jsonify({"status": "error", "message": "Envio não encontrado."}), 404
+            )
+        return jsonify(status)
 
     @app.route("/api/reports/<int:campaign_id>", methods=["GET"])
     def api_report(campaign_id):
@@ -218,6 +363,16 @@ def init_routes(app):
         Calcula as métricas da campanha, como total de envios, aberturas únicas,
         cliques únicos e as respectivas taxas.
 
+        Os valores únicos podem ser exatos (`COUNT(DISTINCT)` sobre os eventos)
+        ou aproximados, estimados a partir dos sketches HyperLogLog da campanha.
+        O modo padrão vem de `REPORT_UNIQUE_MODE` e pode ser escolhido por
+        requisição com o parâmetro `?mode=exact` ou `?mode=approx`. No modo
+        aproximado, a resposta informa `approximate` e o erro padrão relativo
+        (`error_bound`); campanhas sem sketch recaem na contagem exata.
+
+        A resposta inclui também o tempo gasto em cada etapa do envio
+        (`stage_timings`), da que mais consumiu tempo para a que menos consumiu.
+
         Args:
             campaign_id (int): O ID da campanha a ser analisada.
 
@@ -227,9 +382,21 @@ def init_routes(app):
         from . import db
         from .models import Campaign, Email, Open, Click
 
+        mode = request.args.get("mode", app.config.get("REPORT_UNIQUE_MODE", "exact"))
+        if mode not in ("exact", "approx"):
+            return (
+                jsonify({"status": "error", "message": "Modo de contagem inválido."}),
+                400,
+            )
+
         campaign = db.get_or_404(Campaign, campaign_id)
+        stage_timings = tracing.load_stage_timings(campaign_id)
 
-        total_sent = len(campaign.emails)
+        total_sent = (
+            db.session.query(func.count(Email.id))
+            .filter(Email.campaign_id == campaign_id)
+            .scalar()
+        )
         if total_sent == 0:
             return jsonify(
                 {
@@ -241,40 +408,469 @@ def init_routes(app):
                     "unique_clicks": 0,
                     "open_rate": "0.00%",
                     "click_rate": "0.00%",
+                    "approximate": False,
+                    "stage_timings": stage_timings,
                 }
             )
 
-        unique_opens = (
-            db.session.query(Open.email_id)
-            .distinct()
-            .join(Email)
-            .filter(Email.campaign_id == campaign_id)
-            .count()
-        )
-        unique_clicks = (
-            db.session.query(Click.email_id)
-            .distinct()
-            .join(Email)
-            .filter(Email.campaign_id == campaign_id)
-            .count()
-        )
+        def count_unique(model, kind):
+            """Conta os e-mails distintos com eventos, pelo modo escolhido."""
+            if mode == "approx":
+                sketch = sketch_store.load(campaign_id, kind)
+                if sketch is not None:
+                    return min(sketch.count(), total_sent), sketch.error_bound
+            exact = (
+                db.session.query(model.email_id)
+                .distinct()
+                .join(Email)
+                .filter(Email.campaign_id == campaign_id)
+                .count()
+            )
+            return exact, None
+
+        unique_opens, opens_error = count_unique(Open, "opens")
+        unique_clicks, clicks_error = count_unique(Click, "clicks")
 
         open_rate = (unique_opens / total_sent) * 100 if total_sent > 0 else 0
         click_rate = (unique_clicks / total_sent) * 100 if total_sent > 0 else 0
 
+        report = {
+            "campaign_id": campaign.id,
+            "subject": campaign.subject,
+            "created_at": campaign.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "total_sent": total_sent,
+            "unique_opens": unique_opens,
+            "unique_clicks": unique_clicks,
+            "open_rate": f"{open_rate:.2f}%",
+            "click_rate": f"{click_rate:.2f}%",
+            "approximate": opens_error is not None or clicks_error is not None,
+            "stage_timings": stage_timings,
+        }
+        if report["approximate"]:
+            report["error_bound"] = max(e for e in (opens_error, clicks_error) if e)
+        return jsonify(report)
+
+    # Colunas de cada linha da resposta de `/api/reports`.
+    REPORT_BATCH_COLUMNS = [
+        "campaign_id",
+        "subject",
+        "created_at",
+        "total_sent",
+        "unique_opens",
+        "unique_clicks",
+    ]
+
+    @app.route("/api/reports", methods=["GET"])
+    def api_reports():
+        """Endpoint da API para obter os relatórios de várias campanhas.
+
+        Calcula o total de envios e as aberturas e cliques únicos de todas as
+        campanhas pedidas com uma consulta agrupada por métrica (por
+        `campaign_id`), e não três consultas por campanha como
+        `/api/reports/<id>`. A resposta é compacta: uma lista `columns` com os
+        nomes dos campos e uma lista `rows` com uma lista de valores por
+        campanha. As taxas e o tempo de cada etapa do envio não são incluídos.
+
+        No modo aproximado (`?mode=approx`), os sketches de todas as campanhas
+        são lidos em uma consulta, e apenas as campanhas sem sketch são
+        contadas com `COUNT(DISTINCT)`.
+
+        Query Params:
+            ids (str): IDs das campanhas separados por vírgula, na ordem da
+                resposta.
+            recent (int): Alternativa a `ids`: as N campanhas mais recentes.
+            mode (str): `exact` ou `approx` (padrão `REPORT_UNIQUE_MODE`).
+
+        Returns:
+            Response: Uma resposta JSON com `columns`, `rows`, `approximate`
+                (e `error_bound`, se aproximado) e `missing`, os IDs pedidos
+                que não existem; ou 400 se os parâmetros forem inválidos.
+        """
+        from . import db
+        from .models import Campaign, Click, Email, Open
+
+        def error(message):
+            return jsonify({"status": "error", "message": message}), 400
+
+        mode = request.args.get("mode", app.config.get("REPORT_UNIQUE_MODE", "exact"))
+        if mode not in ("exact", "approx"):
+            return error("Modo de contagem inválido.")
+        max_campaigns = app.config.get("REPORTS_BATCH_MAX", 500)
+
+        query = db.session.query(Campaign.id, Campaign.subject, Campaign.created_at)
+        if ("ids" in request.args) == ("recent" in request.args):
+            return error("Informe 'ids' ou 'recent'.")
+        if "ids" in request.args:
+            try:
+                ids = [int(i) for i in request.args["ids"].split(",") if i.strip()]
+            except ValueError:
+                return error("IDs inválidos.")
+            ids = list(dict.fromkeys(ids))
+            if not ids or len(ids) > max_campaigns:
+                return error(f"Informe de 1 a {max_campaigns} IDs.")
+            by_id = {c.id: c for c in query.filter(Campaign.id.in_(ids))}
+            campaigns = [by_id[i] for i in ids if i in by_id]
+            missing = [i for i in ids if i not in by_id]
+        else:
+            recent = request.args.get("recent", type=int)
+            if not recent or not 0 < recent <= max_campaigns:
+                return error(f"'recent' deve estar entre 1 e {max_campaigns}.")
+            campaigns = (
+                query.order_by(Campaign.created_at.desc(), Campaign.id.desc())
+                .limit(recent)
+                .all()
+            )
+            missing = []
+
+        campaign_ids = [c.id for c in campaigns]
+        total_sent = {}
+        unique = {"opens": {}, "clicks": {}}
+        error_bound = None
+        if campaign_ids:
+            total_sent = dict(
+                db.session.query(Email.campaign_id, func.count(Email.id))
+                .filter(Email.campaign_id.in_(campaign_ids))
+                .group_by(Email.campaign_id)
+            )
+            for kind, model in (("opens", Open), ("clicks", Click)):
+                pending = campaign_ids
+                if mode == "approx":
+                    sketches = sketch_store.load_many(campaign_ids, kind)
+                    for campaign_id, sketch in sketches.items():
+                        unique[kind][campaign_id] = min(
+                            sketch.count(), total_sent.get(campaign_id, 0)
+                        )
+                        error_bound = max(error_bound or 0, sketch.error_bound)
+                    pending = [i for i in campaign_ids if i not in sketches]
+                if pending:
+                    unique[kind].update(
+                        db.session.query(
+                            Email.campaign_id, func.count(model.email_id.distinct())
+                        )
+                        .join(Email)
+                        .filter(Email.campaign_id.in_(pending))
+                        .group_by(Email.campaign_id)
+                    )
+
+        payload = {
+            "columns": REPORT_BATCH_COLUMNS,
+            "rows": [
+                [
+                    c.id,
+                    c.subject,
+                    c.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    total_sent.get(c.id, 0),
+                    unique["opens"].get(c.id, 0),
+                    unique["clicks"].get(c.id, 0),
+                ]
+                for c in campaigns
+            ],
+            "approximate": error_bound is not None,
+            "missing": missing,
+        }
+        if error_bound is not None:
+            payload["error_bound"] = error_bound
+        return jsonify(payload)
+
+    @app.route("/api/reports/<int:campaign_id>/links", methods=["GET"])
+    def api_report_links(campaign_id):
+        """Endpoint da API para obter os cliques por link de uma campanha.
+
+        Agrupa os cliques pelo ID do link, incluindo os links sem cliques.
+
+        Args:
+            campaign_id (int): O ID da campanha.
+
+        Returns:
+            Response: Uma resposta JSON com a lista de links da campanha, cada
+                      um com o total de cliques e de e-mails distintos que
+                      clicaram.
+        """
+        from . import db
+        from .models import Campaign, Click, Link
+
+        campaign = db.get_or_404(Campaign, campaign_id)
+
+        rows = (
+            db.session.query(
+                Link.id,
+                Link.url,
+                func.coalesce(func.sum(Click.hits), 0),
+                func.count(func.distinct(Click.email_id)),
+            )
+            .outerjoin(Click, Click.link_id == Link.id)
+            .filter(Link.campaign_id == campaign.id)
+            .group_by(Link.id, Link.url)
+            .order_by(Link.id)
+            .all()
+        )
         return jsonify(
             {
                 "campaign_id": campaign.id,
-                "subject": campaign.subject,
-                "created_at": campaign.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                "total_sent": total_sent,
-                "unique_opens": unique_opens,
-                "unique_clicks": unique_clicks,
-                "open_rate": f"{open_rate:.2f}%",
-                "click_rate": f"{click_rate:.2f}%",
+                "links": [
+                    {
+                        "link_id": link_id,
+                        "url": url,
+                        "clicks": clicks,
+                        "unique_clicks": unique_clicks,
+                    }
+                    for link_id, url, clicks, unique_clicks in rows
+                ],
+            }
+        )
+
+    @app.route("/api/reports/<int:campaign_id>/timeline", methods=["GET"])
+    def api_report_timeline(campaign_id):
+        """Endpoint da API para obter a linha do tempo de engajamento.
+
+        Serve histogramas de aberturas e cliques a partir dos agregados
+        temporais da campanha, sem consultar os eventos individuais.
+
+        Query Params:
+            resolution (str): `minute`, `hour` (padrão) ou `day`.
+            start (str): Início do intervalo em ISO 8601 (UTC), opcional.
+            end (str): Fim do intervalo em ISO 8601 (UTC, exclusivo), opcional.
+
+        Args:
+            campaign_id (int): O ID da campanha.
+
+        Returns:
+            Response: Uma resposta JSON com os buckets do histograma, ou um
+                      erro 400 se os parâmetros forem inválidos.
+        """
+        from . import db
+        from .models import Campaign
+
+        campaign = db.get_or_404(Campaign, campaign_id)
+
+        resolution = request.args.get("resolution", "hour")
+        if resolution not in rollups.RESOLUTIONS:
+            return (
+                jsonify({"status": "error", "message": "Resolução inválida."}),
+                400,
+            )
+
+        def parse_moment(value):
+            """Lê um instante ISO 8601; com fuso, converte para UTC sem fuso."""
+            if not value:
+                return None
+            moment = datetime.fromisoformat(value)
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+            return moment
+
+        try:
+            start = parse_moment(request.args.get("start"))
+            end = parse_moment(request.args.get("end"))
+        except ValueError:
+            return (
+                jsonify({"status": "error", "message": "Intervalo inválido."}),
+                400,
+            )
+
+        try:
+            buckets = rollups.timeline(
+                campaign.id,
+                resolution,
+                start=start,
+                end=end,
+                max_buckets=app.config.get("TIMELINE_MAX_BUCKETS", 5000),
+            )
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        return jsonify(
+            {
+                "campaign_id": campaign.id,
+                "resolution": resolution,
+                "buckets": [
+                    {
+                        "bucket": b["bucket"].strftime("%Y-%m-%d %H:%M:%S"),
+                        "opens": b["opens"],
+                        "clicks": b["clicks"],
+                    }
+                    for b in buckets
+                ],
+            }
+        )
+
+    @app.route("/api/recipients/<path:address>/history", methods=["GET"])
+    def api_recipient_history(address):
+        """Endpoint da API para obter o histórico de envios a um destinatário.
+
+        O destinatário é encontrado pelo índice único do endereço, e os seus
+        e-mails pelo índice de `Email.recipient_id`.
+
+        Query Params:
+            limit (int): Quantidade máxima de envios (padrão 100, máximo 1000).
+
+        Args:
+            address (str): O endereço de e-mail do destinatário.
+
+        Returns:
+            Response: Uma resposta JSON com os envios mais recentes primeiro,
+                      ou 404 se o destinatário não existir.
+        """
+        from . import db
+        from .models import Campaign, Click, Email, Open, Recipient
+
+        limit = request.args.get("limit", 100, type=int)
+        if limit is None or not 1 <= limit <= 1000:
+            return (
+                jsonify({"status": "error", "message": "Limite inválido."}),
+                400,
+            )
+
+        email = normalize_email(address)
+        recipient = (
+            db.session.query(Recipient).filter_by(email=email).one_or_none()
+            if email
+            else None
+        )
+        if recipient is None:
+            return (
+                jsonify({"status": "error", "message": "Destinatário não encontrado."}),
+                404,
+            )
+
+        opened = db.session.query(Open.id).filter(Open.email_id == Email.id).exists()
+        clicked = db.session.query(Click.id).filter(Click.email_id == Email.id).exists()
+        rows = (
+            db.session.query(
+                Email.campaign_id,
+                Campaign.subject,
+                Email.sent_at,
+                opened.label("opened"),
+                clicked.label("clicked"),
+            )
+            .join(Campaign, Campaign.id == Email.campaign_id)
+            .filter(Email.recipient_id == recipient.id)
+            .order_by(Email.sent_at.desc())
+            .limit(limit)
+            .all()
+        )
+        return jsonify(
+            {
+                "email": recipient.email,
+                "history": [
+                    {
+                        "campaign_id": row.campaign_id,
+                        "subject": row.subject,
+                        "sent_at": (
+                            row.sent_at.strftime("%Y-%m-%d %H:%M:%S")
+                            if row.sent_at
+                            else None
+                        ),
+                        "opened": bool(row.opened),
+                        "clicked": bool(row.clicked),
+                    }
+                    for row in rows
+                ],
             }
         )
 
+    @app.route("/api/suppressions", methods=["POST"])
+    def api_add_suppressions():
+        """Endpoint da API para incluir endereços na lista de supressão.
+
+        Aceita um JSON `{"emails": [...], "reason": "..."}` ou, para
+        importações em massa, um CSV no corpo da requisição
+        (`Content-Type: text/csv`), lido por `RecipientReader`, com o motivo
+        no parâmetro `reason`.
+
+        Returns:
+            Response: Uma resposta JSON com as quantidades de endereços
+                      incluídos, já existentes e inválidos, ou 400 se os dados
+                      forem inválidos.
+        """
+        if request.mimetype == "text/csv":
+            reason = request.args.get("reason", "manual")
+            reader = RecipientReader(request.get_data())
+            try:
+                emails = [email for email, _ in reader]
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            invalid_rows = reader.stats.error_count
+        else:
+            data = request.get_json(silent=True) or {}
+            reason = data.get("reason", "manual")
+            emails = data.get("emails")
+            if not isinstance(emails, list) or not all(
+                isinstance(email, str) for email in emails
+            ):
+                return (
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Informe a lista de e-mails em 'emails'.",
+                        }
+                    ),
+                    400,
+                )
+            invalid_rows = 0
+
+        import bleach
+
+        reason = bleach.clean(str(reason), tags=[], strip=True).strip()[:32]
+        result = suppression.suppress(emails, reason=reason or "manual")
+        result["invalid"] += invalid_rows
+        return jsonify({"status": "success", **result})
+
+    @app.route("/api/suppressions", methods=["GET"])
+    def api_export_suppressions():
+        """Endpoint da API para exportar a lista de supressão em CSV.
+
+        A resposta é gerada em streaming, sem carregar a lista em memória.
+
+        Returns:
+            Response: Um CSV com as colunas `email`, `reason` e `created_at`.
+        """
+
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["email", "reason", "created_at"])
+            for count, (email, reason, created_at) in enumerate(
+                suppression.iter_suppressions(), 1
+            ):
+                writer.writerow(
+                    [email, reason, created_at.strftime("%Y-%m-%d %H:%M:%S")]
+                )
+                if count % 1000 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="suppressions.csv"'},
+        )
+
+    @app.route("/api/suppressions/<path:email>", methods=["DELETE"])
+    def api_remove_suppression(email):
+        """Endpoint da API para remover um endereço da lista de supressão.
+
+        Args:
+            email (str): O endereço a ser removido.
+
+        Returns:
+            Response: Uma resposta JSON de sucesso, ou 404 se o endereço não
+                      estiver na lista.
+        """
+        if not suppression.unsuppress(email):
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "Endereço não encontrado na lista de supressão.",
+                    }
+                ),
+                404,
+            )
+        return jsonify({"status": "success", "message": "Endereço removido."})
+
     @app.route("/send_email", methods=["POST"])
     async def send_email():
         """Endpoint principal para iniciar o envio de uma campanha de e-mail.
@@ -300,6 +896,8 @@ def init_routes(app):
                 jsonify({"status": "error", "message": "Requisição inválida."}), 400
             )
 
+        import bleach
+
         data = request.get_json()
         subject = bleach.clean(data.get("subject", "")).strip()
         message = data.get("message", "")
@@ -314,22 +912,89 @@ def init_routes(app):
                 400,
             )
 
-        try:
-            result = await send_bulk_emails(
-                subject=subject,
-                cc=bleach.clean(data.get("cc", "")),
-                bcc=bleach.clean(data.get("bcc", "")),
-                message=message,
-                attachments=data.get("attachments", []),
-                base_url=request.host_url,
-                csv_content=csv_content,
-                manual_emails=manual_emails,
+        csv_fields = data.get("csvFields")
+        if csv_fields is not None and (
+            not isinstance(csv_fields, list)
+            or not all(isinstance(field, str) for field in csv_fields)
+        ):
+            return make_response(
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "csvFields deve ser uma lista de colunas.",
+                    }
+                ),
+                400,
             )
+
+        # Perfilamento desta campanha, permitido apenas com o token de
+        # administração (veja `app/profiling.py`).
+        profile = data.get("profile")
+        if profile:
+            admin_token = app.config.get("PROFILE_ADMIN_TOKEN")
+            if not admin_token or not hmac.compare_digest(
+                request.headers.get("X-Profile-Token", ""), admin_token
+            ):
+                return make_response(
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "Perfilamento não autorizado.",
+                        }
+                    ),
+                    403,
+                )
+            if profile is True:
+                profile = "sampling"
+            if profile not in PROFILER_KINDS:
+                return make_response(
+                    jsonify(
+                        {
+                            "status": "error",
+                            "message": "profile deve ser "
+                            + " ou ".join(PROFILER_KINDS)
+                            + ".",
+                        }
+                    ),
+                    400,
+                )
+
+        send_kwargs = dict(
+            subject=subject,
+            cc=bleach.clean(data.get("cc", "")),
+            bcc=bleach.clean(data.get("bcc", "")),
+            message=message,
+            attachments=data.get("attachments", []),
+            base_url=request.host_url,
+            csv_content=csv_content,
+            manual_emails=manual_emails,
+            csv_email_column=data.get("csvEmailColumn") or None,
+            csv_fields=csv_fields,
+            profile=profile or None,
+        )
+
+        # Com SENDER_MODE=queue, a campanha é executada pelo processo
+        # `flask run-sender`; o andamento é consultado em /api/send_jobs/<id>.
+        if app.config.get("SENDER_MODE") == "queue":
+            job_id = send_queue.enqueue(send_kwargs)
+            return make_response(
+                jsonify(
+                    {
+                        "status": "queued",
+                        "message": "Envio adicionado à fila.",
+                        "job_id": job_id,
+                    }
+                ),
+                202,
+            )
+
+        try:
+            result = await send_bulk_emails(**send_kwargs)
             status_code = 200 if result["status"] == "success" else 500
             return make_response(jsonify(result), status_code)
 
         except Exception as e:
-            logger.error(f"Erro na rota /send_email: {e}", exc_info=True)
+            logger.error("Erro na rota /send_email: %s", e, exc_info=True)
             return make_response(
                 jsonify({"status": "error", "message": "Erro interno no servidor."}),
                 500,
@@ -0,0 +1,217 @@
+"""Fila de envios executada por um processo separado.
+
+Com `SENDER_MODE=queue`, a rota `/send_email` não executa a campanha no
+processo web: ela grava os argumentos de `send_bulk_emails` em um `SendJob`
+e responde imediatamente. O processo `flask run-sender` retira os envios da
+fila, um por vez, e os executa. Assim, os workers do servidor web atendem o
+rastreamento e a API sem disputar CPU e event loop com o envio, e podem ser
+reiniciados sem interromper uma campanha.
+
+O progresso chega ao navegador pelo SocketIO; com o envio em outro processo,
+configure `SOCKETIO_MESSAGE_QUEUE` (por exemplo, um Redis) nos dois lados.
+
+- enqueue: Grava um envio na fila.
+- claim_next: Retira o próximo envio pendente.
+- run_job: Executa um envio retirado da fila.
+- recover_interrupted: Marca como falhos os envios interrompidos.
+- job_status: O estado de um envio, para a API.
+- run_sender: O laço do processo de envio.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+
+logger = logging.getLogger(__name__)
+
+# Estados de um `SendJob`.
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+# O payload de um envio terminado: os argumentos são descartados.
+EMPTY_PAYLOAD = "{}"
+
+
+def enqueue(kwargs):
+    """Grava um envio na fila.
+
+    Args:
+        kwargs (dict): Os argumentos de `send_bulk_emails`, serializáveis em
+            JSON.
+
+    Returns:
+        int: O ID do `SendJob` criado.
+    """
+    from . import db
+    from .models import SendJob
+
+    job = SendJob(status=PENDING, payload=json.dumps(kwargs))
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def claim_next():
+    """Retira o próximo envio pendente, do mais antigo ao mais recente.
+
+    A troca de estado é condicional (`WHERE status = 'pending'`), então dois
+    processos de envio nunca executam o mesmo envio.
+
+    Returns:
+        SendJob | None: O envio retirado, já marcado como `running`, ou None
+            se a fila estiver vazia.
+    """
+    from . import db
+    from .models import SendJob
+
+    while True:
+        job_id = (
+            db.session.query(SendJob.id)
+            .filter(SendJob.status == PENDING)
+            .order_by(SendJob.id)
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            update(SendJob)
+            .where(SendJob.id == job_id, SendJob.status == PENDING)
+            .values(status=RUNNING, started_at=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(SendJob, job_id)
+
+
+def run_job(job):
+    """Executa um envio retirado da fila e grava o resultado.
+
+    Ao terminar, os argumentos do envio (com o CSV e os anexos) são
+    descartados; apenas o resultado fica gravado.
+
+    Args:
+        job (SendJob): Um envio marcado como `running` por `claim_next`.
+
+    Returns:
+        dict: O resultado de `send_bulk_emails`.
+    """
+    from . import db
+    from .email_utils import send_bulk_emails
+
+    job_id, kwargs = job.id, json.loads(job.payload)
+    # O envio usa a sua própria thread de banco; a sessão desta thread não
+    # deve ficar com uma transação aberta durante a campanha.
+    db.session.commit()
+    logger.info("Iniciando o envio %s da fila.", job_id)
+    try:
+        result = asyncio.run(send_bulk_emails(**kwargs))
+    except Exception as e:
+        logger.error("Erro no envio %s da fila: %s", job_id, e, exc_info=True)
+        result = {"status": "error", "message": str(e)}
+    _finish(job_id, DONE if result.get("status") == "success" else FAILED, result)
+    return result
+
+
+def _finish(job_id, status, result):
+    from . import db
+    from .models import SendJob
+
+    # Os argumentos incluem o CSV e os anexos, que não são mais necessários
+    # depois do envio e ocupariam o banco indefinidamente.
+    db.session.execute(
+        update(SendJob)
+        .where(SendJob.id == job_id)
+        .values(
+            status=status,
+            payload=EMPTY_PAYLOAD,
+            result=json.dumps(result),
+            finished_at=datetime.utcnow(),
+        )
+    )
+    db.session.commit()
+
+
+def recover_interrupted():
+    """Marca como falhos os envios que ficaram `running`.
+
+    Um envio só fica `running` se o processo de envio terminou no meio dele.
+    Ele não é reexecutado automaticamente, porque parte dos e-mails pode já
+    ter sido entregue. Deve ser chamada quando nenhum processo de envio
+    estiver em execução.
+
+    Returns:
+        int: Quantos envios foram marcados.
+    """
+    from . import db
+    from .models import SendJob
+
+    result = {"status": "error", "message": "Envio interrompido."}
+    recovered = db.session.execute(
+        update(SendJob)
+        .where(SendJob.status == RUNNING)
+        .values(
+            status=FAILED,
+            payload=EMPTY_PAYLOAD,
+            result=json.dumps(result),
+            finished_at=datetime.utcnow(),
+        )
+    ).rowcount
+    db.session.commit()
+    return recovered
+
+
+def job_status(job_id):
+    """Retorna o estado de um envio da fila.
+
+    Args:
+        job_id (int): O ID do `SendJob`.
+
+    Returns:
+        dict | None: `id`, `status`, `result` e as datas do envio, ou None se
+            ele não existir.
+    """
+    from . import db
+    from .models import SendJob
+
+    job = db.session.get(SendJob, job_id)
+    if job is None:
+        return None
+    return {
+        "id": job.id,
+        "status": job.status,
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def run_sender(poll_interval=1.0, once=False):
+    """Executa os envios da fila, um por vez, até ser interrompido.
+
+    Deve ser chamada dentro de um contexto da aplicação.
+
+    Args:
+        poll_interval (float, optional): Espera, em segundos, entre consultas
+            à fila quando ela está vazia. Defaults to 1.0.
+        once (bool, optional): Termina quando a fila estiver vazia, em vez de
+            aguardar novos envios. Defaults to False.
+
+    Returns:
+        int: Quantos envios foram executados.
+    """
+    processed = 0
+    while True:
+        job = claim_next()
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
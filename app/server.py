@@ -0,0 +1,82 @@
+"""Execução da aplicação em produção (`flask serve`).
+
+O servidor de desenvolvimento do Werkzeug (`python main.py`) tem um único
+processo e atende o pixel de rastreamento, a API e os websockets do mesmo
+pool de threads. Em produção, a aplicação é executada pelo Gunicorn com
+workers assíncronos (gevent ou eventlet), que atendem milhares de conexões
+simultâneas por processo, ou com workers `gthread`.
+
+O envio das campanhas pode ficar em um processo próprio (`SENDER_MODE=queue`
+e `flask run-sender`, veja `app/send_queue.py`), para que uma campanha não
+dispute os workers web com o rastreamento.
+
+- WORKER_CLASSES: Os tipos de worker e o modo assíncrono do SocketIO de cada um.
+- gunicorn_command: Monta a linha de comando do Gunicorn.
+"""
+
+import importlib.util
+import os
+import sys
+
+# Tipo de worker do Gunicorn -> (pacote necessário, modo do SocketIO).
+WORKER_CLASSES = {
+    "gevent": ("gevent", "gevent"),
+    "eventlet": ("eventlet", "eventlet"),
+    "gthread": (None, "threading"),
+}
+
+
+def gunicorn_command(
+    host, port, workers, worker_class, threads=8, chdir=None, app_path="main:app"
+):
+    """Monta a linha de comando e o ambiente do Gunicorn.
+
+    Args:
+        host (str): O endereço em que o servidor escuta.
+        port (int): A porta do servidor.
+        workers (int): A quantidade de processos web.
+        worker_class (str): Um de `WORKER_CLASSES`.
+        threads (int, optional): Threads por processo (apenas `gthread`).
+        chdir (str, optional): O diretório de onde a aplicação é importada.
+        app_path (str, optional): O módulo e a variável da aplicação.
+
+    Returns:
+        tuple[list[str], dict]: Os argumentos (começando pelo executável) e as
+            variáveis de ambiente do processo.
+
+    Raises:
+        ValueError: Se o tipo de worker não existir.
+        RuntimeError: Se o Gunicorn ou o pacote do worker não estiver instalado.
+    """
+    if worker_class not in WORKER_CLASSES:
+        raise ValueError(
+            f"Worker desconhecido: {worker_class}. "
+            f"Use um de: {', '.join(WORKER_CLASSES)}."
+        )
+    package, async_mode = WORKER_CLASSES[worker_class]
+    for required in ("gunicorn", package):
+        if required and importlib.util.find_spec(required) is None:
+            raise RuntimeError(
+                f"O pacote {required} não está instalado. "
+                f"Instale-o com: pip install gunicorn {package or ''}".rstrip()
+            )
+
+    argv = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--bind",
+        f"{host}:{port}",
+        "--workers",
+        str(workers),
+        "--worker-class",
+        worker_class,
+    ]
+    if worker_class == "gthread":
+        argv += ["--threads", str(threads)]
+    if chdir:
+        argv += ["--chdir", chdir]
+    argv.append(app_path)
+
+    env = dict(os.environ, SOCKETIO_ASYNC_MODE=async_mode)
+    return argv, env
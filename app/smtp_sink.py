@@ -0,0 +1,112 @@
+"""Servidor SMTP local que aceita e descarta as mensagens recebidas.
+
+Usado para reenviar campanhas sem entregar e-mails de verdade (veja
+`flask replay-campaign`) e em testes. Implementa apenas o necessário para o
+`aiosmtplib`: EHLO/HELO, AUTH PLAIN/LOGIN (qualquer credencial é aceita),
+MAIL, RCPT, DATA, RSET, NOOP e QUIT. Não oferece STARTTLS.
+
+- SmtpSink: O servidor, usado como context manager assíncrono.
+"""
+
+import asyncio
+
+
+class SmtpSink:
+    """Um servidor SMTP em memória que apenas conta as mensagens recebidas.
+
+    Attributes:
+        host (str): O endereço em que o servidor escuta.
+        port (int): A porta do servidor (escolhida pelo sistema se 0).
+        messages (int): Quantidade de mensagens recebidas.
+
+    Example:
+        async with SmtpSink() as sink:
+            ...  # envia para sink.host:sink.port
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.messages = 0
+        self._server = None
+
+    async def start(self):
+        """Inicia o servidor."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Encerra o servidor."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _handle(self, reader, writer):
+        def reply(*lines):
+            *continued, last = lines
+            for line in continued:
+                writer.write(f"{line[:3]}-{line[4:]}\r\n".encode())
+            writer.write(f"{last}\r\n".encode())
+
+        reply("220 hyperxmail-sink ESMTP")
+        try:
+            while True:
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", "replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    reply("250 hyperxmail-sink", "250 AUTH PLAIN LOGIN", "250 8BITMIME")
+                elif verb == "HELO":
+                    reply("250 hyperxmail-sink")
+                elif verb == "AUTH":
+                    await self._authenticate(command, reader, writer, reply)
+                elif verb == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    self.messages += 1
+                    reply("250 OK: queued")
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    break
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    reply("250 OK")
+                else:
+                    reply("502 Command not implemented")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _authenticate(command, reader, writer, reply):
+        parts = command.split()
+        mechanism = parts[1].upper() if len(parts) > 1 else ""
+        if mechanism == "PLAIN" and len(parts) < 3:
+            reply("334 ")
+            await writer.drain()
+            await reader.readline()
+        elif mechanism == "LOGIN":
+            for prompt in ("VXNlcm5hbWU6", "UGFzc3dvcmQ6"):
+                if prompt == "VXNlcm5hbWU6" and len(parts) > 2:
+                    continue
+                reply(f"334 {prompt}")
+                await writer.drain()
+                await reader.readline()
+        elif mechanism != "PLAIN":
+            reply("504 Unrecognized authentication type")
+            return
+        reply("235 Authentication successful")
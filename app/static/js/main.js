@@ -165,13 +165,19 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    templateSelect.addEventListener('change', () => {
+    templateSelect.addEventListener('change', async () => {
         const selectedId = templateSelect.value;
         if (selectedId) {
-            const selectedTemplate = templates.find(t => t.id === selectedId);
-            if (selectedTemplate) {
+            try {
+                // A listagem traz apenas os metadados; o conteúdo é buscado sob demanda.
+                const response = await fetch(`/templates/${encodeURIComponent(selectedId)}`);
+                if (!response.ok) throw new Error('Falha ao carregar o template');
+                const selectedTemplate = await response.json();
                 tinymce.get('message').setContent(selectedTemplate.content);
                 log(`Template "${selectedTemplate.name}" carregado.`);
+            } catch (error) {
+                showStatus(error.message, false);
+                log(error.message, 'error');
             }
         }
     });
@@ -0,0 +1,193 @@
+"""Lista de supressão: endereços que não devem receber e-mails.
+
+Os endereços suprimidos (descadastros, bounces, reclamações) ficam na tabela
+`Suppression`, já normalizados por `normalize_email`. No início de cada
+campanha, a lista é carregada em memória (`SuppressionIndex`) e consultada na
+entrada dos destinatários, sem uma consulta ao banco por endereço.
+
+- suppress: Inclui endereços na lista, em lotes.
+- unsuppress: Remove um endereço da lista.
+- iter_suppressions: Percorre a lista inteira, para exportação.
+- SuppressionIndex: A lista carregada em memória para consultas rápidas.
+"""
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+
+from .recipients import normalize_email
+from .sketches import BloomFilter
+
+# Quantidade de endereços gravados por transação em `suppress`.
+BATCH_SIZE = 5000
+
+# Quantidade de linhas lidas por vez ao percorrer a tabela.
+YIELD_PER = 10000
+
+
+def _insert_batch(batch, reason):
+    """Grava os endereços de um lote que ainda não estão na lista.
+
+    Returns:
+        int: A quantidade de endereços incluídos.
+    """
+    from . import db
+    from .models import Suppression
+
+    for attempt in range(2):
+        existing = {
+            email
+            for (email,) in db.session.query(Suppression.email).filter(
+                Suppression.email.in_(batch)
+            )
+        }
+        rows = [{"email": email, "reason": reason} for email in batch - existing]
+        try:
+            if rows:
+                db.session.execute(insert(Suppression), rows)
+            db.session.commit()
+            return len(rows)
+        except IntegrityError:
+            # Outro processo incluiu parte do lote concorrentemente; refaz a
+            # verificação dos endereços existentes.
+            db.session.rollback()
+            if attempt:
+                raise
+
+
+def suppress(addresses, reason="manual"):
+    """Inclui endereços na lista de supressão.
+
+    Os endereços são normalizados e gravados em lotes; os que já estão na
+    lista são mantidos com o motivo original.
+
+    Args:
+        addresses (Iterable[str]): Os endereços a serem suprimidos.
+        reason (str, optional): O motivo da supressão. Defaults to "manual".
+
+    Returns:
+        dict: `added` (endereços incluídos), `existing` (já suprimidos) e
+            `invalid` (endereços inválidos).
+    """
+    added = existing = invalid = 0
+    batch = set()
+    for address in addresses:
+        email = normalize_email(address)
+        if email is None:
+            invalid += 1
+            continue
+        batch.add(email)
+        if len(batch) >= BATCH_SIZE:
+            inserted = _insert_batch(batch, reason)
+            added += inserted
+            existing += len(batch) - inserted
+            batch = set()
+    if batch:
+        inserted = _insert_batch(batch, reason)
+        added += inserted
+        existing += len(batch) - inserted
+    return {"added": added, "existing": existing, "invalid": invalid}
+
+
+def unsuppress(address):
+    """Remove um endereço da lista de supressão.
+
+    Args:
+        address (str): O endereço a ser removido.
+
+    Returns:
+        bool: True se o endereço estava na lista.
+    """
+    from . import db
+    from .models import Suppression
+
+    email = normalize_email(address)
+    if email is None:
+        return False
+    deleted = db.session.query(Suppression).filter_by(email=email).delete()
+    db.session.commit()
+    return deleted > 0
+
+
+def iter_suppressions():
+    """Percorre a lista de supressão em ordem de endereço, em blocos.
+
+    Yields:
+        tuple[str, str, datetime]: O endereço, o motivo e a data de inclusão.
+    """
+    from . import db
+    from .models import Suppression
+
+    query = (
+        db.session.query(Suppression.email, Suppression.reason, Suppression.created_at)
+        .order_by(Suppression.email)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    yield from query
+
+
+class SuppressionIndex:
+    """A lista de supressão carregada em memória.
+
+    Listas com até `set_max_entries` endereços são carregadas em um `set`,
+    com consultas exatas de dezenas de nanossegundos. Listas maiores são
+    carregadas em um `BloomFilter`, que ocupa poucos bytes por endereço; como
+    o filtro admite falsos positivos, um endereço encontrado nele é
+    confirmado no banco antes de ser considerado suprimido.
+
+    Attributes:
+        size (int): A quantidade de endereços carregados.
+        exact (bool): Se o índice é um `set` (True) ou um filtro de Bloom.
+    """
+
+    def __init__(self, emails, size, set_max_entries=1_000_000, error_rate=0.001):
+        """Carrega o índice.
+
+        Args:
+            emails (Iterable[str]): Os endereços suprimidos, normalizados.
+            size (int): A quantidade de endereços em `emails`.
+            set_max_entries (int, optional): O tamanho máximo da lista
+                carregada em um `set`.
+            error_rate (float, optional): A taxa de falsos positivos do filtro
+                de Bloom.
+        """
+        self.size = size
+        self.exact = size <= set_max_entries
+        if self.exact:
+            self._members = set(emails)
+        else:
+            self._members = BloomFilter(size, error_rate)
+            for email in emails:
+                self._members.add(email)
+
+    @classmethod
+    def load(cls, set_max_entries=1_000_000, error_rate=0.001):
+        """Carrega a lista de supressão do banco de dados.
+
+        Returns:
+            SuppressionIndex: O índice com todos os endereços suprimidos.
+        """
+        from . import db
+        from .models import Suppression
+
+        size = db.session.query(func.count(Suppression.email)).scalar()
+        emails = (
+            email
+            for (email,) in db.session.query(Suppression.email).execution_options(
+                yield_per=YIELD_PER
+            )
+        )
+        return cls(emails, size, set_max_entries, error_rate)
+
+    def __contains__(self, email):
+        """Verifica se um endereço normalizado está suprimido."""
+        if email not in self._members:
+            return False
+        if self.exact:
+            return True
+        from . import db
+        from .models import Suppression
+
+        return db.session.get(Suppression, email) is not None
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,261 @@
+"""Repositório de templates de e-mail.
+
+Os templates ficam na tabela `EmailTemplate`, o que torna as escritas atômicas
+e seguras entre requisições e processos concorrentes (cada operação é uma
+transação) e permite buscar um template pela chave primária sem ler os demais.
+A listagem lê apenas os metadados, nunca o conteúdo dos templates.
+
+- list_templates: Lista os templates sem o conteúdo.
+- get_template: Busca um template pelo ID.
+- create_template / update_template / delete_template: Operações de escrita.
+- import_templates_file: Importa um arquivo `templates.json` legado.
+- TemplateListCache: Cache da resposta da listagem, invalidado por alterações.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func
+
+
+def _summary(template):
+    """Serializa os metadados de um template (sem o conteúdo)."""
+    return {
+        "id": template.id,
+        "name": template.name,
+        "created_at": template.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "updated_at": template.updated_at.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def to_dict(template):
+    """Serializa um template completo, incluindo o conteúdo.
+
+    Args:
+        template (EmailTemplate): O template a ser serializado.
+
+    Returns:
+        dict: Os metadados e o conteúdo do template.
+    """
+    data = _summary(template)
+    data["content"] = template.content
+    return data
+
+
+def list_templates():
+    """Lista os templates salvos, do mais antigo para o mais recente.
+
+    Returns:
+        list[dict]: Os metadados de cada template, sem o conteúdo.
+    """
+    from . import db
+    from .models import EmailTemplate
+
+    rows = (
+        db.session.query(
+            EmailTemplate.id,
+            EmailTemplate.name,
+            EmailTemplate.created_at,
+            EmailTemplate.updated_at,
+        )
+        .order_by(EmailTemplate.created_at, EmailTemplate.id)
+        .all()
+    )
+    return [_summary(row) for row in rows]
+
+
+def get_template(template_id):
+    """Busca um template pelo ID.
+
+    Args:
+        template_id (str): O ID do template.
+
+    Returns:
+        EmailTemplate | None: O template, ou None se não existir.
+    """
+    from . import db
+    from .models import EmailTemplate
+
+    return db.session.get(EmailTemplate, template_id)
+
+
+def create_template(name, content, template_id=None):
+    """Cria um novo template.
+
+    Args:
+        name (str): O nome do template, já sanitizado.
+        content (str): O conteúdo HTML do template, já sanitizado.
+        template_id (str, optional): O ID a ser usado. Por padrão, um UUID novo.
+
+    Returns:
+        EmailTemplate: O template criado.
+    """
+    from . import db
+    from .models import EmailTemplate
+
+    template = EmailTemplate(
+        id=template_id or str(uuid.uuid4()), name=name, content=content
+    )
+    db.session.add(template)
+    db.session.commit()
+    return template
+
+
+def update_template(template_id, name=None, content=None):
+    """Atualiza o nome e/ou o conteúdo de um template.
+
+    Args:
+        template_id (str): O ID do template.
+        name (str, optional): O novo nome, já sanitizado.
+        content (str, optional): O novo conteúdo, já sanitizado.
+
+    Returns:
+        EmailTemplate | None: O template atualizado, ou None se não existir.
+    """
+    from . import db
+
+    template = get_template(template_id)
+    if template is None:
+        return None
+    if name is not None:
+        template.name = name
+    if content is not None:
+        template.content = content
+    template.updated_at = datetime.utcnow()
+    db.session.commit()
+    return template
+
+
+def delete_template(template_id):
+    """Remove um template.
+
+    Args:
+        template_id (str): O ID do template.
+
+    Returns:
+        bool: True se o template existia e foi removido.
+    """
+    from . import db
+    from .models import EmailTemplate
+
+    deleted = db.session.query(EmailTemplate).filter_by(id=template_id).delete()
+    db.session.commit()
+    return deleted > 0
+
+
+def import_templates_file(path):
+    """Importa os templates de um arquivo `templates.json` legado.
+
+    Templates cujo ID já existe no banco são ignorados, então a importação
+    pode ser repetida com segurança.
+
+    Args:
+        path (str): O caminho do arquivo JSON.
+
+    Returns:
+        int: A quantidade de templates importados.
+
+    Raises:
+        ValueError: Se o arquivo não contiver uma lista JSON válida de
+            objetos.
+    """
+    from . import db
+    from .models import EmailTemplate
+
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r") as f:
+        try:
+            templates = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Arquivo de templates inválido: {e}") from e
+    if not isinstance(templates, list):
+        raise ValueError("O arquivo de templates deve conter uma lista.")
+    for index, item in enumerate(templates, start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f"O item {index} do arquivo de templates não é um objeto.")
+
+    imported = 0
+    for item in templates:
+        template_id = item.get("id") or str(uuid.uuid4())
+        if db.session.get(EmailTemplate, template_id) is not None:
+            continue
+        db.session.add(
+            EmailTemplate(
+                id=template_id,
+                name=item.get("name", ""),
+                content=item.get("content", ""),
+            )
+        )
+        imported += 1
+    db.session.commit()
+    return imported
+
+
+def version_token():
+    """Calcula um token que muda sempre que a tabela de templates é alterada.
+
+    Criações e remoções alteram a contagem, e toda criação ou atualização
+    avança o maior `updated_at`, então o par identifica o estado da tabela
+    sem ler as linhas.
+
+    Returns:
+        tuple: `(quantidade, maior updated_at)`.
+    """
+    from . import db
+    from .models import EmailTemplate
+
+    count, last_update = db.session.query(
+        func.count(EmailTemplate.id), func.max(EmailTemplate.updated_at)
+    ).one()
+    return count, last_update
+
+
+class TemplateListCache:
+    """Cache, local ao processo, da resposta JSON da listagem de templates.
+
+    Mantém o corpo da resposta já serializado e o seu ETag. Durante `ttl`
+    segundos após a última verificação a leitura é apenas uma consulta à
+    memória; depois disso, o cache compara o `version_token()` da tabela e só
+    reconstrói a resposta se algo mudou, de modo que alterações feitas por
+    outros processos também são percebidas. Escritas feitas neste processo
+    devem chamar `invalidate()`.
+    """
+
+    def __init__(self, ttl=2, timer=time.monotonic):
+        self.ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entry = None  # (token, verificado_em, corpo, etag)
+
+    def get(self):
+        """Retorna a listagem serializada, reconstruindo-a se necessário.
+
+        Returns:
+            tuple[bytes, str]: O corpo JSON da resposta e o seu ETag.
+        """
+        now = self._timer()
+        entry = self._entry
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[2], entry[3]
+
+        token = version_token()
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == token:
+                self._entry = (token, now, entry[2], entry[3])
+                return entry[2], entry[3]
+            body = json.dumps(list_templates()).encode("utf-8")
+            etag = hashlib.sha1(body).hexdigest()
+            self._entry = (token, now, body, etag)
+            return body, etag
+
+    def invalidate(self):
+        """Descarta a listagem em cache."""
+        with self._lock:
+            self._entry = None
@@ -0,0 +1,90 @@
+"""Compilador de campos de mesclagem (merge fields) para mensagens de campanha.
+
+As mensagens podem conter campos no formato `{{first_name}}`, preenchidos com
+os valores de cada destinatário (por exemplo, as colunas extras do CSV). Para
+não reprocessar o HTML a cada e-mail, a mensagem é compilada uma única vez em
+uma sequência de trechos estáticos intercalados com lacunas (slots); a
+renderização de um destinatário apenas preenche as lacunas e junta os trechos.
+
+Os valores são escapados para HTML (incluindo aspas), pois são inseridos
+depois da sanitização da mensagem e podem aparecer tanto no texto quanto em
+valores de atributos.
+
+- FIELD_PATTERN: A expressão regular que reconhece um campo de mesclagem.
+- CompiledTemplate: Uma mensagem compilada, pronta para ser renderizada.
+- compile_template: Compila um texto em um `CompiledTemplate`.
+"""
+
+import html
+import re
+
+# Um campo de mesclagem: `{{ nome }}`, com espaços opcionais ao redor do nome.
+FIELD_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+class CompiledTemplate:
+    """Um texto dividido em trechos estáticos e lacunas nomeadas.
+
+    Attributes:
+        fields (frozenset[str]): Os nomes dos campos usados no texto.
+    """
+
+    def __init__(self, parts, slots):
+        """Inicializa o template compilado.
+
+        Args:
+            parts (list[str]): Os trechos do texto. As posições das lacunas
+                contêm strings vazias, substituídas na renderização.
+            slots (list[tuple[int, str]]): A posição de cada lacuna em `parts`
+                e o nome do campo que a preenche.
+        """
+        self._parts = parts
+        self._slots = slots
+        self.fields = frozenset(name for _, name in slots)
+
+    def render(self, values=None, escape=True):
+        """Renderiza o texto com os valores de um destinatário.
+
+        Args:
+            values (dict, optional): Os valores dos campos. Campos ausentes ou
+                com valor `None` são renderizados como texto vazio.
+            escape (bool, optional): Se os valores devem ser escapados para
+                HTML. Defaults to True.
+
+        Returns:
+            str: O texto renderizado.
+        """
+        if not self._slots:
+            return self._parts[0] if self._parts else ""
+        values = values or {}
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            value = values.get(name)
+            if value is None:
+                continue
+            value = str(value)
+            parts[index] = html.escape(value, quote=True) if escape else value
+        return "".join(parts)
+
+
+def compile_template(text):
+    """Compila um texto com campos de mesclagem.
+
+    Args:
+        text (str): O texto (normalmente HTML já sanitizado).
+
+    Returns:
+        CompiledTemplate: O texto compilado.
+    """
+    parts = []
+    slots = []
+    position = 0
+    for match in FIELD_PATTERN.finditer(text):
+        if match.start() > position:
+            parts.append(text[position : match.start()])
+        slots.append((len(parts), match.group(1)))
+        parts.append("")
+        position = match.end()
+    if position < len(text):
+        parts.append(text[position:])
+    return CompiledTemplate(parts, slots)
@@ -0,0 +1,341 @@
+"""Medição do tempo de cada etapa do envio de uma campanha.
+
+Quando uma campanha é lenta, é preciso saber se o tempo vai para o
+processamento do HTML (BeautifulSoup, bleach), a detecção de tipo dos anexos,
+o handshake TLS, o envio SMTP ou a pausa de `SECONDS_PER_EMAIL`. As etapas são
+delimitadas com `span("nome")`; as medições são agregadas no `CampaignTrace`
+ativo (contagem, soma e máximo por etapa), gravadas ao final do envio na
+tabela `CampaignStageTiming` e exibidas no relatório da campanha.
+
+Fora de uma campanha (nenhum trace ativo), `span()` não mede nada e custa
+apenas a leitura de uma `ContextVar`. O trace ativo é propagado pelo contexto
+da corrotina, então `send_email_task` não precisa recebê-lo como parâmetro.
+
+Opcionalmente, cada medição também é exportada como um span do OpenTelemetry
+para um arquivo no formato OTLP/JSON (`TRACING_EXPORT_PATH`), que pode ser
+lido offline, por exemplo pelo receiver `otlpjsonfile` do OpenTelemetry
+Collector.
+
+- CampaignTrace: Agrega as etapas de uma campanha e as exporta.
+- span: Mede um bloco como uma etapa do trace ativo.
+- record: Registra uma etapa medida externamente.
+- OtlpJsonFileExporter: Grava spans em um arquivo OTLP/JSON.
+- save_stage_timings / load_stage_timings: Persistência das etapas agregadas.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_trace = ContextVar("campaign_trace", default=None)
+_current_span_id = ContextVar("campaign_span_id", default=None)
+
+
+class _NoopSpan:
+    """Span usado quando não há trace ativo; não mede nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    """Mede um bloco e o registra no trace como uma etapa."""
+
+    __slots__ = ("_trace", "_name", "_attributes", "_span_id", "_token", "_start")
+
+    def __init__(self, trace, name, attributes):
+        self._trace = trace
+        self._name = name
+        self._attributes = attributes
+        self._span_id = None
+        self._token = None
+
+    def __enter__(self):
+        if self._trace.exporting:
+            self._span_id = os.urandom(8).hex()
+            self._token = _current_span_id.set(self._span_id)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._start
+        if self._token is not None:
+            _current_span_id.reset(self._token)
+        self._trace.record(self._name, seconds, self._span_id, self._attributes)
+        return False
+
+
+def span(name, **attributes):
+    """Mede um bloco como uma etapa do trace ativo.
+
+    Args:
+        name (str): O nome da etapa, por exemplo `"smtp.send"`.
+        **attributes: Atributos do span exportado (ignorados na agregação).
+
+    Returns:
+        Um context manager. Sem trace ativo, não mede nada.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attributes)
+
+
+def record(name, seconds, **attributes):
+    """Registra no trace ativo uma etapa medida externamente, terminada agora.
+
+    Args:
+        name (str): O nome da etapa.
+        seconds (float): A duração medida, em segundos.
+        **attributes: Atributos do span exportado.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        span_id = os.urandom(8).hex() if trace.exporting else None
+        trace.record(name, seconds, span_id, attributes)
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class OtlpJsonFileExporter:
+    """Grava spans em um arquivo no formato OTLP/JSON.
+
+    Cada chamada a `export` acrescenta uma linha com um
+    `ExportTraceServiceRequest` completo, o formato lido pelo receiver
+    `otlpjsonfile` do OpenTelemetry Collector.
+    """
+
+    def __init__(self, path, service_name="hyperxmail"):
+        """Inicializa o exportador.
+
+        Args:
+            path (str): O arquivo de destino. É criado se não existir.
+            service_name (str, optional): O `service.name` do recurso.
+        """
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        """Acrescenta os spans ao arquivo.
+
+        Args:
+            spans (list[dict]): Spans no formato OTLP/JSON.
+        """
+        if not spans:
+            return
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [_attribute("service.name", self.service_name)]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "hyperxmail.tracing"}, "spans": spans}
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(request, separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class CampaignTrace:
+    """As etapas medidas durante o envio de uma campanha.
+
+    Attributes:
+        campaign_id (int | None): A campanha medida.
+        stages (dict[str, list]): `[contagem, soma, máximo]` por etapa, com as
+            durações em segundos.
+        exporting (bool): Se os spans são exportados.
+    """
+
+    def __init__(self, campaign_id=None, exporter=None, batch_size=512):
+        """Inicializa o trace.
+
+        Args:
+            campaign_id (int, optional): A campanha medida.
+            exporter (OtlpJsonFileExporter, optional): Destino dos spans. Sem
+                exportador, as etapas são apenas agregadas.
+            batch_size (int, optional): Quantidade de spans acumulados antes
+                de cada gravação no exportador. Defaults to 512.
+        """
+        self.campaign_id = campaign_id
+        self.stages = {}
+        self.exporting = exporter is not None
+        self._exporter = exporter
+        self._batch_size = batch_size
+        self._spans = []
+        self.trace_id = os.urandom(16).hex() if self.exporting else None
+
+    def record(self, name, seconds, span_id=None, attributes=None):
+        """Agrega uma medição e, se houver exportador, a registra como span.
+
+        Args:
+            name (str): O nome da etapa.
+            seconds (float): A duração, em segundos.
+            span_id (str, optional): O ID do span exportado.
+            attributes (dict, optional): Os atributos do span exportado.
+        """
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = [1, seconds, seconds]
+        else:
+            stage[0] += 1
+            stage[1] += seconds
+            if seconds > stage[2]:
+                stage[2] = seconds
+        if self.exporting:
+            self._add_span(name, seconds, span_id, attributes)
+
+    def _add_span(self, name, seconds, span_id, attributes):
+        end = time.time_ns()
+        otlp_span = {
+            "traceId": self.trace_id,
+            "spanId": span_id or os.urandom(8).hex(),
+            "name": name,
+            "kind": 1,
+            "startTimeUnixNano": str(end - int(seconds * 1e9)),
+            "endTimeUnixNano": str(end),
+        }
+        parent_id = _current_span_id.get()
+        if parent_id is not None:
+            otlp_span["parentSpanId"] = parent_id
+        attributes = dict(attributes or {})
+        if self.campaign_id is not None:
+            attributes.setdefault("campaign.id", self.campaign_id)
+        otlp_span["attributes"] = [
+            _attribute(key, value) for key, value in attributes.items()
+        ]
+        self._spans.append(otlp_span)
+        if len(self._spans) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        """Grava no exportador os spans acumulados."""
+        if self._spans:
+            spans, self._spans = self._spans, []
+            self._exporter.export(spans)
+
+    @contextmanager
+    def activate(self):
+        """Torna este o trace ativo no contexto atual.
+
+        Os spans pendentes são gravados ao sair do bloco.
+        """
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+            if self.exporting:
+                self.flush()
+
+    def summary(self):
+        """Resume as etapas, da que consumiu mais tempo para a que consumiu menos.
+
+        Returns:
+            list[dict]: `stage`, `count`, `total_ms`, `avg_ms` e `max_ms` de
+                cada etapa.
+        """
+        return summarize(
+            (name, count, total, maximum)
+            for name, (count, total, maximum) in self.stages.items()
+        )
+
+
+def summarize(rows):
+    """Formata as etapas agregadas para os relatórios.
+
+    Args:
+        rows (iterable[tuple]): `(etapa, contagem, soma, máximo)`, com as
+            durações em segundos.
+
+    Returns:
+        list[dict]: As etapas ordenadas pelo tempo total, em milissegundos.
+    """
+    summary = [
+        {
+            "stage": name,
+            "count": count,
+            "total_ms": round(total * 1000, 3),
+            "avg_ms": round(total * 1000 / count, 3) if count else 0.0,
+            "max_ms": round(maximum * 1000, 3),
+        }
+        for name, count, total, maximum in rows
+    ]
+    summary.sort(key=lambda stage: stage["total_ms"], reverse=True)
+    return summary
+
+
+def save_stage_timings(campaign_id, stages):
+    """Grava as etapas agregadas de uma campanha.
+
+    Medições de uma etapa já gravada para a campanha são somadas às
+    existentes.
+
+    Args:
+        campaign_id (int): O ID da campanha.
+        stages (dict[str, list]): O atributo `stages` de um `CampaignTrace`.
+    """
+    from . import db
+    from .models import CampaignStageTiming
+
+    for name, (count, total, maximum) in stages.items():
+        timing = db.session.get(CampaignStageTiming, (campaign_id, name))
+        if timing is None:
+            db.session.add(
+                CampaignStageTiming(
+                    campaign_id=campaign_id,
+                    stage=name,
+                    count=count,
+                    total_seconds=total,
+                    max_seconds=maximum,
+                )
+            )
+        else:
+            timing.count += count
+            timing.total_seconds += total
+            timing.max_seconds = max(timing.max_seconds, maximum)
+    db.session.commit()
+
+
+def load_stage_timings(campaign_id):
+    """Lê as etapas agregadas de uma campanha.
+
+    Args:
+        campaign_id (int): O ID da campanha.
+
+    Returns:
+        list[dict]: As etapas no formato de `summarize`.
+    """
+    from . import db
+    from .models import CampaignStageTiming
+
+    rows = db.session.query(
+        CampaignStageTiming.stage,
+        CampaignStageTiming.count,
+        CampaignStageTiming.total_seconds,
+        CampaignStageTiming.max_seconds,
+    ).filter(CampaignStageTiming.campaign_id == campaign_id)
+    return summarize(rows)
@@ -0,0 +1,229 @@
+"""Rotas de rastreamento de aberturas e cliques.
+
+As rotas `/track/open/<token>` e `/track/click/<token>` recebem o maior volume
+de tráfego da aplicação (cada e-mail aberto carrega o pixel, às vezes várias
+vezes). Elas são registradas na aplicação completa por `init_routes` e, sem a
+interface, a API e o envio, na aplicação de rastreamento criada por
+`create_tracking_app`, que pode ser executada e escalada separadamente.
+
+Este módulo importa apenas os modelos e os módulos usados no rastreamento,
+para que os workers de rastreamento iniciem rapidamente.
+
+- init_tracking_routes: Registra as rotas de rastreamento em uma aplicação.
+"""
+
+import base64
+from datetime import datetime
+
+from flask import make_response, redirect, request
+from sqlalchemy import update
+
+from . import metrics, rollups
+from .cache import TTLCache
+from .sketches import SketchStore
+from .utils import is_safe_url
+
+
+def init_tracking_routes(app):
+    """Registra as rotas de rastreamento de aberturas e cliques.
+
+    Args:
+        app (Flask): A instância da aplicação Flask.
+    """
+    # GIF transparente de 1x1 pixel, usado para rastrear aberturas de e-mail.
+    # É um método comum e eficaz para registrar quando um e-mail é visualizado.
+    PIXEL_GIF_DATA = base64.b64decode(
+        b"R0lGODlhAQABAIAAAP///wAAACH5BAEAAAAALAAAAAABAAEAAAICRAEAOw=="
+    )
+
+    # Cache de deduplicação dos eventos de rastreamento. Clientes de e-mail e
+    # proxies costumam carregar o pixel várias vezes seguidas; o cache associa
+    # a chave do evento ao registro já gravado, de modo que acessos repetidos
+    # dentro da janela apenas incrementem o contador `hits` daquele registro.
+    dedupe_window = app.config.get("TRACKING_DEDUPE_WINDOW", 0)
+    tracking_dedupe = None
+    if dedupe_window > 0:
+        tracking_dedupe = TTLCache(
+            maxsize=app.config.get("TRACKING_DEDUPE_MAX_ENTRIES", 100_000),
+            ttl=dedupe_window,
+        )
+
+    def register_repeated_hit(key):
+        """Agrega um acesso repetido ao evento gravado recentemente, se houver.
+
+        Args:
+            key (tuple): A chave que identifica o evento de rastreamento.
+
+        Returns:
+            bool: True se o acesso foi agregado a um evento existente, False se
+                  um novo evento deve ser gravado.
+        """
+        if tracking_dedupe is None:
+            return False
+        event = tracking_dedupe.get(key)
+        if event is None:
+            return False
+
+        from . import db
+
+        model, event_id = event
+        result = db.session.execute(
+            update(model).where(model.id == event_id).values(hits=model.hits + 1)
+        )
+        db.session.commit()
+        return result.rowcount > 0
+
+    # Sketches HyperLogLog por campanha, alimentados a cada novo evento para o
+    # modo aproximado dos relatórios.
+    sketch_store = SketchStore(precision=app.config.get("HLL_PRECISION", 12))
+
+    # Cache dos links rastreáveis. Os links de uma campanha nunca mudam depois
+    # de registrados, então o redirecionamento dispensa consultas repetidas.
+    link_cache = TTLCache(maxsize=10_000, ttl=3600)
+
+    def get_link(link_id):
+        """Retorna `(campaign_id, url)` de um link, ou None se não existir."""
+        link = link_cache.get(link_id)
+        if link is None:
+            from . import db
+            from .models import Link
+
+            row = db.session.get(Link, link_id)
+            if row is None:
+                return None
+            link = (row.campaign_id, row.url)
+            link_cache.set(link_id, link)
+        return link
+
+    def get_email(token):
+        """Busca um e-mail pelo token público das URLs de rastreamento."""
+        from . import db
+        from .models import Email
+
+        return db.session.query(Email).filter_by(token=token).one_or_none()
+
+    def store_event(key, email, event, kind, moment):
+        """Grava um novo evento de rastreamento e atualiza os agregados.
+
+        Além de inserir o evento, registra-o no cache de deduplicação, no
+        sketch de valores únicos e nos agregados temporais da campanha.
+
+        Args:
+            key (tuple): A chave de deduplicação do evento.
+            email (Email): O e-mail ao qual o evento pertence.
+            event (Open | Click): O evento a ser gravado.
+            kind (str): O tipo de evento (`"opens"` ou `"clicks"`).
+            moment (datetime): O instante do evento.
+        """
+        from . import db
+
+        db.session.add(event)
+        db.session.commit()
+        if tracking_dedupe is not None:
+            tracking_dedupe.set(key, (type(event), event.id))
+        sketch_store.add(email.campaign_id, kind, email.token)
+        rollups.record_event(email.campaign_id, kind, moment)
+
+    @app.route("/track/open/<token>")
+    def track_open(token):
+        """Endpoint de rastreamento de abertura de e-mail.
+
+        Quando o pixel de rastreamento em um e-mail é carregado, esta rota é
+        acionada. Ela registra um evento de `Open` no banco de dados para o
+        e-mail com o `token` correspondente. Carregamentos repetidos dentro da
+        janela de deduplicação apenas incrementam o contador do evento já
+        gravado.
+
+        Args:
+            token (str): O token público do e-mail que foi aberto.
+
+        Returns:
+            Response: Uma resposta de imagem GIF 1x1 com headers que desativam
+                      o cache.
+        """
+        from .models import Open
+
+        event_key = ("open", token)
+        if register_repeated_hit(event_key):
+            metrics.TRACKING_HITS.labels("open", "repeated").inc()
+        else:
+            email = get_email(token)
+            if email:
+                now = datetime.utcnow()
+                new_open = Open(email_id=email.id, opened_at=now)
+                store_event(event_key, email, new_open, "opens", now)
+                metrics.TRACKING_HITS.labels("open", "recorded").inc()
+            else:
+                metrics.TRACKING_HITS.labels("open", "unknown").inc()
+
+        response = make_response(PIXEL_GIF_DATA)
+        response.headers.set("Content-Type", "image/gif")
+        response.headers.set("Cache-Control", "no-cache, no-store, must-revalidate")
+        response.headers.set("Pragma", "no-cache")
+        response.headers.set("Expires", "0")
+        return response
+
+    @app.route("/track/click/<token>")
+    def track_click(token):
+        """Endpoint de rastreamento de clique em link.
+
+        Quando um link rastreável é clicado, esta rota registra um evento de
+        `Click` no banco de dados e redireciona o usuário para a URL original.
+        Cliques repetidos no mesmo link dentro da janela de deduplicação apenas
+        incrementam o contador do evento já gravado.
+
+        O link é identificado pelo parâmetro `l` (ID do `Link` registrado na
+        preparação da campanha). URLs de rastreamento antigas, que carregam a
+        URL completa no parâmetro `url`, continuam aceitas desde que a URL seja
+        segura.
+
+        Args:
+            token (str): O token público do e-mail onde o clique ocorreu.
+
+        Returns:
+            Response: Um redirecionamento para a URL de destino original.
+                      Retorna um erro 400 se a URL não for fornecida ou for
+                      insegura, ou 404 se o link não existir.
+        """
+        from .models import Click
+
+        link_id = request.args.get("l", type=int)
+        if link_id is not None:
+            link = get_link(link_id)
+            if link is None:
+                return "Link não encontrado", 404
+            campaign_id, url = link
+            event_key = ("click", token, link_id)
+            if register_repeated_hit(event_key):
+                metrics.TRACKING_HITS.labels("click", "repeated").inc()
+            else:
+                email = get_email(token)
+                if email and email.campaign_id == campaign_id:
+                    now = datetime.utcnow()
+                    new_click = Click(
+                        email_id=email.id, link_id=link_id, clicked_at=now
+                    )
+                    store_event(event_key, email, new_click, "clicks", now)
+                    metrics.TRACKING_HITS.labels("click", "recorded").inc()
+                else:
+                    metrics.TRACKING_HITS.labels("click", "unknown").inc()
+            return redirect(url)
+
+        url = request.args.get("url")
+        if not url or not is_safe_url(url):
+            return "URL não fornecida ou insegura", 400
+
+        event_key = ("click", token, url)
+        if register_repeated_hit(event_key):
+            metrics.TRACKING_HITS.labels("click", "repeated").inc()
+        else:
+            email = get_email(token)
+            if email:
+                now = datetime.utcnow()
+                new_click = Click(email_id=email.id, url=url, clicked_at=now)
+                store_event(event_key, email, new_click, "clicks", now)
+                metrics.TRACKING_HITS.labels("click", "recorded").inc()
+            else:
+                metrics.TRACKING_HITS.labels("click", "unknown").inc()
+
+        return redirect(url)
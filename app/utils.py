@@ -1,5 +1,6 @@
-import bleach
-from bleach.css_sanitizer import CSSSanitizer
+import base64
+import json
+from datetime import datetime
 from urllib.parse import urlparse, urljoin
 from flask import request
 
@@ -19,6 +20,11 @@ def sanitize_html(html_content):
     Sanitizes HTML content to prevent XSS attacks, allowing a safe subset of tags and attributes
     suitable for rich text emails.
     """
+    # Imported here so that modules needing only `is_safe_url` (such as the
+    # tracking routes) do not load bleach and tinycss2.
+    import bleach
+    from bleach.css_sanitizer import CSSSanitizer
+
     allowed_tags = list(bleach.sanitizer.ALLOWED_TAGS) + [
         "p",
         "br",
@@ -68,3 +74,26 @@ def sanitize_html(html_content):
     )
 
     return sanitized_content
+
+
+def encode_cursor(*values):
+    """
+    Encodes the values of the last row of a page into an opaque, URL-safe
+    keyset pagination cursor.
+    """
+    payload = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by `encode_cursor` into a list of values.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,66 @@
+"""Benchmark da leitura de listas de destinatários em CSV.
+
+Gera um CSV com cabeçalho, campos entre aspas e algumas linhas inválidas, e o
+lê com `RecipientReader`, relatando a vazão (linhas por segundo) e o pico de
+memória do processo, que deve permanecer estável com o tamanho do arquivo.
+
+Uso:
+    python benchmarks/bench_csv.py [--rows 2000000] [--path lista.csv]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.recipients import RecipientReader  # noqa: E402
+
+
+def generate(path, rows):
+    """Grava um CSV de exemplo com `rows` linhas de dados."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write('"E-mail";"First Name";"Cidade"\n')
+        for i in range(rows):
+            email = f"pessoa{i}@example.com" if i % 100 else f"invalido-{i}"
+            f.write(f'{email};"Pessoa {i}";"São Paulo; SP"\n')
+
+
+def peak_memory_mb():
+    # ru_maxrss é informado em KiB no Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--path", help="Lê um CSV existente em vez de gerar um.")
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        generate(path, args.rows)
+    try:
+        before = peak_memory_mb()
+        reader = RecipientReader.from_path(path)
+        recipients = sum(1 for _ in reader)
+        stats = reader.stats
+    finally:
+        if args.path is None:
+            os.remove(path)
+
+    print(f"arquivo:        {stats.encoding}, separador {stats.delimiter!r}")
+    print(f"linhas:         {stats.rows:,}")
+    print(f"destinatários:  {recipients:,}")
+    print(f"rejeitadas:     {stats.error_count:,}")
+    print(f"tempo:          {stats.elapsed:.2f}s")
+    print(f"vazão:          {stats.rows_per_second:,.0f} linhas/s")
+    print(f"pico de memória: {peak_memory_mb():.1f} MiB (antes: {before:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Benchmark de escritas de rastreamento concorrentes durante um envio.
+
+Cria um banco SQLite temporário e executa, ao mesmo tempo, um "envio" (uma
+thread que grava um `Email` por vez, como o laço de `send_bulk_emails`) e
+várias threads que registram aberturas com os agregados de engajamento, como
+a rota de rastreamento. Relata a vazão de cada lado, a latência das escritas
+de rastreamento e quantas falharam com "database is locked".
+
+Compare o modo padrão do SQLite com os PRAGMAs da aplicação:
+
+    python benchmarks/bench_db_contention.py --journal-mode DELETE \\
+        --synchronous FULL --busy-timeout 0
+    python benchmarks/bench_db_contention.py
+
+Uso:
+    python benchmarks/bench_db_contention.py [--emails 2000] [--trackers 4]
+        [--journal-mode WAL] [--synchronous NORMAL] [--busy-timeout 5000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=2000)
+    parser.add_argument("--trackers", type=int, default=4)
+    parser.add_argument("--journal-mode", default="WAL")
+    parser.add_argument("--synchronous", default="NORMAL")
+    parser.add_argument("--busy-timeout", type=int, default=5000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    # A configuração é lida do ambiente na importação de `app.config`.
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ["SQLITE_JOURNAL_MODE"] = args.journal_mode
+    os.environ["SQLITE_SYNCHRONOUS"] = args.synchronous
+    os.environ["SQLITE_BUSY_TIMEOUT"] = str(args.busy_timeout)
+
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app, rollups
+    from app.models import Campaign, Email, Open, Recipient, db
+
+    app, _ = create_app()
+    with app.app_context():
+        db.create_all()
+        campaign = Campaign(subject="Benchmark", message="<p>Olá</p>")
+        recipient = Recipient(email="pessoa@example.com")
+        db.session.add_all([campaign, recipient])
+        db.session.commit()
+        campaign_id, recipient_id = campaign.id, recipient.id
+
+    sent_ids = []
+    sending = threading.Event()
+    sending.set()
+    sender_latencies = []
+    tracking_latencies = []
+    lock_errors = {"sender": 0, "tracking": 0}
+    results_lock = threading.Lock()
+
+    def sender():
+        try:
+            with app.app_context():
+                while len(sent_ids) < args.emails:
+                    started = time.perf_counter()
+                    db.session.add(
+                        Email(
+                            token=str(uuid.uuid4()),
+                            campaign_id=campaign_id,
+                            recipient_id=recipient_id,
+                        )
+                    )
+                    try:
+                        db.session.commit()
+                    except OperationalError:
+                        # O e-mail é gravado de novo na próxima iteração.
+                        db.session.rollback()
+                        with results_lock:
+                            lock_errors["sender"] += 1
+                        continue
+                    sender_latencies.append(time.perf_counter() - started)
+                    sent_ids.append(len(sent_ids) + 1)
+                db.session.remove()
+        finally:
+            sending.clear()
+
+    def tracker():
+        rng = random.Random()
+        with app.app_context():
+            while sending.is_set():
+                if not sent_ids:
+                    time.sleep(0.001)
+                    continue
+                email_id = rng.choice(sent_ids)
+                started = time.perf_counter()
+                try:
+                    now = datetime.utcnow()
+                    db.session.add(Open(email_id=email_id, opened_at=now))
+                    db.session.commit()
+                    rollups.record_event(campaign_id, "opens", now)
+                except OperationalError:
+                    db.session.rollback()
+                    with results_lock:
+                        lock_errors["tracking"] += 1
+                    continue
+                with results_lock:
+                    tracking_latencies.append(time.perf_counter() - started)
+            db.session.remove()
+
+    threads = [threading.Thread(target=sender)]
+    threads += [threading.Thread(target=tracker) for _ in range(args.trackers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        db.engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    print(
+        f"journal_mode={args.journal_mode} synchronous={args.synchronous} "
+        f"busy_timeout={args.busy_timeout}ms trackers={args.trackers}"
+    )
+    print(
+        f"envio: {args.emails} e-mails em {elapsed:.2f}s "
+        f"({args.emails / elapsed:,.0f}/s), "
+        f"p99 por e-mail {percentile(sender_latencies, 0.99) * 1000:.2f} ms, "
+        f"{lock_errors['sender']} falha(s) por bloqueio"
+    )
+    print(
+        f"rastreamento: {len(tracking_latencies)} escritas "
+        f"({len(tracking_latencies) / elapsed:,.0f}/s), "
+        f"p50 {statistics.median(tracking_latencies or [0]) * 1000:.2f} ms, "
+        f"p99 {percentile(tracking_latencies, 0.99) * 1000:.2f} ms, "
+        f"{lock_errors['tracking']} falha(s) por bloqueio"
+    )
+
+
+if __name__ == "__main__":
+    main()
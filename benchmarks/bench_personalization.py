@@ -0,0 +1,90 @@
+"""Benchmark da renderização personalizada de e-mails.
+
+Compara o custo por destinatário de processar a mensagem a cada e-mail (como
+fazia `send_email_task`) com o de processá-la uma única vez e apenas
+renderizar o template compilado. Não envia e-mails nem usa o banco de dados.
+
+Uso:
+    python benchmarks/bench_personalization.py [--recipients 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.email_utils import build_message, prepare_message  # noqa: E402
+
+BASE_URL = "http://localhost/"
+
+MESSAGE = (
+    "<h1>Olá, {{first_name}}!</h1>"
+    "<p>Temos novidades para você em {{city}}. "
+    '<a href="https://example.com/ofertas">Veja as ofertas</a>.</p>'
+    + "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>" * 20
+    + '<p><a href="https://example.com/descadastrar">Descadastrar</a></p>'
+)
+LINKS = {"https://example.com/ofertas": 1, "https://example.com/descadastrar": 2}
+
+
+def fields_for(i):
+    return {"first_name": f"Pessoa {i}", "city": "São Paulo & Região"}
+
+
+def bench_legacy(recipients):
+    """Processa a mensagem a cada destinatário."""
+    start = time.perf_counter()
+    for i in range(recipients):
+        prepared = prepare_message(MESSAGE, [], BASE_URL, LINKS)
+        prepared.render(f"email-{i}", fields_for(i))
+    return time.perf_counter() - start
+
+
+def bench_compiled(recipients, build=False):
+    """Processa a mensagem uma vez e renderiza cada destinatário."""
+    start = time.perf_counter()
+    prepared = prepare_message(MESSAGE, [], BASE_URL, LINKS)
+    for i in range(recipients):
+        html = prepared.render(f"email-{i}", fields_for(i))
+        if build:
+            build_message([f"p{i}@example.com"], "Assunto", "", "", html, prepared)
+    return time.perf_counter() - start
+
+
+def report(label, recipients, elapsed):
+    print(
+        f"{label:<32} {recipients:>8} e-mails  {elapsed:8.2f}s  "
+        f"{recipients / elapsed:>12,.0f} e-mails/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=100_000)
+    parser.add_argument(
+        "--legacy-sample",
+        type=int,
+        default=1_000,
+        help="Destinatários medidos no modo legado (o resultado é extrapolado).",
+    )
+    args = parser.parse_args()
+
+    sample = min(args.legacy_sample, args.recipients)
+    elapsed = bench_legacy(sample)
+    report("processamento por e-mail", sample, elapsed)
+    print(
+        f"{'':<32} {args.recipients:>8} e-mails  "
+        f"{elapsed * args.recipients / sample:8.2f}s  (extrapolado)"
+    )
+    report("template compilado", args.recipients, bench_compiled(args.recipients))
+    report(
+        "template compilado + MIME",
+        args.recipients,
+        bench_compiled(args.recipients, build=True),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Teste de carga das rotas de rastreamento de um servidor em execução.
+
+Dispara aberturas (`/track/open/<token>`) e cliques (`/track/click/<token>`)
+de várias conexões simultâneas contra um servidor já iniciado (por exemplo,
+com `flask serve`) e relata a vazão, a latência (p50/p95/p99) de cada rota
+e as respostas por código HTTP.
+
+Os tokens são lidos do mesmo banco de dados usado pelo servidor
+(`SQLALCHEMY_DATABASE_URI`). Com `--seed N`, uma campanha com N e-mails e um
+link é criada antes do teste. As rotas de rastreamento são isentas do limite
+de requisições por IP, a menos que `RATELIMIT_TRACKING` seja definido;
+respostas 429 aparecem no relatório.
+
+Uso:
+    flask serve --workers 2 &
+    python benchmarks/load_tracking.py --seed 1000 --concurrency 64 \\
+        --duration 30 [--url http://127.0.0.1:5000] [--click-ratio 0.2]
+"""
+
+import argparse
+import http.client
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def load_targets(seed, limit):
+    """Retorna os tokens de e-mail e os IDs de link usados no teste."""
+    from app import create_app
+    from app.models import Campaign, Email, Link, Recipient, db
+
+    app, _ = create_app()
+    with app.app_context():
+        if seed:
+            campaign = Campaign(subject="Teste de carga", message="<p>Olá</p>")
+            db.session.add(campaign)
+            db.session.flush()
+            db.session.add(Link(campaign_id=campaign.id, url="https://example.com/"))
+            for _ in range(seed):
+                recipient = Recipient(
+                    email=f"carga-{uuid.uuid4().hex[:12]}@example.com"
+                )
+                db.session.add(recipient)
+                db.session.flush()
+                db.session.add(
+                    Email(
+                        token=uuid.uuid4().hex,
+                        campaign_id=campaign.id,
+                        recipient_id=recipient.id,
+                    )
+                )
+            db.session.commit()
+        targets = (
+            db.session.query(Email.token, Link.id)
+            .outerjoin(Link, Link.campaign_id == Email.campaign_id)
+            .order_by(Email.id.desc())
+            .limit(limit)
+            .all()
+        )
+    return targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tokens", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--click-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    targets = load_targets(args.seed, args.tokens)
+    if not targets:
+        parser.error("Nenhum e-mail no banco de dados; use --seed N.")
+    clickable = [(token, link_id) for token, link_id in targets if link_id]
+
+    url = urlsplit(args.url)
+    latencies = {"open": [], "click": []}
+    statuses = Counter()
+    results_lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client():
+        rng = random.Random()
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80)
+        local = {"open": [], "click": []}
+        local_statuses = Counter()
+        while time.perf_counter() < deadline:
+            if clickable and rng.random() < args.click_ratio:
+                kind = "click"
+                token, link_id = rng.choice(clickable)
+                path = f"/track/click/{token}?l={link_id}"
+            else:
+                kind = "open"
+                path = f"/track/open/{rng.choice(targets)[0]}"
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                local_statuses[response.status] += 1
+            except (OSError, http.client.HTTPException):
+                local_statuses["erro de conexão"] += 1
+                connection.close()
+                connection = http.client.HTTPConnection(url.hostname, url.port or 80)
+                continue
+            local[kind].append(time.perf_counter() - started)
+        connection.close()
+        with results_lock:
+            for kind, values in local.items():
+                latencies[kind].extend(values)
+            statuses.update(local_statuses)
+
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(statuses.values())
+    print(
+        f"{total} requisições em {elapsed:.1f}s com {args.concurrency} conexões: "
+        f"{total / elapsed:.0f} req/s"
+    )
+    for kind, values in latencies.items():
+        if not values:
+            continue
+        print(
+            f"  {kind:<5} {len(values):>8} req  "
+            f"média {statistics.mean(values) * 1000:.1f} ms  "
+            f"p50 {percentile(values, 0.50) * 1000:.1f} ms  "
+            f"p95 {percentile(values, 0.95) * 1000:.1f} ms  "
+            f"p99 {percentile(values, 0.99) * 1000:.1f} ms"
+        )
+    print(
+        "  respostas: "
+        + ", ".join(f"{k}: {v}" for k, v in sorted(statuses.items(), key=str))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,9 @@ Para executar a aplicação:
 
 O servidor será iniciado em modo de depuração, escutando em todas as interfaces
 de rede (0.0.0.0) na porta 5000.
+
+Em produção, use `flask serve` (Gunicorn com workers assíncronos) e, com
+`SENDER_MODE=queue`, `flask run-sender` para o envio das campanhas.
 """
 import logging
 from app import create_app, socketio
@@ -0,0 +1,36 @@
+"""Add hit counters to tracking events.
+
+Revision ID: 3f9c2a7d41b8
+Revises: 0ba7eeec7a40
+Create Date: 2026-10-19 09:12:31.418207
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3f9c2a7d41b8"
+down_revision = "0ba7eeec7a40"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("open", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("hits", sa.Integer(), server_default="1", nullable=False)
+        )
+
+    with op.batch_alter_table("click", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("hits", sa.Integer(), server_default="1", nullable=False)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("click", schema=None) as batch_op:
+        batch_op.drop_column("hits")
+
+    with op.batch_alter_table("open", schema=None) as batch_op:
+        batch_op.drop_column("hits")
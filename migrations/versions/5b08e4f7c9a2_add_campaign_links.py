@@ -0,0 +1,59 @@
+"""Add link dimension table for click tracking.
+
+Revision ID: 5b08e4f7c9a2
+Revises: c27e5b90a1d4
+Create Date: 2026-10-19 13:48:19.730561
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5b08e4f7c9a2"
+down_revision = "c27e5b90a1d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "link",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.String(length=2048), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["campaign_id"],
+            ["campaign.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("link", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_link_campaign_id"), ["campaign_id"], unique=False
+        )
+
+    with op.batch_alter_table("click", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("link_id", sa.Integer(), nullable=True))
+        batch_op.alter_column(
+            "url", existing_type=sa.String(length=2048), nullable=True
+        )
+        batch_op.create_index(batch_op.f("ix_click_link_id"), ["link_id"], unique=False)
+        batch_op.create_foreign_key(
+            "fk_click_link_id_link", "link", ["link_id"], ["id"]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("click", schema=None) as batch_op:
+        batch_op.drop_constraint("fk_click_link_id_link", type_="foreignkey")
+        batch_op.drop_index(batch_op.f("ix_click_link_id"))
+        batch_op.alter_column(
+            "url", existing_type=sa.String(length=2048), nullable=False
+        )
+        batch_op.drop_column("link_id")
+
+    with op.batch_alter_table("link", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_link_campaign_id"))
+
+    op.drop_table("link")
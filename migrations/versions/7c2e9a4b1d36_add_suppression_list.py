@@ -0,0 +1,30 @@
+"""Add the suppression list.
+
+Revision ID: 7c2e9a4b1d36
+Revises: a4d7f1e38c50
+Create Date: 2026-10-19 17:02:41.518204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "7c2e9a4b1d36"
+down_revision = "a4d7f1e38c50"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "suppression",
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("reason", sa.String(length=32), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("email"),
+    )
+
+
+def downgrade():
+    op.drop_table("suppression")
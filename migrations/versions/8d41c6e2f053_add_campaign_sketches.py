@@ -0,0 +1,35 @@
+"""Add HyperLogLog sketches per campaign.
+
+Revision ID: 8d41c6e2f053
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-19 10:03:47.551902
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8d41c6e2f053"
+down_revision = "3f9c2a7d41b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "campaign_sketch",
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("registers", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["campaign_id"],
+            ["campaign.id"],
+        ),
+        sa.PrimaryKeyConstraint("campaign_id", "kind"),
+    )
+
+
+def downgrade():
+    op.drop_table("campaign_sketch")
@@ -0,0 +1,82 @@
+"""Store recipients once and reference them from email.
+
+Revision ID: 9e1f4c7a2b85
+Revises: 7c2e9a4b1d36
+Create Date: 2026-10-19 17:48:03.214977
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "9e1f4c7a2b85"
+down_revision = "7c2e9a4b1d36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "recipient",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+    )
+
+    # Um destinatário por endereço distinto (normalizado como nas versões
+    # atuais: sem espaços e em minúsculas), datado do primeiro envio.
+    op.execute("""
+        INSERT INTO recipient (email, created_at)
+        SELECT lower(trim(recipient)), coalesce(min(sent_at), CURRENT_TIMESTAMP)
+        FROM email
+        GROUP BY lower(trim(recipient))
+        """)
+
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("recipient_id", sa.Integer(), nullable=True))
+
+    op.execute("""
+        UPDATE email SET recipient_id = (
+            SELECT recipient.id FROM recipient
+            WHERE recipient.email = lower(trim(email.recipient))
+        )
+        """)
+
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.alter_column(
+            "recipient_id", existing_type=sa.Integer(), nullable=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_email_recipient_id"), ["recipient_id"], unique=False
+        )
+        batch_op.create_foreign_key(
+            "fk_email_recipient_id_recipient", "recipient", ["recipient_id"], ["id"]
+        )
+        batch_op.drop_column("recipient")
+
+
+def downgrade():
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("recipient", sa.String(length=255), nullable=True)
+        )
+
+    op.execute("""
+        UPDATE email SET recipient = (
+            SELECT recipient.email FROM recipient
+            WHERE recipient.id = email.recipient_id
+        )
+        """)
+
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.alter_column(
+            "recipient", existing_type=sa.String(length=255), nullable=False
+        )
+        batch_op.drop_constraint("fk_email_recipient_id_recipient", type_="foreignkey")
+        batch_op.drop_index(batch_op.f("ix_email_recipient_id"))
+        batch_op.drop_column("recipient_id")
+
+    op.drop_table("recipient")
@@ -0,0 +1,39 @@
+"""Move email templates into the database.
+
+Revision ID: a4d7f1e38c50
+Revises: e6a93d1f2b77
+Create Date: 2026-10-19 16:21:09.337120
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a4d7f1e38c50"
+down_revision = "e6a93d1f2b77"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "email_template",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("email_template", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_email_template_created_at"), ["created_at"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("email_template", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_email_template_created_at"))
+
+    op.drop_table("email_template")
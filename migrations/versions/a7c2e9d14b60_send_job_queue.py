@@ -0,0 +1,41 @@
+"""Add the send job queue table.
+
+Revision ID: a7c2e9d14b60
+Revises: f51c8e3a9d26
+Create Date: 2026-10-19 21:14:07.330512
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a7c2e9d14b60"
+down_revision = "f51c8e3a9d26"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "send_job",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("result", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("send_job", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_send_job_status"), ["status"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("send_job", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_send_job_status"))
+
+    op.drop_table("send_job")
@@ -0,0 +1,36 @@
+"""Add time-bucketed engagement rollups.
+
+Revision ID: c27e5b90a1d4
+Revises: 8d41c6e2f053
+Create Date: 2026-10-19 11:27:05.204413
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c27e5b90a1d4"
+down_revision = "8d41c6e2f053"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "engagement_rollup",
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("resolution", sa.String(length=8), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("opens", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("clicks", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(
+            ["campaign_id"],
+            ["campaign.id"],
+        ),
+        sa.PrimaryKeyConstraint("campaign_id", "resolution", "bucket_start"),
+    )
+
+
+def downgrade():
+    op.drop_table("engagement_rollup")
@@ -0,0 +1,146 @@
+"""Use an integer primary key for email and keep the UUID as a public token.
+
+Revision ID: d3b8f6a1c472
+Revises: 9e1f4c7a2b85
+Create Date: 2026-10-19 18:31:57.402118
+
+The existing UUIDs become `email.token`, so tracking URLs in emails that were
+already sent keep working. New integer ids are assigned in `sent_at` order
+through a temporary mapping table, and `open.email_id` / `click.email_id` are
+rewritten to reference them.
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "d3b8f6a1c472"
+down_revision = "9e1f4c7a2b85"
+branch_labels = None
+depends_on = None
+
+EVENT_TABLES = ("open", "click")
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade():
+    op.create_table(
+        "email_id_map",
+        sa.Column("old_id", sa.String(length=36), nullable=False),
+        sa.Column("new_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("old_id"),
+    )
+    op.execute("""
+        INSERT INTO email_id_map (old_id, new_id)
+        SELECT id, row_number() OVER (ORDER BY sent_at, id) FROM email
+        """)
+
+    # Grava o novo ID do e-mail nos eventos e remove a coluna antiga. Remover
+    # a coluna remove também a chave estrangeira sem nome para `email.id`,
+    # que vai mudar de tipo: o PostgreSQL descarta as restrições da coluna, e
+    # o modo em lote do SQLite recria a tabela sem ela.
+    for table in EVENT_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column("new_email_id", sa.Integer(), nullable=True))
+        op.execute(f"""
+            UPDATE "{table}" SET new_email_id = (
+                SELECT new_id FROM email_id_map WHERE old_id = "{table}".email_id
+            )
+            """)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column("email_id")
+
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("token", sa.String(length=36), nullable=True))
+        batch_op.add_column(sa.Column("new_id", sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE email SET token = id, new_id = (
+            SELECT new_id FROM email_id_map WHERE old_id = email.id
+        )
+        """)
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.drop_column("id")
+        batch_op.alter_column(
+            "new_id",
+            new_column_name="id",
+            existing_type=sa.Integer(),
+            nullable=False,
+        )
+        batch_op.alter_column(
+            "token", existing_type=sa.String(length=36), nullable=False
+        )
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.create_primary_key("pk_email", ["id"])
+        batch_op.create_unique_constraint("uq_email_token", ["token"])
+
+    if _is_postgresql():
+        op.execute("CREATE SEQUENCE email_id_seq OWNED BY email.id")
+        op.execute(
+            "SELECT setval('email_id_seq', coalesce((SELECT max(id) FROM email), 0) + 1, false)"
+        )
+        op.execute(
+            "ALTER TABLE email ALTER COLUMN id SET DEFAULT nextval('email_id_seq')"
+        )
+
+    for table in EVENT_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(
+                "new_email_id",
+                new_column_name="email_id",
+                existing_type=sa.Integer(),
+                nullable=False,
+            )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(
+                batch_op.f(f"ix_{table}_email_id"), ["email_id"], unique=False
+            )
+            batch_op.create_foreign_key(
+                f"fk_{table}_email_id_email", "email", ["email_id"], ["id"]
+            )
+
+    op.drop_table("email_id_map")
+
+
+def downgrade():
+    for table in EVENT_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column("old_email_id", sa.String(length=36), nullable=True)
+            )
+        op.execute(f"""
+            UPDATE "{table}" SET old_email_id = (
+                SELECT token FROM email WHERE email.id = "{table}".email_id
+            )
+            """)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f"fk_{table}_email_id_email", type_="foreignkey")
+            batch_op.drop_index(batch_op.f(f"ix_{table}_email_id"))
+            batch_op.drop_column("email_id")
+
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.drop_constraint("uq_email_token", type_="unique")
+        batch_op.drop_column("id")
+        batch_op.alter_column(
+            "token",
+            new_column_name="id",
+            existing_type=sa.String(length=36),
+            nullable=False,
+        )
+    with op.batch_alter_table("email", schema=None) as batch_op:
+        batch_op.create_primary_key("pk_email", ["id"])
+
+    for table in EVENT_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(
+                "old_email_id",
+                new_column_name="email_id",
+                existing_type=sa.String(length=36),
+                nullable=False,
+            )
+            batch_op.create_foreign_key(
+                f"fk_{table}_email_id_email", "email", ["email_id"], ["id"]
+            )
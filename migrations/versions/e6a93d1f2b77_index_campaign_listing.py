@@ -0,0 +1,28 @@
+"""Index campaigns for keyset pagination.
+
+Revision ID: e6a93d1f2b77
+Revises: 5b08e4f7c9a2
+Create Date: 2026-10-19 15:02:44.918306
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "e6a93d1f2b77"
+down_revision = "5b08e4f7c9a2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("campaign", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_campaign_created_at_id", ["created_at", "id"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("campaign", schema=None) as batch_op:
+        batch_op.drop_index("ix_campaign_created_at_id")
@@ -0,0 +1,36 @@
+"""Add per-campaign send stage timings.
+
+Revision ID: f51c8e3a9d26
+Revises: d3b8f6a1c472
+Create Date: 2026-10-19 20:02:41.518230
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f51c8e3a9d26"
+down_revision = "d3b8f6a1c472"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "campaign_stage_timing",
+        sa.Column("campaign_id", sa.Integer(), nullable=False),
+        sa.Column("stage", sa.String(length=64), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total_seconds", sa.Float(), nullable=False),
+        sa.Column("max_seconds", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["campaign_id"],
+            ["campaign.id"],
+        ),
+        sa.PrimaryKeyConstraint("campaign_id", "stage"),
+    )
+
+
+def downgrade():
+    op.drop_table("campaign_stage_timing")
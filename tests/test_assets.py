@@ -0,0 +1,118 @@
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+from app import assets, create_app
+from app.assets import IMMUTABLE_CACHE_CONTROL, StaticAssets
+
+
+class StaticAssetsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        with open(os.path.join(self.app.static_folder, "js", "main.js"), "rb") as f:
+            self.main_js = f.read()
+
+    def _asset_urls(self):
+        return re.findall(r'"(/static/[^"]+)"', self.client.get("/").text)
+
+    def test_pages_link_to_fingerprinted_files(self):
+        urls = self._asset_urls()
+        self.assertEqual(len(urls), 2)
+        for url in urls:
+            self.assertRegex(
+                url, r"^/static/(css/style|js/main)\.[0-9a-f]{12}\.(css|js)$"
+            )
+
+    def test_fingerprinted_files_are_served_compressed_and_immutable(self):
+        url = next(url for url in self._asset_urls() if url.endswith(".js"))
+
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.content_encoding, "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(response.mimetype, "text/javascript")
+        self.assertEqual(gzip.decompress(response.data), self.main_js)
+
+        plain = self.client.get(url)
+        self.assertIsNone(plain.content_encoding)
+        self.assertEqual(plain.data, self.main_js)
+        self.assertNotEqual(plain.headers["ETag"], response.headers["ETag"])
+
+        cached = self.client.get(
+            url,
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": response.headers["ETag"],
+            },
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_original_names_are_still_served_from_disk(self):
+        response = self.client.get("/static/js/main.js")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("immutable", response.headers.get("Cache-Control", ""))
+        response.close()
+        self.assertEqual(self.client.get("/static/js/none.js").status_code, 404)
+
+    def test_fingerprinting_can_be_disabled(self):
+        app, _ = create_app(testing=True, config={"STATIC_FINGERPRINT": False})
+        html = app.test_client().get("/").text
+        self.assertIn('"/static/js/main.js"', html)
+
+
+class StaticAssetsBuildTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.folder, "css"))
+        self._write("css/site.css", b"body { color: red; }\n" * 100)
+        self._write("tiny.css", b"p{}")
+        self._write("logo.png", b"\x89PNG" + bytes(1000))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, name, data):
+        with open(os.path.join(self.folder, name), "wb") as f:
+            f.write(data)
+
+    def test_only_large_text_files_get_compressed_variants(self):
+        static = StaticAssets(self.folder)
+        self.assertEqual(len(static), 3)
+
+        site = static.get(static.url_filename("css/site.css"))
+        self.assertIn("gzip", site.variants)
+        self.assertLess(len(site.variants["gzip"]), len(site.variants["identity"]))
+        self.assertEqual(
+            set(static.get(static.url_filename("tiny.css")).variants), {"identity"}
+        )
+        self.assertEqual(
+            set(static.get(static.url_filename("logo.png")).variants), {"identity"}
+        )
+        self.assertEqual(static.url_filename("missing.css"), "missing.css")
+
+    def test_fingerprint_changes_with_the_content(self):
+        before = StaticAssets(self.folder).url_filename("css/site.css")
+        self._write("css/site.css", b"body { color: blue; }\n" * 100)
+        after = StaticAssets(self.folder).url_filename("css/site.css")
+        self.assertNotEqual(before, after)
+
+    @unittest.skipIf(assets.brotli is None, "Brotli não instalado")
+    def test_brotli_is_preferred_when_accepted(self):
+        app = Flask(__name__, static_folder=self.folder)
+        app.config["STATIC_FINGERPRINT"] = True
+        static = assets.init_static_assets(app)
+        url = "/static/" + static.url_filename("css/site.css")
+
+        response = app.test_client().get(url, headers={"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response.content_encoding, "br")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -119,6 +119,7 @@ class TemplateSavingBugTest(unittest.TestCase):
         self.client = self.app.test_client()
         self.app_context = self.app.app_context()
         self.app_context.push()
+        db.create_all()
         # Define a path for a temporary templates file and ensure it's clean
         self.templates_file_path = self.app.config["TEMPLATES_FILE_PATH"]
         if os.path.exists(self.templates_file_path):
@@ -128,6 +129,8 @@ class TemplateSavingBugTest(unittest.TestCase):
         # Clean up the temporary templates file
         if os.path.exists(self.templates_file_path):
             os.remove(self.templates_file_path)
+        db.session.remove()
+        db.drop_all()
         self.app_context.pop()
 
     def test_saving_template_strips_html_tags(self):
@@ -156,12 +159,12 @@ class TemplateSavingBugTest(unittest.TestCase):
         # Assert: Check the response and the file content
         self.assertEqual(response.status_code, 201)
 
-        # Verify the content of the saved file
-        with open(self.templates_file_path, "r") as f:
-            templates = json.load(f)
-
+        # Verify the content of the saved template
+        templates = self.client.get("/templates").get_json()
         self.assertEqual(len(templates), 1)
         self.assertEqual(templates[0]["name"], template_name)
 
+        template = self.client.get(f"/templates/{templates[0]['id']}").get_json()
+
         # This is the assertion that SHOULD pass after the fix.
-        self.assertEqual(templates[0]["content"], expected_content_fixed)
+        self.assertEqual(template["content"], expected_content_fixed)
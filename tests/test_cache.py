@@ -0,0 +1,50 @@
+import unittest
+from app.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.cache = TTLCache(maxsize=2, ttl=10, timer=self.timer)
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.set("a", 1)
+        self.timer.now = 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.timer.now = 10
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_reads_do_not_extend_ttl(self):
+        self.cache.set("a", 1)
+        self.timer.now = 5
+        self.cache.get("a")
+        self.timer.now = 11
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_oldest_entry_is_evicted_when_full(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.set("c", 3)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("c"), 3)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_pop_and_clear(self):
+        self.cache.set("a", None)
+        self.assertIsNone(self.cache.pop("a", "missing"))
+        self.assertEqual(self.cache.pop("a", "missing"), "missing")
+        self.cache.set("b", 2)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from app import create_app, database
+from app.models import db
+
+
+class EngineOptionsTestCase(unittest.TestCase):
+    def test_server_databases_get_the_profile_pool_options(self):
+        options = database.engine_options("postgresql://u:p@host/db", "high-volume")
+        self.assertEqual(options["pool_size"], 20)
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertEqual(options["pool_recycle"], 1800)
+
+    def test_sqlite_gets_no_pool_options(self):
+        self.assertEqual(database.engine_options("sqlite:///tracking.db"), {})
+        self.assertEqual(database.engine_options("sqlite:///:memory:"), {})
+
+    def test_unknown_profile_is_rejected(self):
+        with self.assertRaises(ValueError):
+            database.engine_options("postgresql://u:p@host/db", "huge")
+
+    def test_profiles_are_not_shared(self):
+        options = database.engine_options("postgresql://u:p@host/db")
+        options["pool_size"] = 1
+        self.assertEqual(database.ENGINE_PROFILES["production"]["pool_size"], 10)
+
+
+class SqlitePragmasTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_pragmas_are_applied_to_every_connection(self):
+        engine = create_engine(f"sqlite:///{self.path}")
+        database.configure_engine(
+            engine, database.sqlite_pragmas(busy_timeout=1234, mmap_size=4096)
+        )
+        with engine.connect() as connection:
+
+            def pragma(name):
+                return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+            self.assertEqual(pragma("journal_mode"), "wal")
+            self.assertEqual(pragma("synchronous"), 1)  # NORMAL
+            self.assertEqual(pragma("busy_timeout"), 1234)
+            self.assertEqual(pragma("mmap_size"), 4096)
+        engine.dispose()
+
+    def test_rollback_journal_can_be_kept(self):
+        engine = create_engine(f"sqlite:///{self.path}")
+        database.configure_engine(
+            engine, database.sqlite_pragmas(journal_mode="", synchronous="")
+        )
+        with engine.connect() as connection:
+            mode = connection.execute(text("PRAGMA journal_mode")).scalar()
+            self.assertEqual(mode, "delete")
+        engine.dispose()
+
+    def test_app_engine_is_configured(self):
+        app, _ = create_app(testing=True)
+        with app.app_context():
+            timeout = db.session.execute(text("PRAGMA busy_timeout")).scalar()
+            self.assertEqual(timeout, app.config["SQLITE_BUSY_TIMEOUT"])
+            db.session.remove()
+
+
+class DatabaseWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, _ = create_app(testing=True)
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_operations_run_in_order_on_one_thread(self):
+        calls = []
+
+        def operation(value):
+            calls.append((value, threading.get_ident()))
+            return value * 2
+
+        async def run_test():
+            writer = database.DatabaseWriter(self.app)
+            try:
+                results = await asyncio.gather(
+                    *(writer.run(operation, i) for i in range(5))
+                )
+            finally:
+                writer.close()
+            return results
+
+        self.assertEqual(asyncio.run(run_test()), [0, 2, 4, 6, 8])
+        self.assertEqual([value for value, _ in calls], list(range(5)))
+        self.assertEqual(len({ident for _, ident in calls}), 1)
+        self.assertNotEqual(calls[0][1], threading.get_ident())
+
+    def test_operations_run_in_an_app_context_and_propagate_errors(self):
+        from app.models import Campaign
+
+        def create():
+            db.session.add(Campaign(subject="s", message="m"))
+            db.session.commit()
+            raise ValueError("falhou")
+
+        async def run_test():
+            writer = database.DatabaseWriter(self.app)
+            try:
+                await writer.run(create)
+            finally:
+                writer.close()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run_test())
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Campaign).count(), 1)
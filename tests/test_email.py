@@ -4,6 +4,7 @@ import json
 from app import create_app
 import base64
 import asyncio
+import time
 import aiosmtplib
 
 from app.models import db
@@ -331,6 +332,202 @@ class EmailTestCase(unittest.TestCase):
 
         asyncio.run(run_test())
 
+    def test_prepare_message_renders_per_recipient(self):
+        from app.email_utils import prepare_message
+
+        prepared = prepare_message(
+            '<p>Olá, {{first_name}}!</p><a href="https://example.com/">x</a>',
+            [],
+            "http://localhost/",
+            links={"https://example.com/": 7},
+        )
+        self.assertEqual(prepared.fields, {"first_name"})
+
+        html = prepared.render("email-1", {"first_name": "<Ana>"})
+        self.assertIn("Olá, &lt;Ana&gt;!", html)
+        self.assertIn("http://localhost/track/click/email-1?l=7", html)
+        self.assertIn("http://localhost/track/open/email-1", html)
+        self.assertNotIn("{{", html)
+
+        other = prepared.render("email-2", {"first_name": "Bia"})
+        self.assertIn("Olá, Bia!", other)
+        self.assertIn("track/open/email-2", other)
+
+    def test_prepare_message_rejects_invalid_attachment(self):
+        from app.email_utils import prepare_message
+
+        attachment = {
+            "name": "test.txt",
+            "data": base64.b64encode(b"texto").decode("utf-8"),
+        }
+        with self.assertRaises(ValueError):
+            prepare_message("<p>x</p>", [attachment], "http://localhost/")
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.send_email_task", new_callable=AsyncMock)
+    def test_send_bulk_emails_passes_merge_fields(
+        self, mock_send_email_task, mock_socketio_emit
+    ):
+        async def run_test():
+            mock_send_email_task.return_value = {"status": "success"}
+
+            from app.email_utils import send_bulk_emails
+
+            with self.app.app_context():
+                result = await send_bulk_emails(
+                    subject="Oi",
+                    cc="",
+                    bcc="",
+                    message="<p>Olá, {{first_name}}</p>",
+                    attachments=[],
+                    base_url="http://localhost/",
+                    csv_content="email,first_name\nana@example.com,Ana",
+                    manual_emails=["bia@example.com"],
+                )
+
+            self.assertEqual(result["status"], "success")
+            calls = mock_send_email_task.call_args_list
+            self.assertEqual(len(calls), 2)
+            fields = {call.args[0][0][0]: call.kwargs["fields"] for call in calls}
+            self.assertEqual(
+                fields,
+                {"ana@example.com": {"first_name": "Ana"}, "bia@example.com": {}},
+            )
+            prepared = calls[0].kwargs["prepared"]
+            self.assertIs(calls[1].kwargs["prepared"], prepared)
+            self.assertEqual(prepared.fields, {"first_name"})
+
+        asyncio.run(run_test())
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.send_email_task", new_callable=AsyncMock)
+    def test_send_bulk_emails_reports_csv_errors(
+        self, mock_send_email_task, mock_socketio_emit
+    ):
+        async def run_test():
+            mock_send_email_task.return_value = {"status": "success"}
+
+            from app.email_utils import send_bulk_emails
+
+            with self.app.app_context():
+                result = await send_bulk_emails(
+                    subject="Oi",
+                    cc="",
+                    bcc="",
+                    message="<p>Oi</p>",
+                    attachments=[],
+                    base_url="http://localhost/",
+                    csv_content='nome;email\n"Ana";ana@example.com\nBia;invalido',
+                )
+
+            self.assertEqual(result["status"], "success")
+            self.assertEqual(mock_send_email_task.call_count, 1)
+            self.assertEqual(result["csv"]["rows"], 2)
+            self.assertEqual(result["csv"]["error_count"], 1)
+            self.assertEqual(result["csv"]["errors"][0]["line"], 3)
+
+        asyncio.run(run_test())
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.send_email_task", new_callable=AsyncMock)
+    def test_send_bulk_emails_dedupes_normalized_addresses(
+        self, mock_send_email_task, mock_socketio_emit
+    ):
+        async def run_test():
+            mock_send_email_task.return_value = {"status": "success"}
+
+            from app.email_utils import send_bulk_emails
+
+            with self.app.app_context():
+                result = await send_bulk_emails(
+                    subject="Oi",
+                    cc="",
+                    bcc="",
+                    message="<p>Oi</p>",
+                    attachments=[],
+                    base_url="http://localhost/",
+                    csv_content="A@X.com\nb@x.com",
+                    manual_emails=[" a@x.com ", "B@X.COM"],
+                )
+
+            self.assertEqual(result["status"], "success")
+            calls = mock_send_email_task.call_args_list
+            self.assertEqual(
+                sorted(call.args[0][0][0] for call in calls), ["a@x.com", "b@x.com"]
+            )
+            self.assertTrue(all(call.kwargs["validated"] for call in calls))
+
+        asyncio.run(run_test())
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.send_email_task", new_callable=AsyncMock)
+    def test_send_bulk_emails_does_not_block_the_event_loop(
+        self, mock_send_email_task, mock_socketio_emit
+    ):
+        mock_send_email_task.return_value = {"status": "success"}
+        from app.email_utils import send_bulk_emails
+
+        commit = db.session.commit
+
+        def slow_commit():
+            time.sleep(0.05)
+            commit()
+
+        async def run_test():
+            loop = asyncio.get_running_loop()
+            sending = True
+            lag = 0.0
+
+            async def monitor():
+                # Mede o atraso do loop em acordar uma corrotina concorrente.
+                nonlocal lag
+                while sending:
+                    started = loop.time()
+                    await asyncio.sleep(0.005)
+                    lag = max(lag, loop.time() - started - 0.005)
+
+            monitor_task = asyncio.create_task(monitor())
+            await asyncio.sleep(0)
+            with self.app.app_context(), patch.object(
+                db.session, "commit", side_effect=slow_commit
+            ):
+                result = await send_bulk_emails(
+                    subject="Oi",
+                    cc="",
+                    bcc="",
+                    message="<p>Oi</p>",
+                    attachments=[],
+                    base_url="http://localhost/",
+                    manual_emails=[f"p{i}@x.com" for i in range(5)],
+                )
+            sending = False
+            await monitor_task
+            return result, lag
+
+        result, lag = asyncio.run(run_test())
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(mock_send_email_task.call_count, 5)
+        # Cada commit leva 50 ms; executados no loop, atrasariam o monitor
+        # pelo menos esse tempo.
+        self.assertLess(lag, 0.03)
+
+    @patch("app.email_utils.normalize_email")
+    @patch("app.email_utils.aiosmtplib.SMTP")
+    def test_send_email_task_skips_validation_when_validated(
+        self, mock_smtp, mock_normalize_email
+    ):
+        mock_smtp.return_value.__aenter__.return_value = AsyncMock()
+        from app.email_utils import send_email_task
+
+        email_data = (["a@x.com"], "Oi", "", "", "<p>Oi</p>", [], "id-1")
+        with patch("app.email_utils.Config.SECONDS_PER_EMAIL", 0):
+            result = asyncio.run(
+                send_email_task(email_data, "http://localhost/", validated=True)
+            )
+
+        self.assertEqual(result["status"], "success")
+        mock_normalize_email.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
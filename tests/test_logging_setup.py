@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from app import logging_setup
+from app.logging_setup import JsonFormatter, SampleFilter, configure_logging
+
+
+class _CountingArgument:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "x"
+
+
+class LoggingSetupTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        self.logger = logging.getLogger("tests.logging_setup")
+
+    def tearDown(self):
+        configure_logging()
+        os.remove(self.path)
+
+    def _read_lines(self):
+        # Desfaz a configuração para esvaziar a fila antes de ler o arquivo.
+        with logging_setup._lock:
+            logging_setup._uninstall()
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_are_written_as_json_with_extra_fields(self):
+        configure_logging(level="INFO", path=self.path)
+        self.logger.info("Enviados %d", 3, extra={"campaign_id": 7})
+        try:
+            raise RuntimeError("falhou")
+        except RuntimeError:
+            self.logger.error("Erro no envio", exc_info=True)
+
+        sent, error = self._read_lines()
+        self.assertEqual(sent["message"], "Enviados 3")
+        self.assertEqual(sent["level"], "INFO")
+        self.assertEqual(sent["logger"], "tests.logging_setup")
+        self.assertEqual(sent["campaign_id"], 7)
+        self.assertTrue(sent["ts"].endswith("+00:00"))
+        self.assertIn("RuntimeError: falhou", error["exc_info"])
+
+    def test_records_below_the_level_are_not_formatted(self):
+        configure_logging(level="INFO", path=self.path)
+        argument = _CountingArgument()
+        self.logger.debug("Progresso %s", argument)
+
+        self.assertEqual(self._read_lines(), [])
+        self.assertEqual(argument.formatted, 0)
+
+    def test_sampled_records_are_thinned_per_message(self):
+        configure_logging(level="INFO", path=self.path, sample_rate=10)
+        for i in range(25):
+            self.logger.info("E-mail enviado.", extra={"sampled": True, "n": i})
+            self.logger.info("Progresso emitido.", extra={"sampled": True, "n": i})
+        self.logger.info("Campanha concluída.")
+
+        lines = self._read_lines()
+        sent = [line["n"] for line in lines if line["message"] == "E-mail enviado."]
+        progress = [
+            line["n"] for line in lines if line["message"] == "Progresso emitido."
+        ]
+        self.assertEqual(sent, [0, 10, 20])
+        self.assertEqual(progress, [0, 10, 20])
+        self.assertEqual(lines[-1]["message"], "Campanha concluída.")
+        self.assertNotIn("sampled", lines[0])
+
+    def test_reconfiguring_replaces_the_previous_handler(self):
+        configure_logging(path=self.path)
+        configure_logging(path=self.path)
+        handlers = [
+            handler
+            for handler in logging.getLogger().handlers
+            if isinstance(handler, logging_setup._QueueHandler)
+        ]
+        self.assertEqual(len(handlers), 1)
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            configure_logging(fmt="xml")
+
+
+class FormatterTestCase(unittest.TestCase):
+    def test_message_arguments_are_interpolated(self):
+        record = logging.makeLogRecord({"msg": "Oi %s", "args": ("mundo",)})
+        self.assertEqual(
+            json.loads(JsonFormatter().format(record))["message"], "Oi mundo"
+        )
+
+    def test_unsampled_records_always_pass(self):
+        sample = SampleFilter(rate=5)
+        record = logging.makeLogRecord({"msg": "erro"})
+        self.assertTrue(all(sample.filter(record) for _ in range(10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import unittest
+import uuid
+from unittest.mock import AsyncMock, patch
+
+from app import create_app, metrics
+from app.models import Campaign, Email, db
+from app.recipients import upsert_recipients
+
+
+class MetricTypesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_with_labels(self):
+        counter = metrics.Counter("x_total", "Doc.", ["reason"], registry=self.registry)
+        counter.labels("auth").inc()
+        counter.labels("auth").inc(2)
+        counter.labels('a"b').inc()
+        text = self.registry.render()
+        self.assertIn("# TYPE x_total counter", text)
+        self.assertIn('x_total{reason="auth"} 3', text)
+        self.assertIn('x_total{reason="a\\"b"} 1', text)
+        with self.assertRaises(ValueError):
+            counter.labels("a", "b")
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            counter.labels("auth").inc(-1)
+
+    def test_gauge(self):
+        gauge = metrics.Gauge("depth", "Doc.", registry=self.registry)
+        gauge.inc(5)
+        gauge.dec(2)
+        self.assertEqual(gauge.value, 3)
+        self.assertIn("depth 3", self.registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram(
+            "latency_seconds", "Doc.", buckets=(0.1, 1), registry=self.registry
+        )
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("latency_seconds_sum 3.65", text)
+        self.assertIn("latency_seconds_count 4", text)
+
+    def test_duplicate_names_are_rejected(self):
+        metrics.Counter("dup_total", "Doc.", registry=self.registry)
+        with self.assertRaises(ValueError):
+            metrics.Counter("dup_total", "Doc.", registry=self.registry)
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_endpoint_exposes_tracking_and_flush_metrics(self):
+        campaign = Campaign(subject="s", message="m")
+        db.session.add(campaign)
+        db.session.commit()
+        recipient_id = upsert_recipients(["a@x.com"])["a@x.com"]
+        token = str(uuid.uuid4())
+        db.session.add(
+            Email(token=token, campaign_id=campaign.id, recipient_id=recipient_id)
+        )
+        db.session.commit()
+
+        recorded = metrics.TRACKING_HITS.labels("open", "recorded")
+        unknown = metrics.TRACKING_HITS.labels("open", "unknown")
+        before = recorded.value, unknown.value
+        flushes = metrics.DB_FLUSH_DURATION.count
+
+        self.client.get(f"/track/open/{token}")
+        self.client.get(f"/track/open/{uuid.uuid4()}")
+
+        self.assertEqual(recorded.value, before[0] + 1)
+        self.assertEqual(unknown.value, before[1] + 1)
+        self.assertGreater(metrics.DB_FLUSH_DURATION.count, flushes)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content_type, metrics.CONTENT_TYPE)
+        body = response.get_data(as_text=True)
+        self.assertIn(
+            'hyperxmail_tracking_hits_total{kind="open",result="recorded"}', body
+        )
+        self.assertIn("hyperxmail_db_flush_duration_seconds_count", body)
+
+    @patch("app.email_utils.aiosmtplib.SMTP")
+    def test_send_records_sender_metrics(self, mock_smtp):
+        mock_smtp.return_value.__aenter__.return_value = AsyncMock()
+        from app.email_utils import send_email_task
+
+        sent = metrics.EMAILS_SENT.value
+        sends = metrics.SMTP_SEND.count
+        renders = metrics.RENDER_DURATION.count
+        no_recipients = metrics.EMAILS_FAILED.labels("no_recipients").value
+
+        with patch("app.email_utils.Config.SECONDS_PER_EMAIL", 0):
+            asyncio.run(
+                send_email_task(
+                    (["a@x.com"], "Oi", "", "", "<p>Oi</p>", [], "t"),
+                    "http://localhost/",
+                )
+            )
+            asyncio.run(
+                send_email_task(
+                    (["invalido"], "Oi", "", "", "<p>Oi</p>", [], "t"),
+                    "http://localhost/",
+                )
+            )
+
+        self.assertEqual(metrics.EMAILS_SENT.value, sent + 1)
+        self.assertEqual(metrics.SMTP_SEND.count, sends + 1)
+        self.assertEqual(metrics.RENDER_DURATION.count, renders + 1)
+        self.assertEqual(
+            metrics.EMAILS_FAILED.labels("no_recipients").value, no_recipients + 1
+        )
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.send_email_task", new_callable=AsyncMock)
+    def test_bulk_send_counts_emits_and_drains_the_queue(
+        self, mock_send_email_task, mock_socketio_emit
+    ):
+        mock_send_email_task.return_value = {"status": "success"}
+        from app.email_utils import send_bulk_emails
+
+        progress = metrics.SOCKETIO_EMITS.labels("progress")
+        before = progress.value
+        result = asyncio.run(
+            send_bulk_emails(
+                subject="Oi",
+                cc="",
+                bcc="",
+                message="<p>Oi</p>",
+                attachments=[],
+                base_url="http://localhost/",
+                manual_emails=["a@x.com", "b@x.com"],
+            )
+        )
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(progress.value, before + 2)
+        self.assertEqual(metrics.SEND_QUEUE_DEPTH.value, 0)
+        self.assertEqual(metrics.DB_WRITER_QUEUE_DEPTH.value, 0)
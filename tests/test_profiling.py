@@ -0,0 +1,292 @@
+import asyncio
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import aiosmtplib
+
+from app import create_app
+from app.config import Config
+from app.models import Campaign, Email, Recipient, db
+from app.profiling import CampaignProfiler, SamplingProfiler
+from app.smtp_sink import SmtpSink
+
+
+def _busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class SamplingProfilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_samples_the_calling_thread_and_db_writer_threads(self):
+        worker = threading.Thread(target=_busy_wait, args=(0.2,), name="db-writer_0")
+        other = threading.Thread(target=_busy_wait, args=(0.2,), name="other")
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        worker.start()
+        other.start()
+        _busy_wait(0.2)
+        worker.join()
+        other.join()
+        profiler.stop()
+
+        threads = {stack.split(";", 1)[0] for stack in profiler.samples}
+        self.assertIn("MainThread", threads)
+        self.assertIn("db-writer_0", threads)
+        self.assertNotIn("other", threads)
+        self.assertTrue(
+            any(
+                stack.endswith("_busy_wait (tests/test_profiling.py:20)")
+                for stack in profiler.samples
+            )
+        )
+
+    def test_sampling_artifact_is_written_in_folded_format(self):
+        profiler = CampaignProfiler("sampling", self.output_dir, "campaign-1", 0.001)
+        profiler.start()
+        _busy_wait(0.05)
+        path = profiler.stop()
+
+        self.assertTrue(os.path.basename(path).startswith("campaign-1-"))
+        self.assertTrue(path.endswith(".folded"))
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertTrue(stack.startswith("MainThread;"))
+        self.assertGreater(int(count), 0)
+
+    def test_cprofile_artifact_is_loadable(self):
+        profiler = CampaignProfiler("cprofile", self.output_dir, "campaign-2")
+        profiler.start()
+        _busy_wait(0.01)
+        path = profiler.stop()
+
+        self.assertTrue(path.endswith(".pstats"))
+        functions = {func[2] for func in pstats.Stats(path).stats}
+        self.assertIn("_busy_wait", functions)
+
+    def test_unknown_profiler_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CampaignProfiler("perf", self.output_dir, "campaign-3")
+
+
+class SmtpSinkTestCase(unittest.TestCase):
+    def test_accepts_authenticated_messages(self):
+        async def main():
+            async with SmtpSink() as sink:
+                async with aiosmtplib.SMTP(
+                    hostname=sink.host, port=sink.port, start_tls=False
+                ) as client:
+                    await client.login("user", "secret")
+                    await client.sendmail(
+                        "a@x.com", ["b@x.com"], "Subject: Oi\r\n\r\n.linha\r\n"
+                    )
+                    await client.sendmail("a@x.com", ["c@x.com"], "Subject: 2\r\n\r\n")
+                return sink.messages
+
+        self.assertEqual(asyncio.run(main()), 2)
+
+
+class CampaignProfilingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.output_dir)
+
+    def _stored_campaign(self, addresses):
+        campaign = Campaign(subject="Novidades", message="<p>Oi {{ email }}</p>")
+        db.session.add(campaign)
+        db.session.flush()
+        for address in addresses:
+            recipient = Recipient(email=address)
+            db.session.add(recipient)
+            db.session.flush()
+            db.session.add(
+                Email(
+                    token=f"t-{address}",
+                    campaign_id=campaign.id,
+                    recipient_id=recipient.id,
+                )
+            )
+        db.session.commit()
+        return campaign.id
+
+    @patch("app.socketio.emit")
+    def test_replay_campaign_sends_to_the_local_sink_under_the_profiler(
+        self, mock_emit
+    ):
+        campaign_id = self._stored_campaign(["a@x.com", "b@x.com", "c@x.com"])
+
+        result = self.app.test_cli_runner().invoke(
+            args=[
+                "replay-campaign",
+                str(campaign_id),
+                "--profiler",
+                "cprofile",
+                "--limit",
+                "2",
+                "--output",
+                self.output_dir,
+            ]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("2 e-mail(s) reenviado(s)", result.output)
+        (artifact,) = os.listdir(self.output_dir)
+        self.assertTrue(artifact.startswith(f"replay-{campaign_id}-"))
+        functions = {
+            func[2]
+            for func in pstats.Stats(os.path.join(self.output_dir, artifact)).stats
+        }
+        self.assertIn("send_email_task", functions)
+
+        replay = db.session.query(Campaign).filter(Campaign.id != campaign_id).one()
+        self.assertEqual(replay.subject, "[replay] Novidades")
+        self.assertEqual(
+            db.session.query(Email).filter_by(campaign_id=replay.id).count(), 2
+        )
+        # A configuração do SMTP é restaurada após o reenvio.
+        self.assertTrue(Config.SMTP_STARTTLS)
+        self.assertNotEqual(Config.SMTP_SERVER, "127.0.0.1")
+
+    @patch("app.socketio.emit")
+    def test_replay_does_not_nest_the_configured_profiler(self, mock_emit):
+        campaign_id = self._stored_campaign(["a@x.com"])
+
+        with patch.multiple(
+            "app.email_utils.Config",
+            CAMPAIGN_PROFILER="cprofile",
+            PROFILE_OUTPUT_DIR=self.output_dir,
+        ):
+            result = self.app.test_cli_runner().invoke(
+                args=["replay-campaign", str(campaign_id), "--output", self.output_dir]
+            )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        (artifact,) = os.listdir(self.output_dir)
+        self.assertTrue(artifact.startswith(f"replay-{campaign_id}-"))
+
+    def test_replay_of_unknown_campaign_fails(self):
+        result = self.app.test_cli_runner().invoke(args=["replay-campaign", "999"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("Campanha 999 não encontrada", result.output)
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.aiosmtplib.SMTP")
+    def test_configured_profiler_writes_an_artifact_per_campaign(
+        self, mock_smtp, mock_emit
+    ):
+        mock_smtp.return_value.__aenter__.return_value = AsyncMock()
+        from app.email_utils import send_bulk_emails
+
+        with patch.multiple(
+            "app.email_utils.Config",
+            SECONDS_PER_EMAIL=0,
+            CAMPAIGN_PROFILER="sampling",
+            PROFILE_OUTPUT_DIR=self.output_dir,
+        ):
+            result = asyncio.run(
+                send_bulk_emails(
+                    subject="Oi",
+                    cc="",
+                    bcc="",
+                    message="<p>Oi</p>",
+                    attachments=[],
+                    base_url="http://localhost/",
+                    manual_emails=["a@x.com"],
+                )
+            )
+        self.assertEqual(result["status"], "success")
+        campaign_id = db.session.query(Campaign.id).scalar()
+        (artifact,) = os.listdir(self.output_dir)
+        self.assertTrue(artifact.startswith(f"campaign-{campaign_id}-"))
+        self.assertTrue(artifact.endswith(".folded"))
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.aiosmtplib.SMTP")
+    @patch("app.profiling.CampaignProfiler.start")
+    def test_profiler_that_fails_to_start_does_not_stop_the_campaign(
+        self, mock_start, mock_smtp, mock_emit
+    ):
+        mock_start.side_effect = ValueError("Another profiling tool is already active")
+        mock_smtp.return_value.__aenter__.return_value = AsyncMock()
+        from app.email_utils import send_bulk_emails
+
+        with patch.multiple(
+            "app.email_utils.Config",
+            SECONDS_PER_EMAIL=0,
+            CAMPAIGN_PROFILER="cprofile",
+            PROFILE_OUTPUT_DIR=self.output_dir,
+        ):
+            result = asyncio.run(
+                send_bulk_emails(
+                    subject="Oi",
+                    cc="",
+                    bcc="",
+                    message="<p>Oi</p>",
+                    attachments=[],
+                    base_url="http://localhost/",
+                    manual_emails=["a@x.com"],
+                )
+            )
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(os.listdir(self.output_dir), [])
+        self.assertEqual(db.session.query(Email).count(), 1)
+
+    @patch("app.routes.send_bulk_emails", new_callable=AsyncMock)
+    @patch("app.routes.check_smtp_credentials", new_callable=AsyncMock)
+    def test_profile_flag_requires_the_admin_token(self, mock_check, mock_send):
+        mock_check.return_value = True
+        mock_send.return_value = {"status": "success", "message": "ok"}
+        payload = {
+            "subject": "Oi",
+            "message": "<p>Oi</p>",
+            "manualEmails": ["a@x.com"],
+            "profile": True,
+        }
+
+        response = self.client.post("/send_email", json=payload)
+        self.assertEqual(response.status_code, 403)
+
+        self.app.config["PROFILE_ADMIN_TOKEN"] = "s3cret"
+        response = self.client.post(
+            "/send_email", json=payload, headers={"X-Profile-Token": "wrong"}
+        )
+        self.assertEqual(response.status_code, 403)
+        mock_send.assert_not_called()
+
+        response = self.client.post(
+            "/send_email", json=payload, headers={"X-Profile-Token": "s3cret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_send.call_args.kwargs["profile"], "sampling")
+
+        response = self.client.post("/send_email", json=dict(payload, profile=None))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(mock_send.call_args.kwargs["profile"])
+
+
+if __name__ == "__main__":
+    unittest.main()
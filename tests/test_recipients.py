@@ -0,0 +1,234 @@
+import codecs
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app import create_app, recipients
+from app.models import Campaign, Click, Email, Open, Recipient, db
+from app.recipients import (
+    RecipientList,
+    RecipientReader,
+    detect_encoding,
+    normalize_email,
+    upsert_recipients,
+)
+
+
+class NormalizeEmailTestCase(unittest.TestCase):
+    def test_normalizes_case_and_spaces(self):
+        self.assertEqual(
+            normalize_email("  Ana.Souza@Example.COM "), "ana.souza@example.com"
+        )
+        self.assertEqual(normalize_email("ana@example.com."), "ana@example.com")
+
+    def test_converts_international_domains(self):
+        self.assertEqual(normalize_email("ana@café.com"), "ana@xn--caf-dma.com")
+        self.assertEqual(normalize_email("ana@пример.рф"), "ana@xn--e1afmkfd.xn--p1ai")
+
+    def test_rejects_invalid_addresses(self):
+        for address in (
+            "",
+            "ana",
+            "@example.com",
+            "ana@",
+            "ana@example",
+            "ana@exa mple.com",
+            "joão@example.com",
+            "ana@@example.com",
+        ):
+            self.assertIsNone(normalize_email(address), address)
+
+
+class RecipientListTestCase(unittest.TestCase):
+    def test_dedupes_on_normalized_form(self):
+        recipients = RecipientList()
+        self.assertTrue(recipients.add("A@X.com", {"n": "1"}))
+        self.assertFalse(recipients.add(" a@x.COM"))
+        self.assertFalse(recipients.add("invalid"))
+        recipients.update([("a@x.com", {}), ("b@x.com", {"n": "2"})])
+        self.assertEqual(
+            list(recipients), [("a@x.com", {"n": "1"}), ("b@x.com", {"n": "2"})]
+        )
+        self.assertEqual(len(recipients), 2)
+        self.assertEqual(recipients.duplicates, 2)
+        self.assertEqual(recipients.invalid, 1)
+
+    def test_repeated_suppressed_address_is_counted_once(self):
+        recipients = RecipientList(suppressed={"a@x.com"})
+        self.assertFalse(recipients.add("a@x.com"))
+        self.assertFalse(recipients.add("A@X.com"))
+        self.assertTrue(recipients.add("b@x.com"))
+        self.assertEqual(recipients.suppressed, 1)
+        self.assertEqual(recipients.duplicates, 1)
+        self.assertEqual(len(recipients), 1)
+
+
+class RecipientReaderTestCase(unittest.TestCase):
+    def test_one_address_per_line(self):
+        reader = RecipientReader("a@example.com\ninvalid\n\nB@Example.com\n")
+        self.assertEqual(list(reader), [("a@example.com", {}), ("b@example.com", {})])
+        self.assertEqual(reader.stats.rows, 3)
+        self.assertEqual(reader.stats.recipients, 2)
+        self.assertEqual(reader.stats.error_count, 1)
+        self.assertEqual(reader.stats.errors[0]["line"], 2)
+
+    def test_header_with_quoted_fields(self):
+        csv_content = (
+            'Nome,"E-mail",Cidade\n'
+            '"Souza, Ana",ana@example.com,"Recife"\n'
+            'Bia,"bia@example.com",\n'
+        )
+        self.assertEqual(
+            list(RecipientReader(csv_content)),
+            [
+                ("ana@example.com", {"nome": "Souza, Ana", "cidade": "Recife"}),
+                ("bia@example.com", {"nome": "Bia", "cidade": ""}),
+            ],
+        )
+
+    def test_detects_semicolon_delimiter(self):
+        reader = RecipientReader("email;first_name\nana@example.com;Ana\n")
+        self.assertEqual(list(reader), [("ana@example.com", {"first_name": "Ana"})])
+        self.assertEqual(reader.stats.delimiter, ";")
+
+    def test_configured_columns(self):
+        csv_content = "contato,nome,cidade\nana@example.com,Ana,Recife\n"
+        reader = RecipientReader(
+            csv_content, email_column="Contato", field_columns=["Nome"]
+        )
+        self.assertEqual(list(reader), [("ana@example.com", {"nome": "Ana"})])
+
+    def test_unknown_columns_raise(self):
+        with self.assertRaises(ValueError):
+            list(RecipientReader("email\na@example.com", email_column="x"))
+        with self.assertRaises(ValueError):
+            list(RecipientReader("email\na@example.com", field_columns=["x"]))
+
+    def test_header_without_known_email_column(self):
+        csv_content = "nome,contato\nAna,ana@example.com\nBia,sem-email\n"
+        reader = RecipientReader(csv_content)
+        self.assertEqual(list(reader), [("ana@example.com", {"nome": "Ana"})])
+        self.assertEqual(reader.stats.email_column, 1)
+        self.assertEqual(reader.stats.errors[0]["line"], 3)
+
+    def test_short_rows_are_reported(self):
+        reader = RecipientReader("nome,email\nAna\nBia,bia@example.com\n")
+        self.assertEqual(list(reader), [("bia@example.com", {"nome": "Bia"})])
+        self.assertEqual(
+            reader.stats.errors, [{"line": 2, "error": "Coluna de e-mail ausente."}]
+        )
+
+    def test_keeps_only_first_errors(self):
+        csv_content = "email\n" + "invalid\n" * 10
+        reader = RecipientReader(csv_content, max_errors=3)
+        self.assertEqual(list(reader), [])
+        self.assertEqual(reader.stats.error_count, 10)
+        self.assertEqual(len(reader.stats.errors), 3)
+
+    def test_detect_encoding(self):
+        self.assertEqual(detect_encoding(codecs.BOM_UTF8 + b"email"), "utf-8-sig")
+        self.assertEqual(detect_encoding("email".encode("utf-16")), "utf-16")
+        self.assertEqual(detect_encoding("João".encode("utf-8")), "utf-8")
+        self.assertEqual(detect_encoding("João".encode("cp1252")), "cp1252")
+        # Um caractere cortado no fim do trecho ainda é UTF-8.
+        self.assertEqual(detect_encoding("ã".encode("utf-8")[:1]), "utf-8")
+
+    def test_binary_input_is_decoded(self):
+        data = "email;nome\nana@example.com;João\n".encode("cp1252")
+        reader = RecipientReader(io.BytesIO(data))
+        self.assertEqual(list(reader), [("ana@example.com", {"nome": "João"})])
+        self.assertEqual(reader.stats.encoding, "cp1252")
+
+    def test_from_path_streams_file(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as f:
+            f.write(codecs.BOM_UTF8)
+            f.write("email,nome\n".encode("utf-8"))
+            for i in range(1000):
+                f.write(f"p{i}@example.com,Pessoa {i}\n".encode("utf-8"))
+        try:
+            reader = RecipientReader.from_path(f.name)
+            recipients = list(reader)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(len(recipients), 1000)
+        self.assertEqual(recipients[0], ("p0@example.com", {"nome": "Pessoa 0"}))
+        self.assertEqual(reader.stats.encoding, "utf-8-sig")
+        self.assertGreater(reader.stats.rows_per_second, 0)
+
+    def test_malformed_csv_raises_value_error(self):
+        content = 'email,nome\na@x.com,"' + "x" * 200_000 + '"\n'
+        with self.assertRaisesRegex(ValueError, "CSV inválido na linha"):
+            list(RecipientReader(content))
+
+
+class RecipientTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_upsert_recipients_reuses_existing_rows(self):
+        first = upsert_recipients(["a@x.com", "b@x.com"])
+        with patch.object(recipients, "UPSERT_BATCH_SIZE", 2):
+            second = upsert_recipients(["b@x.com", "c@x.com", "a@x.com"])
+        self.assertEqual(second["a@x.com"], first["a@x.com"])
+        self.assertEqual(second["b@x.com"], first["b@x.com"])
+        self.assertEqual(db.session.query(Recipient).count(), 3)
+
+    def test_email_recipient_proxy_gets_or_creates(self):
+        campaign = Campaign(subject="S", message="M")
+        db.session.add(campaign)
+        db.session.commit()
+        for token in ("e1", "e2"):
+            db.session.add(
+                Email(token=token, campaign_id=campaign.id, recipient="a@x.com")
+            )
+        db.session.commit()
+
+        self.assertEqual(db.session.query(Recipient).count(), 1)
+        first, second = Email.query.order_by(Email.id).all()
+        self.assertEqual(second.recipient, "a@x.com")
+        self.assertEqual(second.recipient_id, first.recipient_id)
+
+    def test_history(self):
+        ids = upsert_recipients(["a@x.com"])
+        emails = []
+        for subject in ("Primeira", "Segunda"):
+            campaign = Campaign(subject=subject, message="M")
+            db.session.add(campaign)
+            db.session.commit()
+            email = Email(campaign_id=campaign.id, recipient_id=ids["a@x.com"])
+            db.session.add(email)
+            db.session.commit()
+            emails.append(email)
+        db.session.add(Open(email_id=emails[0].id))
+        db.session.add(Click(email_id=emails[0].id, url="https://example.com"))
+        db.session.commit()
+
+        response = self.client.get("/api/recipients/A@X.com/history")
+        self.assertEqual(response.status_code, 200)
+        history = {h["subject"]: h for h in response.json["history"]}
+        self.assertTrue(history["Primeira"]["opened"])
+        self.assertTrue(history["Primeira"]["clicked"])
+        self.assertFalse(history["Segunda"]["opened"])
+
+        self.assertEqual(
+            self.client.get("/api/recipients/z@x.com/history").status_code, 404
+        )
+        self.assertEqual(
+            self.client.get("/api/recipients/a@x.com/history?limit=0").status_code,
+            400,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
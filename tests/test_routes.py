@@ -84,13 +84,13 @@ class RoutesTestCase(unittest.TestCase):
             db.session.add(campaign)
             db.session.commit()
             email = Email(
-                id=str(uuid.uuid4()),
+                token=str(uuid.uuid4()),
                 campaign_id=campaign.id,
                 recipient="test@example.com",
             )
             db.session.add(email)
             db.session.commit()
-            email_id = email.id
+            email_id = email.token
 
         response = self.client.get(f"/track/open/{email_id}")
         self.assertEqual(response.status_code, 200)
@@ -105,13 +105,13 @@ class RoutesTestCase(unittest.TestCase):
             db.session.add(campaign)
             db.session.commit()
             email = Email(
-                id=str(uuid.uuid4()),
+                token=str(uuid.uuid4()),
                 campaign_id=campaign.id,
                 recipient="test@example.com",
             )
             db.session.add(email)
             db.session.commit()
-            email_id = email.id
+            email_id = email.token
 
         url_to_track = "/some/path"
         response = self.client.get(f"/track/click/{email_id}?url={url_to_track}")
@@ -135,13 +135,68 @@ class RoutesTestCase(unittest.TestCase):
         self.assertEqual(len(data), 2)
         self.assertEqual(data[0]["subject"], "Campaign 2")  # Test order_by desc
 
+    def test_api_campaigns_keyset_pagination(self):
+        from datetime import datetime
+
+        for i in range(3):
+            db.session.add(
+                Campaign(
+                    subject=f"Campaign {i}",
+                    message="Message",
+                    created_at=datetime(2026, 1, 1),
+                )
+            )
+        db.session.commit()
+
+        response = self.client.get("/api/campaigns?limit=2")
+        self.assertEqual(
+            [c["subject"] for c in response.get_json()], ["Campaign 2", "Campaign 1"]
+        )
+        cursor = response.headers["X-Next-Cursor"]
+        self.assertIn('rel="next"', response.headers["Link"])
+
+        response = self.client.get(f"/api/campaigns?limit=2&cursor={cursor}")
+        self.assertEqual([c["subject"] for c in response.get_json()], ["Campaign 0"])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+        response = self.client.get("/api/campaigns?cursor=invalid")
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_campaigns_conditional_get_and_invalidation(self):
+        db.session.add(Campaign(subject="Campaign 1", message="Message 1"))
+        db.session.commit()
+
+        response = self.client.get("/api/campaigns")
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/campaigns", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        db.session.add(Campaign(subject="Campaign 2", message="Message 2"))
+        db.session.commit()
+        response = self.client.get("/api/campaigns", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+
+    def test_api_campaigns_cache_sees_campaigns_from_other_processes(self):
+        db.session.add(Campaign(subject="Campaign 1", message="Message 1"))
+        db.session.commit()
+        self.assertEqual(len(self.client.get("/api/campaigns").get_json()), 1)
+
+        # Uma inserção pelo Core não passa pelo ORM deste processo, como a de
+        # outro worker ou do processo de envio.
+        db.session.execute(
+            Campaign.__table__.insert().values(subject="Campaign 2", message="M")
+        )
+        db.session.commit()
+        self.assertEqual(len(self.client.get("/api/campaigns").get_json()), 2)
+
     def test_api_report(self):
         with self.app.app_context():
             campaign = Campaign(subject="Test Campaign", message="Test Message")
             db.session.add(campaign)
             db.session.commit()
             email = Email(
-                id=str(uuid.uuid4()),
+                token=str(uuid.uuid4()),
                 campaign_id=campaign.id,
                 recipient="test@example.com",
             )
@@ -253,6 +308,80 @@ class RoutesTestCase(unittest.TestCase):
         self.assertEqual(len(templates), 1)
         self.assertEqual(templates[0]["name"], "Good Template")
 
+    def test_template_list_omits_content(self):
+        response = self.client.post(
+            "/templates",
+            data=json.dumps({"name": "T", "content": "<p>Body</p>"}),
+            content_type="application/json",
+        )
+        template_id = response.get_json()["template"]["id"]
+
+        templates = self.client.get("/templates").get_json()
+        self.assertEqual([t["id"] for t in templates], [template_id])
+        self.assertNotIn("content", templates[0])
+
+        template = self.client.get(f"/templates/{template_id}").get_json()
+        self.assertEqual(template["content"], "<p>Body</p>")
+
+    def test_update_and_delete_template(self):
+        response = self.client.post(
+            "/templates",
+            data=json.dumps({"name": "T", "content": "<p>Body</p>"}),
+            content_type="application/json",
+        )
+        template_id = response.get_json()["template"]["id"]
+
+        response = self.client.put(
+            f"/templates/{template_id}",
+            data=json.dumps({"content": "<p>New</p><script>x</script>"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        template = self.client.get(f"/templates/{template_id}").get_json()
+        self.assertEqual(template["name"], "T")
+        self.assertEqual(
+            template["content"], "<p>New</p>&lt;script&gt;x&lt;/script&gt;"
+        )
+
+        response = self.client.put(
+            f"/templates/{template_id}",
+            data=json.dumps({"name": "  "}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(
+            self.client.delete(f"/templates/{template_id}").status_code, 200
+        )
+        self.assertEqual(self.client.get(f"/templates/{template_id}").status_code, 404)
+        self.assertEqual(
+            self.client.delete(f"/templates/{template_id}").status_code, 404
+        )
+
+    def test_import_templates_command(self):
+        with open(self.templates_file_path, "w") as f:
+            json.dump([{"id": "legacy-1", "name": "Old", "content": "<p>Old</p>"}], f)
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["import-templates", self.templates_file_path])
+        self.assertIn("1 template(s) importado(s)", result.output)
+        result = runner.invoke(args=["import-templates", self.templates_file_path])
+        self.assertIn("0 template(s) importado(s)", result.output)
+
+        template = self.client.get("/templates/legacy-1").get_json()
+        self.assertEqual(template["content"], "<p>Old</p>")
+
+    def test_import_templates_rejects_items_that_are_not_objects(self):
+        with open(self.templates_file_path, "w") as f:
+            json.dump([{"id": "legacy-1", "name": "Old"}, "x"], f)
+
+        result = self.app.test_cli_runner().invoke(
+            args=["import-templates", self.templates_file_path]
+        )
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("item 2", result.output)
+        self.assertEqual(self.client.get("/templates/legacy-1").status_code, 404)
+
     def test_track_open_invalid_email_id(self):
         """
         Tests that the track_open route handles a non-existent email_id gracefully.
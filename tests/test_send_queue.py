@@ -0,0 +1,162 @@
+import json
+import sys
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from app import create_app, send_queue
+from app.models import Campaign, SendJob, db
+from app.server import gunicorn_command
+
+
+class SendQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.app.config["SENDER_MODE"] = "queue"
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _kwargs(self, **overrides):
+        kwargs = dict(
+            subject="Oi",
+            cc="",
+            bcc="",
+            message="<p>Oi</p>",
+            attachments=[],
+            base_url="http://localhost/",
+            manual_emails=["a@x.com", "b@x.com"],
+        )
+        kwargs.update(overrides)
+        return kwargs
+
+    @patch("app.routes.send_bulk_emails", new_callable=AsyncMock)
+    @patch("app.routes.check_smtp_credentials", new_callable=AsyncMock)
+    def test_send_email_is_queued_in_queue_mode(self, mock_check, mock_send):
+        mock_check.return_value = True
+        response = self.client.post(
+            "/send_email",
+            json={"subject": "Oi", "message": "<p>Oi</p>", "manualEmails": ["a@x.com"]},
+        )
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+        mock_send.assert_not_called()
+        payload = json.loads(db.session.get(SendJob, job_id).payload)
+        self.assertEqual(payload["manual_emails"], ["a@x.com"])
+        self.assertEqual(payload["base_url"], "http://localhost/")
+
+        status = self.client.get(f"/api/send_jobs/{job_id}").get_json()
+        self.assertEqual(status["status"], "pending")
+        self.assertIsNone(status["started_at"])
+        self.assertEqual(self.client.get("/api/send_jobs/999").status_code, 404)
+
+    def test_jobs_are_claimed_once_in_order(self):
+        first = send_queue.enqueue(self._kwargs())
+        second = send_queue.enqueue(self._kwargs())
+
+        self.assertEqual(send_queue.claim_next().id, first)
+        self.assertEqual(send_queue.claim_next().id, second)
+        self.assertIsNone(send_queue.claim_next())
+        self.assertEqual(db.session.get(SendJob, first).status, "running")
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.aiosmtplib.SMTP")
+    def test_run_sender_executes_queued_jobs(self, mock_smtp, mock_emit):
+        mock_smtp.return_value.__aenter__.return_value = AsyncMock()
+        job_id = send_queue.enqueue(self._kwargs())
+
+        with patch("app.email_utils.Config.SECONDS_PER_EMAIL", 0):
+            result = self.app.test_cli_runner().invoke(args=["run-sender", "--once"])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("1 envio(s) executado(s)", result.output)
+        status = send_queue.job_status(job_id)
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["result"]["status"], "success")
+        self.assertIsNotNone(status["finished_at"])
+        self.assertEqual(db.session.query(Campaign).count(), 1)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(SendJob, job_id).payload, "{}")
+
+    @patch("app.email_utils.send_bulk_emails", new_callable=AsyncMock)
+    def test_failed_jobs_are_marked_failed(self, mock_send):
+        mock_send.side_effect = RuntimeError("SMTP fora do ar")
+        job_id = send_queue.enqueue(self._kwargs())
+
+        self.assertEqual(send_queue.run_sender(once=True), 1)
+        status = send_queue.job_status(job_id)
+        self.assertEqual(status["status"], "failed")
+        self.assertEqual(status["result"]["message"], "SMTP fora do ar")
+        db.session.expire_all()
+        self.assertEqual(db.session.get(SendJob, job_id).payload, "{}")
+
+    def test_interrupted_jobs_are_marked_failed_on_startup(self):
+        job_id = send_queue.enqueue(self._kwargs())
+        send_queue.claim_next()
+
+        result = self.app.test_cli_runner().invoke(args=["run-sender", "--once"])
+
+        self.assertIn("1 envio(s) interrompido(s)", result.output)
+        self.assertEqual(send_queue.job_status(job_id)["status"], "failed")
+
+
+class ServeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+
+    @patch("app.server.importlib.util.find_spec", return_value=None)
+    def test_missing_gunicorn_is_reported(self, mock_find_spec):
+        result = self.app.test_cli_runner().invoke(args=["serve"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("pip install gunicorn gevent", result.output)
+
+    @patch("app.cli.os.execvpe")
+    @patch("app.server.importlib.util.find_spec", return_value=object())
+    def test_serve_runs_gunicorn_with_async_workers(self, mock_find_spec, mock_exec):
+        result = self.app.test_cli_runner().invoke(
+            args=["serve", "--port", "8000", "--workers", "2"]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("SOCKETIO_MESSAGE_QUEUE", result.output)
+        executable, argv, env = mock_exec.call_args.args
+        self.assertEqual(argv[:3], [sys.executable, "-m", "gunicorn"])
+        self.assertIn("0.0.0.0:8000", argv)
+        self.assertEqual(argv[argv.index("--worker-class") + 1], "gevent")
+        self.assertEqual(argv[argv.index("--workers") + 1], "2")
+        self.assertEqual(argv[-1], "main:app")
+        self.assertEqual(env["SOCKETIO_ASYNC_MODE"], "gevent")
+
+    @patch("app.cli.os.execvpe")
+    @patch("app.server.importlib.util.find_spec", return_value=object())
+    def test_serve_can_run_the_tracking_service(self, mock_find_spec, mock_exec):
+        result = self.app.test_cli_runner().invoke(
+            args=["serve", "--tracking-only", "--workers", "4"]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn("SOCKETIO_MESSAGE_QUEUE", result.output)
+        self.assertEqual(mock_exec.call_args.args[1][-1], "tracker:app")
+
+    @patch("app.server.importlib.util.find_spec", return_value=object())
+    def test_gthread_workers_use_threading_mode(self, mock_find_spec):
+        argv, env = gunicorn_command("127.0.0.1", 5000, 1, "gthread", threads=16)
+        self.assertEqual(argv[argv.index("--threads") + 1], "16")
+        self.assertEqual(env["SOCKETIO_ASYNC_MODE"], "threading")
+        with self.assertRaises(ValueError):
+            gunicorn_command("127.0.0.1", 5000, 1, "sync")
+
+    def test_socketio_defaults_to_threading_mode(self):
+        # Com o gevent instalado, a detecção automática escolheria o gevent
+        # também no `python main.py`, sem o monkey-patching do Gunicorn.
+        self.assertEqual(self.socketio.async_mode, "threading")
+
+
+if __name__ == "__main__":
+    unittest.main()
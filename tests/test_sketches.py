@@ -0,0 +1,62 @@
+import unittest
+from app.sketches import BloomFilter, HyperLogLog
+
+
+class HyperLogLogTestCase(unittest.TestCase):
+    def test_estimate_within_error_bound(self):
+        sketch = HyperLogLog(precision=12)
+        for i in range(50_000):
+            sketch.add(f"email-{i}")
+        error = abs(sketch.count() - 50_000) / 50_000
+        # Três erros padrão cobrem praticamente todas as execuções.
+        self.assertLess(error, 3 * sketch.error_bound)
+
+    def test_small_cardinalities_are_exact_enough(self):
+        sketch = HyperLogLog(precision=12)
+        for member in ["a", "b", "c", "a", "b"]:
+            sketch.add(member)
+        self.assertEqual(sketch.count(), 3)
+
+    def test_repeated_members_do_not_change_registers(self):
+        sketch = HyperLogLog(precision=10)
+        sketch.add("same")
+        self.assertFalse(sketch.add("same"))
+
+    def test_merge_and_serialization(self):
+        first, second = HyperLogLog(precision=10), HyperLogLog(precision=10)
+        for i in range(1000):
+            first.add(i)
+            second.add(i + 500)
+        self.assertTrue(first.merge(second))
+
+        restored = HyperLogLog.from_bytes(first.to_bytes())
+        self.assertEqual(restored.precision, 10)
+        self.assertEqual(restored.count(), first.count())
+        self.assertLess(abs(restored.count() - 1500) / 1500, 3 * first.error_bound)
+
+    def test_merge_rejects_different_precisions(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(precision=10).merge(HyperLogLog(precision=11))
+
+
+class BloomFilterTestCase(unittest.TestCase):
+    def test_members_are_always_found(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"user{i}@example.com")
+        self.assertTrue(all(f"user{i}@example.com" in bloom for i in range(1000)))
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"in{i}")
+        false_positives = sum(f"out{i}" in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_rejects_invalid_error_rate(self):
+        with self.assertRaises(ValueError):
+            BloomFilter(capacity=10, error_rate=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tempo máximo, em segundos, para importar `app` e executar `create_app()` em
+# um processo novo. Hoje leva cerca de 1 s; o limite é folgado para máquinas
+# de CI lentas e serve para detectar importações pesadas que voltaram a ser
+# feitas no carregamento do pacote.
+STARTUP_BUDGET = 4.0
+
+# Dependências que só a aplicação completa (ou o envio) usa.
+LAZY_MODULES = (
+    "bs4",
+    "bleach",
+    "aiosmtplib",
+    "flask_socketio",
+    "flask_limiter",
+    "flask_migrate",
+    "flask_wtf",
+    "app.routes",
+    "app.email_utils",
+)
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+{factory}
+finished = time.perf_counter()
+print(json.dumps({{
+    "import": imported - started,
+    "total": finished - started,
+    "loaded": [name for name in {lazy!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_startup(factory):
+    script = SCRIPT.format(factory=factory, lazy=LAZY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class StartupTestCase(unittest.TestCase):
+    def test_create_app_fits_the_startup_budget(self):
+        result = run_startup("app.create_app(testing=True)")
+        self.assertLess(result["total"], STARTUP_BUDGET, result)
+
+    def test_importing_the_package_does_not_load_heavy_dependencies(self):
+        result = run_startup("")
+        self.assertEqual(result["loaded"], [])
+
+    def test_tracking_app_does_not_load_heavy_dependencies(self):
+        result = run_startup("app.create_tracking_app(testing=True)")
+        self.assertEqual(result["loaded"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
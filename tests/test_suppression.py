@@ -0,0 +1,142 @@
+import asyncio
+import csv
+import io
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from app import create_app, suppression
+from app.models import Suppression, db
+
+
+class SuppressionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_suppress_normalizes_and_skips_existing(self):
+        result = suppression.suppress(["A@X.com", "a@x.com", "invalid"], "bounce")
+        self.assertEqual(result, {"added": 1, "existing": 0, "invalid": 1})
+
+        result = suppression.suppress([" a@X.COM ", "b@x.com"])
+        self.assertEqual(result, {"added": 1, "existing": 1, "invalid": 0})
+        self.assertEqual(db.session.get(Suppression, "a@x.com").reason, "bounce")
+
+    def test_suppress_writes_in_batches(self):
+        with patch.object(suppression, "BATCH_SIZE", 10):
+            result = suppression.suppress(f"p{i}@x.com" for i in range(25))
+        self.assertEqual(result["added"], 25)
+        self.assertEqual(db.session.query(Suppression).count(), 25)
+
+    def test_unsuppress(self):
+        suppression.suppress(["a@x.com"])
+        self.assertTrue(suppression.unsuppress("A@x.com"))
+        self.assertFalse(suppression.unsuppress("a@x.com"))
+
+    def test_index_uses_a_set_for_small_lists(self):
+        suppression.suppress(["a@x.com", "b@x.com"])
+        index = suppression.SuppressionIndex.load()
+        self.assertTrue(index.exact)
+        self.assertEqual(len(index), 2)
+        self.assertIn("a@x.com", index)
+        self.assertNotIn("c@x.com", index)
+
+    def test_index_confirms_bloom_positives_in_the_database(self):
+        suppression.suppress([f"p{i}@x.com" for i in range(100)])
+        index = suppression.SuppressionIndex.load(set_max_entries=10)
+        self.assertFalse(index.exact)
+        self.assertTrue(all(f"p{i}@x.com" in index for i in range(100)))
+
+        # Força um falso positivo do filtro: o banco deve desmenti-lo.
+        index._members.add("fp@x.com")
+        self.assertNotIn("fp@x.com", index)
+
+    def test_import_json(self):
+        response = self.client.post(
+            "/api/suppressions",
+            json={"emails": ["a@x.com", "bad"], "reason": "<b>unsubscribe</b>"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["added"], 1)
+        self.assertEqual(response.json["invalid"], 1)
+        self.assertEqual(db.session.get(Suppression, "a@x.com").reason, "unsubscribe")
+
+    def test_import_json_requires_email_list(self):
+        response = self.client.post("/api/suppressions", json={"emails": "a@x.com"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_csv_and_export(self):
+        response = self.client.post(
+            "/api/suppressions?reason=bounce",
+            data="nome;email\nAna;ANA@x.com\nBia;invalido\n",
+            content_type="text/csv",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["added"], 1)
+        self.assertEqual(response.json["invalid"], 1)
+
+        response = self.client.get("/api/suppressions")
+        self.assertEqual(response.mimetype, "text/csv")
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(rows[0], ["email", "reason", "created_at"])
+        self.assertEqual(rows[1][:2], ["ana@x.com", "bounce"])
+
+    def test_import_malformed_csv_is_rejected(self):
+        response = self.client.post(
+            "/api/suppressions",
+            data='email\n"' + "x" * 200_000 + '"\n',
+            content_type="text/csv",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("CSV inválido", response.json["message"])
+
+    def test_delete(self):
+        suppression.suppress(["a@x.com"])
+        self.assertEqual(
+            self.client.delete("/api/suppressions/a@x.com").status_code, 200
+        )
+        self.assertEqual(
+            self.client.delete("/api/suppressions/a@x.com").status_code, 404
+        )
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.send_email_task", new_callable=AsyncMock)
+    def test_send_bulk_emails_skips_suppressed(self, mock_send_email_task, mock_emit):
+        mock_send_email_task.return_value = {"status": "success"}
+        suppression.suppress(["a@x.com"])
+
+        from app.email_utils import send_bulk_emails
+
+        async def send(emails):
+            return await send_bulk_emails(
+                subject="Oi",
+                cc="",
+                bcc="",
+                message="<p>Oi</p>",
+                attachments=[],
+                base_url="http://localhost/",
+                manual_emails=emails,
+            )
+
+        result = asyncio.run(send(["A@x.com", "b@x.com", "a@x.com"]))
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["suppressed"], 1)
+        sent = [call.args[0][0][0] for call in mock_send_email_task.call_args_list]
+        self.assertEqual(sent, ["b@x.com"])
+
+        result = asyncio.run(send(["a@x.com"]))
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(
+            result["message"], "Todos os destinatários estão na lista de supressão."
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import json
+from app import create_app, template_store
+from app.models import db
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TemplateListCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.timer = FakeTimer()
+        self.cache = template_store.TemplateListCache(ttl=2, timer=self.timer)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_external_changes_are_picked_up_after_ttl(self):
+        body, etag = self.cache.get()
+        self.assertEqual(json.loads(body), [])
+
+        # Simula uma escrita feita por outro processo (sem invalidate()).
+        template_store.create_template("T", "<p>Body</p>")
+        self.assertEqual(self.cache.get(), (body, etag))
+
+        self.timer.now = 2
+        body, new_etag = self.cache.get()
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual([t["name"] for t in json.loads(body)], ["T"])
+
+    def test_unchanged_table_keeps_cached_body(self):
+        template_store.create_template("T", "<p>Body</p>")
+        body, etag = self.cache.get()
+        self.timer.now = 5
+        cached_body, cached_etag = self.cache.get()
+        self.assertIs(cached_body, body)
+        self.assertEqual(cached_etag, etag)
+
+    def test_route_supports_conditional_get(self):
+        self.client.post(
+            "/templates",
+            data=json.dumps({"name": "T", "content": "<p>Body</p>"}),
+            content_type="application/json",
+        )
+        response = self.client.get("/templates")
+        etag = response.headers["ETag"]
+        response = self.client.get("/templates", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        template_id = json.loads(self.client.get("/templates").data)[0]["id"]
+        self.client.delete(f"/templates/{template_id}")
+        response = self.client.get("/templates", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
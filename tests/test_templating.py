@@ -0,0 +1,46 @@
+import unittest
+
+from app.templating import compile_template
+
+
+class CompiledTemplateTestCase(unittest.TestCase):
+    def test_render_fills_fields(self):
+        template = compile_template("<p>Olá, {{first_name}} {{ last_name }}!</p>")
+        self.assertEqual(template.fields, {"first_name", "last_name"})
+        self.assertEqual(
+            template.render({"first_name": "Ana", "last_name": "Souza"}),
+            "<p>Olá, Ana Souza!</p>",
+        )
+
+    def test_render_escapes_values(self):
+        template = compile_template('<a title="{{name}}">{{name}}</a>')
+        rendered = template.render({"name": '<b>"x"</b>'})
+        self.assertEqual(
+            rendered,
+            '<a title="&lt;b&gt;&quot;x&quot;&lt;/b&gt;">'
+            "&lt;b&gt;&quot;x&quot;&lt;/b&gt;</a>",
+        )
+
+    def test_render_without_escaping(self):
+        template = compile_template("Oi {{name}}")
+        self.assertEqual(template.render({"name": "<b>"}, escape=False), "Oi <b>")
+
+    def test_missing_fields_render_empty(self):
+        template = compile_template("{{a}}-{{b}}")
+        self.assertEqual(template.render({"a": 1}), "1-")
+        self.assertEqual(template.render(), "-")
+
+    def test_text_without_fields(self):
+        template = compile_template("<p>sem campos { x }</p>")
+        self.assertEqual(template.fields, frozenset())
+        self.assertEqual(template.render({"x": "y"}), "<p>sem campos { x }</p>")
+        self.assertEqual(compile_template("").render(), "")
+
+    def test_templates_are_reusable(self):
+        template = compile_template("{{n}}")
+        self.assertEqual(template.render({"n": "a"}), "a")
+        self.assertEqual(template.render({"n": "b"}), "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
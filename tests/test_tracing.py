@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from app import create_app, tracing
+from app.models import Campaign, CampaignStageTiming, db
+
+
+class CampaignTraceTestCase(unittest.TestCase):
+    def test_spans_outside_a_trace_are_ignored(self):
+        with tracing.span("render"):
+            pass
+        tracing.record("smtp.connect", 0.1)
+
+    def test_stages_are_aggregated(self):
+        trace = tracing.CampaignTrace(campaign_id=1)
+        with trace.activate():
+            for seconds in (0.1, 0.3):
+                tracing.record("smtp.send", seconds)
+            with tracing.span("render"):
+                pass
+        count, total, maximum = trace.stages["smtp.send"]
+        self.assertEqual(count, 2)
+        self.assertAlmostEqual(total, 0.4)
+        self.assertEqual(maximum, 0.3)
+        self.assertEqual(trace.stages["render"][0], 1)
+
+        summary = trace.summary()
+        self.assertEqual(summary[0]["stage"], "smtp.send")
+        self.assertEqual(summary[0]["avg_ms"], 200.0)
+
+    def test_traces_are_isolated_between_tasks(self):
+        first, second = tracing.CampaignTrace(), tracing.CampaignTrace()
+
+        async def run(trace, name):
+            with trace.activate():
+                await asyncio.sleep(0)
+                tracing.record(name, 0.01)
+
+        async def main():
+            await asyncio.gather(run(first, "a"), run(second, "b"))
+
+        asyncio.run(main())
+        self.assertEqual(list(first.stages), ["a"])
+        self.assertEqual(list(second.stages), ["b"])
+
+
+class OtlpJsonFileExporterTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_spans_are_written_as_otlp_json_with_parents(self):
+        exporter = tracing.OtlpJsonFileExporter(self.path)
+        trace = tracing.CampaignTrace(campaign_id=7, exporter=exporter, batch_size=2)
+        with trace.activate():
+            with tracing.span("send_email"):
+                with tracing.span("render"):
+                    pass
+                tracing.record("smtp.connect", 0.002)
+
+        with open(self.path, encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f]
+        # Dois spans por lote: uma linha com dois e outra com o span restante.
+        self.assertEqual(len(requests), 2)
+        spans = [
+            span
+            for request in requests
+            for resource in request["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for span in scope["spans"]
+        ]
+        by_name = {span["name"]: span for span in spans}
+        parent = by_name["send_email"]
+        self.assertNotIn("parentSpanId", parent)
+        self.assertEqual(by_name["render"]["parentSpanId"], parent["spanId"])
+        self.assertEqual(by_name["smtp.connect"]["parentSpanId"], parent["spanId"])
+        self.assertEqual({span["traceId"] for span in spans}, {trace.trace_id})
+        self.assertEqual(len(parent["traceId"]), 32)
+        self.assertLessEqual(
+            int(parent["startTimeUnixNano"]), int(parent["endTimeUnixNano"])
+        )
+        self.assertIn(
+            {"key": "campaign.id", "value": {"intValue": "7"}}, parent["attributes"]
+        )
+        resource = requests[0]["resourceSpans"][0]["resource"]
+        self.assertEqual(
+            resource["attributes"][0],
+            {"key": "service.name", "value": {"stringValue": "hyperxmail"}},
+        )
+
+
+class StageTimingsReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_save_merges_existing_stages(self):
+        campaign = Campaign(subject="s", message="m")
+        db.session.add(campaign)
+        db.session.commit()
+        tracing.save_stage_timings(campaign.id, {"render": [2, 0.5, 0.3]})
+        tracing.save_stage_timings(campaign.id, {"render": [1, 0.1, 0.1]})
+        timing = db.session.get(CampaignStageTiming, (campaign.id, "render"))
+        self.assertEqual(timing.count, 3)
+        self.assertAlmostEqual(timing.total_seconds, 0.6)
+        self.assertEqual(timing.max_seconds, 0.3)
+
+    @patch("app.socketio.emit")
+    @patch("app.email_utils.aiosmtplib.SMTP")
+    def test_bulk_send_records_stages_in_the_report(self, mock_smtp, mock_emit):
+        mock_smtp.return_value.__aenter__.return_value = AsyncMock()
+        from app.email_utils import send_bulk_emails
+
+        with patch("app.email_utils.Config.SECONDS_PER_EMAIL", 0):
+            result = asyncio.run(
+                send_bulk_emails(
+                    subject="Oi",
+                    cc="",
+                    bcc="",
+                    message='<p>Oi <a href="https://x.com">x</a></p>',
+                    attachments=[],
+                    base_url="http://localhost/",
+                    manual_emails=["a@x.com", "b@x.com"],
+                )
+            )
+        self.assertEqual(result["status"], "success")
+
+        campaign_id = db.session.query(Campaign.id).scalar()
+        report = self.client.get(f"/api/reports/{campaign_id}").get_json()
+        stages = {stage["stage"]: stage for stage in report["stage_timings"]}
+        for name in ("campaign", "prepare_message", "prepare.sanitize", "throttle"):
+            self.assertIn(name, stages)
+        for name in ("send_email", "record_email", "render", "smtp.send"):
+            self.assertEqual(stages[name]["count"], 2)
+        self.assertEqual(report["stage_timings"][0]["stage"], "campaign")
@@ -0,0 +1,510 @@
+import unittest
+import asyncio
+from unittest.mock import patch, AsyncMock
+import uuid
+from datetime import datetime
+from sqlalchemy import event
+from app import create_app, create_tracking_app
+from app.config import Config
+from app import rollups
+from app.email_utils import send_bulk_emails
+from app.models import (
+    db,
+    Campaign,
+    Email,
+    Open,
+    Click,
+    CampaignSketch,
+    EngagementRollup,
+    Link,
+)
+
+
+class TrackingDedupeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.email_id = self._create_email()
+
+    def _create_email(self):
+        campaign = Campaign(subject="Test Campaign", message="Test Message")
+        db.session.add(campaign)
+        db.session.commit()
+        email = Email(
+            token=str(uuid.uuid4()), campaign_id=campaign.id, recipient="a@example.com"
+        )
+        db.session.add(email)
+        db.session.commit()
+        return email.token
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_repeated_opens_are_collapsed(self):
+        for _ in range(3):
+            response = self.client.get(f"/track/open/{self.email_id}")
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(Open.query.count(), 1)
+        self.assertEqual(Open.query.first().hits, 3)
+
+    def test_repeated_clicks_are_collapsed_per_url(self):
+        for url in ["/a", "/a", "/b"]:
+            response = self.client.get(f"/track/click/{self.email_id}?url={url}")
+            self.assertEqual(response.status_code, 302)
+
+        clicks = {c.url: c.hits for c in Click.query.all()}
+        self.assertEqual(clicks, {"/a": 2, "/b": 1})
+
+    def test_dedupe_can_be_disabled(self):
+        with patch.object(Config, "TRACKING_DEDUPE_WINDOW", 0):
+            app, _ = create_app(testing=True)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            email_id = self._create_email()
+            for _ in range(2):
+                client.get(f"/track/open/{email_id}")
+
+            self.assertEqual(Open.query.count(), 2)
+            db.session.remove()
+            db.drop_all()
+
+
+class ApproximateReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        campaign = Campaign(subject="Test Campaign", message="Test Message")
+        db.session.add(campaign)
+        db.session.commit()
+        self.campaign_id = campaign.id
+        self.email_ids = []
+        for i in range(3):
+            email = Email(
+                token=str(uuid.uuid4()),
+                campaign_id=campaign.id,
+                recipient=f"user{i}@example.com",
+            )
+            db.session.add(email)
+            self.email_ids.append(email.token)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_tracking_updates_sketches(self):
+        for email_id in self.email_ids[:2]:
+            self.client.get(f"/track/open/{email_id}")
+        self.client.get(f"/track/click/{self.email_ids[0]}?url=/a")
+
+        kinds = {s.kind for s in CampaignSketch.query.all()}
+        self.assertEqual(kinds, {"opens", "clicks"})
+
+        response = self.client.get(f"/api/reports/{self.campaign_id}?mode=approx")
+        data = response.get_json()
+        self.assertTrue(data["approximate"])
+        self.assertEqual(data["unique_opens"], 2)
+        self.assertEqual(data["unique_clicks"], 1)
+        self.assertAlmostEqual(data["error_bound"], 1.04 / 64)
+
+    def test_exact_mode_is_default(self):
+        self.client.get(f"/track/open/{self.email_ids[0]}")
+        data = self.client.get(f"/api/reports/{self.campaign_id}").get_json()
+        self.assertFalse(data["approximate"])
+        self.assertEqual(data["unique_opens"], 1)
+
+    def test_approx_mode_falls_back_without_sketch(self):
+        email = Email.query.filter_by(token=self.email_ids[0]).one()
+        db.session.add(Open(email_id=email.id))
+        db.session.commit()
+        data = self.client.get(
+            f"/api/reports/{self.campaign_id}?mode=approx"
+        ).get_json()
+        self.assertFalse(data["approximate"])
+        self.assertEqual(data["unique_opens"], 1)
+
+    def test_invalid_mode(self):
+        response = self.client.get(f"/api/reports/{self.campaign_id}?mode=bogus")
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.campaign_ids, self.tokens = [], []
+        for n in range(3):
+            campaign = Campaign(subject=f"Campanha {n}", message="Oi")
+            db.session.add(campaign)
+            db.session.flush()
+            self.campaign_ids.append(campaign.id)
+            tokens = []
+            for i in range(n + 1):
+                token = str(uuid.uuid4())
+                db.session.add(
+                    Email(
+                        token=token,
+                        campaign_id=campaign.id,
+                        recipient=f"user{n}-{i}@example.com",
+                    )
+                )
+                tokens.append(token)
+            self.tokens.append(tokens)
+        db.session.commit()
+
+        # Campanha 1: os dois e-mails abertos (um deles duas vezes) e um clique.
+        for token in self.tokens[1] + self.tokens[1][:1]:
+            self.client.get(f"/track/open/{token}")
+        self.client.get(f"/track/click/{self.tokens[1][0]}?url=/a")
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _rows(self, data):
+        return [dict(zip(data["columns"], row)) for row in data["rows"]]
+
+    def test_reports_for_the_requested_ids(self):
+        first, second, third = self.campaign_ids
+        response = self.client.get(f"/api/reports?ids={third},{second},999,{second}")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+
+        rows = self._rows(data)
+        self.assertEqual([row["campaign_id"] for row in rows], [third, second])
+        self.assertEqual(rows[0]["total_sent"], 3)
+        self.assertEqual(rows[0]["unique_opens"], 0)
+        self.assertEqual(
+            (rows[1]["total_sent"], rows[1]["unique_opens"], rows[1]["unique_clicks"]),
+            (2, 2, 1),
+        )
+        self.assertEqual(data["missing"], [999])
+        self.assertFalse(data["approximate"])
+
+    def test_recent_campaigns_use_a_query_per_metric(self):
+        statements = []
+
+        def count(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            data = self.client.get("/api/reports?recent=2").get_json()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+
+        self.assertEqual([row[0] for row in data["rows"]], self.campaign_ids[:0:-1])
+        # Campanhas, envios, aberturas e cliques.
+        self.assertEqual(len(statements), 4)
+
+    def test_approx_mode_uses_sketches_and_falls_back(self):
+        first, second, third = self.campaign_ids
+        email = Email.query.filter_by(token=self.tokens[2][0]).one()
+        db.session.add(Open(email_id=email.id))
+        db.session.commit()
+
+        data = self.client.get(
+            f"/api/reports?ids={second},{third}&mode=approx"
+        ).get_json()
+        rows = self._rows(data)
+        self.assertTrue(data["approximate"])
+        self.assertAlmostEqual(data["error_bound"], 1.04 / 64)
+        self.assertEqual([row["unique_opens"] for row in rows], [2, 1])
+        self.assertEqual([row["unique_clicks"] for row in rows], [1, 0])
+
+    def test_invalid_parameters(self):
+        for query in (
+            "",
+            "ids=1&recent=2",
+            "ids=a,b",
+            "ids=",
+            "recent=0",
+            "mode=x&recent=1",
+        ):
+            response = self.client.get(f"/api/reports?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+        self.app.config["REPORTS_BATCH_MAX"] = 2
+        self.assertEqual(self.client.get("/api/reports?ids=1,2,3").status_code, 400)
+        self.assertEqual(self.client.get("/api/reports?recent=3").status_code, 400)
+
+
+class TimelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        campaign = Campaign(subject="Test Campaign", message="Test Message")
+        db.session.add(campaign)
+        db.session.commit()
+        self.campaign_id = campaign.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_tracking_maintains_rollups(self):
+        email = Email(
+            token=str(uuid.uuid4()), campaign_id=self.campaign_id, recipient="a@b.com"
+        )
+        db.session.add(email)
+        db.session.commit()
+
+        self.client.get(f"/track/open/{email.token}")
+        self.client.get(f"/track/click/{email.token}?url=/a")
+
+        rows = EngagementRollup.query.all()
+        self.assertEqual({r.resolution for r in rows}, {"minute", "hour"})
+        self.assertTrue(all(r.opens == 1 and r.clicks == 1 for r in rows))
+
+    def test_timeline_fills_gaps_and_aggregates_days(self):
+        for moment, kind in [
+            (datetime(2026, 1, 1, 10, 15), "opens"),
+            (datetime(2026, 1, 1, 10, 45), "opens"),
+            (datetime(2026, 1, 1, 12, 5), "clicks"),
+            (datetime(2026, 1, 2, 9, 0), "opens"),
+        ]:
+            rollups.record_event(self.campaign_id, kind, moment)
+
+        response = self.client.get(
+            f"/api/reports/{self.campaign_id}/timeline?resolution=hour"
+            "&start=2026-01-01T10:00:00&end=2026-01-01T13:00:00"
+        )
+        self.assertEqual(response.status_code, 200)
+        buckets = response.get_json()["buckets"]
+        self.assertEqual(
+            [(b["bucket"], b["opens"], b["clicks"]) for b in buckets],
+            [
+                ("2026-01-01 10:00:00", 2, 0),
+                ("2026-01-01 11:00:00", 0, 0),
+                ("2026-01-01 12:00:00", 0, 1),
+            ],
+        )
+
+        buckets = self.client.get(
+            f"/api/reports/{self.campaign_id}/timeline?resolution=day"
+        ).get_json()["buckets"]
+        self.assertEqual([(b["opens"], b["clicks"]) for b in buckets], [(2, 1), (1, 0)])
+
+    def test_timeline_accepts_timezone_aware_ranges(self):
+        rollups.record_event(self.campaign_id, "opens", datetime(2026, 1, 1, 10, 15))
+        rollups.record_event(self.campaign_id, "clicks", datetime(2026, 1, 1, 12, 5))
+        url = f"/api/reports/{self.campaign_id}/timeline?resolution=hour"
+
+        for start, end in [
+            ("2026-01-01T10:00:00Z", "2026-01-01T12:00:00Z"),
+            ("2026-01-01T10:00:00%2B00:00", "2026-01-01T12:00:00%2B00:00"),
+            ("2026-01-01T07:00:00-03:00", "2026-01-01T09:00:00-03:00"),
+        ]:
+            response = self.client.get(f"{url}&start={start}&end={end}")
+            self.assertEqual(response.status_code, 200, start)
+            self.assertEqual(
+                [(b["bucket"], b["opens"]) for b in response.get_json()["buckets"]],
+                [("2026-01-01 10:00:00", 1)],
+            )
+
+    def test_timeline_rejects_invalid_parameters(self):
+        url = f"/api/reports/{self.campaign_id}/timeline"
+        self.assertEqual(self.client.get(f"{url}?resolution=week").status_code, 400)
+        self.assertEqual(self.client.get(f"{url}?start=ontem").status_code, 400)
+
+    def test_timeline_limits_bucket_count(self):
+        rollups.record_event(self.campaign_id, "opens", datetime(2026, 1, 1))
+        rollups.record_event(self.campaign_id, "opens", datetime(2026, 3, 1))
+        self.app.config["TIMELINE_MAX_BUCKETS"] = 100
+        response = self.client.get(
+            f"/api/reports/{self.campaign_id}/timeline?resolution=minute"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class LinkTrackingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app, self.socketio = create_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    @patch("app.email_utils.asyncio.sleep", new_callable=AsyncMock)
+    @patch("app.email_utils.aiosmtplib.SMTP")
+    def test_campaign_links_are_registered_and_tracked(self, mock_smtp, _sleep):
+        mock_client = AsyncMock()
+        mock_smtp.return_value.__aenter__.return_value = mock_client
+        message = (
+            '<a href="https://example.com/a">A</a>'
+            '<a href="https://example.com/b">B</a>'
+            '<a href="https://example.com/a">A de novo</a>'
+        )
+
+        asyncio.run(
+            send_bulk_emails(
+                subject="Links",
+                cc="",
+                bcc="",
+                message=message,
+                attachments=[],
+                base_url="http://localhost/",
+                manual_emails=["a@example.com"],
+            )
+        )
+
+        links = Link.query.order_by(Link.id).all()
+        self.assertEqual(
+            [l.url for l in links], ["https://example.com/a", "https://example.com/b"]
+        )
+        sent_msg = mock_client.send_message.call_args[0][0]
+        html = next(
+            p.get_payload(decode=True).decode()
+            for p in sent_msg.walk()
+            if p.get_content_type() == "text/html"
+        )
+        email = Email.query.one()
+        self.assertIn(f"track/click/{email.token}?l={links[0].id}", html)
+        self.assertNotIn("?url=", html)
+
+        for _ in range(2):
+            response = self.client.get(f"/track/click/{email.token}?l={links[0].id}")
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.location, "https://example.com/a")
+
+        click = Click.query.one()
+        self.assertEqual((click.link_id, click.url, click.hits), (links[0].id, None, 2))
+
+        data = self.client.get(f"/api/reports/{email.campaign_id}/links").get_json()
+        self.assertEqual(
+            [(l["url"], l["clicks"], l["unique_clicks"]) for l in data["links"]],
+            [("https://example.com/a", 2, 1), ("https://example.com/b", 0, 0)],
+        )
+
+    def test_unknown_link_returns_404(self):
+        response = self.client.get("/track/click/some_id?l=999")
+        self.assertEqual(response.status_code, 404)
+
+
+class TrackingAppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_tracking_app(testing=True)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        campaign = Campaign(subject="Test Campaign", message="Test Message")
+        db.session.add(campaign)
+        db.session.flush()
+        self.link = Link(campaign_id=campaign.id, url="https://example.com/a")
+        email = Email(
+            token=str(uuid.uuid4()), campaign_id=campaign.id, recipient="a@example.com"
+        )
+        db.session.add_all([self.link, email])
+        db.session.commit()
+        self.token = email.token
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_only_tracking_routes_are_registered(self):
+        rules = {rule.rule for rule in self.app.url_map.iter_rules()}
+        self.assertEqual(
+            rules, {"/track/open/<token>", "/track/click/<token>", "/metrics"}
+        )
+        self.assertNotIn("csrf", self.app.extensions)
+        self.assertNotIn("socketio", self.app.extensions)
+
+    def test_opens_and_clicks_are_recorded(self):
+        response = self.client.get(f"/track/open/{self.token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "image/gif")
+
+        response = self.client.get(f"/track/click/{self.token}?l={self.link.id}")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.location, "https://example.com/a")
+
+        self.assertEqual(Open.query.count(), 1)
+        self.assertEqual(Click.query.one().link_id, self.link.id)
+        self.assertIn(
+            "hyperxmail_tracking_hits_total", self.client.get("/metrics").text
+        )
+
+
+class RateLimitTestCase(unittest.TestCase):
+    def _create_app(self, **config):
+        config = {
+            "RATELIMIT_ENABLED": True,
+            "RATELIMIT_DEFAULT": "2 per minute",
+            **config,
+        }
+        self.app, self.socketio = create_app(testing=True, config=config)
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_tracking_routes_are_exempt_from_the_default_limit(self):
+        self._create_app()
+        statuses = [self.client.get("/api/campaigns").status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+        for _ in range(20):
+            self.assertEqual(self.client.get("/track/open/x").status_code, 200)
+            self.assertNotEqual(self.client.get("/track/click/x").status_code, 429)
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_tracking_routes_can_have_their_own_limit(self):
+        self._create_app(RATELIMIT_TRACKING="5 per minute")
+        statuses = [self.client.get("/track/open/x").status_code for _ in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        # O limite das rotas de rastreamento substitui o padrão.
+        self.assertEqual(self.client.get("/api/campaigns").status_code, 200)
+
+    def test_tracking_app_installs_the_limiter_only_when_configured(self):
+        self._create_app()
+        self.assertNotIn("limiter", create_tracking_app(testing=True).extensions)
+
+        app = create_tracking_app(
+            testing=True,
+            config={"RATELIMIT_ENABLED": True, "RATELIMIT_TRACKING": "1 per minute"},
+        )
+        with app.app_context():
+            db.create_all()
+        client = app.test_client()
+        self.assertEqual(client.get("/track/open/x").status_code, 200)
+        self.assertEqual(client.get("/track/open/x").status_code, 429)
+        self.assertEqual(client.get("/metrics").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,17 @@
+# tracker.py
+"""Ponto de entrada do serviço de rastreamento.
+
+Cria a aplicação com apenas as rotas de rastreamento de aberturas e cliques
+(`create_tracking_app`), que pode ser executada em processos próprios e
+escalada independentemente da interface e do envio. Use o mesmo banco de
+dados e a mesma configuração da aplicação principal.
+
+Para executar o serviço:
+    $ flask serve --tracking-only --workers 4
+ou diretamente com o Gunicorn:
+    $ gunicorn --worker-class gevent --workers 4 tracker:app
+"""
+
+from app import create_tracking_app
+
+app = create_tracking_app()